@@ -0,0 +1,224 @@
+"""
+Search benchmark: runs ChessAI over a fixed set of positions at a fixed depth with a fixed seed, so node
+counts and best moves are reproducible and two versions of the search can be compared.
+
+    python bench.py                            # depth 4, prints a table
+    python bench.py --depth 5 --output new.json
+    python bench.py --output new.json --compare old.json
+    python bench.py --workers 1,2,4            # speedup of the parallel search
+    python bench.py --workers 1,4 --strategy lazy-smp
+
+The effective branching factor of a position is the node count of its last iteration divided by the
+node count of the one before.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from chess_bitboard import BOARD_CLASSES
+from chess_notation import START_FEN, move_name
+from chess_ai import ChessAI
+from chess_ai.ai_engine import ROOT_SPLIT, LAZY_SMP
+
+
+# name, FEN
+BENCH_POSITIONS: List[Tuple[str, str]] = [
+    ('start', START_FEN),
+    ('italian', 'r1bqk1nr/pppp1ppp/2n5/2b1p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4'),
+    ('sicilian', 'rnbqkb1r/pp2pppp/3p1n2/8/3NP3/8/PPP2PPP/RNBQKB1R w KQkq - 1 5'),
+    ('queens-gambit', 'rnbqkb1r/ppp2ppp/4pn2/3p4/2PP4/2N5/PP2PPPP/R1BQKBNR w KQkq - 2 4'),
+    ('kiwipete', 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1'),
+    ('middlegame', 'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10'),
+    ('rook-endgame', '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1'),
+    ('pawn-endgame', '8/pp3k2/2p5/3p1p2/3P1P2/2P5/PP3K2/8 b - - 0 1'),
+]
+
+
+def run_position(name: str, fen: str, depth: int, seed: int, board_class: type, hash_size_mb: float,
+                 workers: int = 1, strategy: str = ROOT_SPLIT) -> Dict:
+    """
+    Searches one position with a fresh ChessAI.
+    Args:
+        name (str): The position name.
+        fen (str): The position.
+        depth (int): The search depth.
+        seed (int): The seed of the root move tie-break.
+        board_class (type): The board implementation, ChessBoard or BitBoard.
+        hash_size_mb (float): The memory cap of the transposition table in megabytes.
+        workers (int): The number of search processes.
+        strategy (str): The parallel search strategy.
+    Returns:
+        Dict: The result of the search.
+    """
+    board = board_class.from_fen(fen)
+    ai = ChessAI(threading.Event(), board_class=board_class, hash_size_mb=hash_size_mb, seed=seed,
+                 iterative=True, workers=workers, strategy=strategy)
+    ai.max_depth = depth
+    start = time.perf_counter()
+    ai.find_best_move(board)
+    elapsed = time.perf_counter() - start
+    # the tables of the root split workers live in their processes
+    table = ai.transposition_table
+    hit_rate = table.hit_rate() if table is not None else None
+    ai.close()
+    iteration_nodes = ai.iteration_nodes
+    ebf = iteration_nodes[-1] / iteration_nodes[-2] if len(iteration_nodes) > 1 and iteration_nodes[-2] else None
+    return {
+        'name': name,
+        'fen': fen,
+        'depth': ai.completed_depth,
+        'nodes': ai.nodes,
+        'iteration_nodes': iteration_nodes,
+        'time': round(elapsed, 4),
+        'nps': round(ai.nodes / max(elapsed, 1e-9)),
+        'ebf': round(ebf, 3) if ebf is not None else None,
+        'hit_rate': round(hit_rate, 4) if hit_rate is not None else None,
+        'best_move': move_name(ai.best_move) if ai.best_move is not None else None,
+        'pv': [move_name(move) for move in ai.principal_variation],
+    }
+
+
+def run_bench(depth: int, seed: int, board_class: type, hash_size_mb: float, workers: int = 1,
+              strategy: str = ROOT_SPLIT) -> Dict:
+    """
+    Searches every benchmark position and prints a line per position and the totals.
+    Args:
+        depth (int): The search depth.
+        seed (int): The seed of the root move tie-break.
+        board_class (type): The board implementation, ChessBoard or BitBoard.
+        hash_size_mb (float): The memory cap of the transposition table in megabytes.
+        workers (int): The number of search processes.
+        strategy (str): The parallel search strategy.
+    Returns:
+        Dict: The machine-readable result of the benchmark.
+    """
+    results = []
+    print(f"{'position':<14} {'nodes':>9} {'time':>8} {'nps':>8} {'ebf':>6} {'tt hit':>6}  best  pv")
+    for name, fen in BENCH_POSITIONS:
+        result = run_position(name, fen, depth, seed, board_class, hash_size_mb, workers, strategy)
+        results.append(result)
+        ebf = f"{result['ebf']:.2f}" if result['ebf'] is not None else '-'
+        hit_rate = f"{result['hit_rate']:.1%}" if result['hit_rate'] is not None else '-'
+        print(f"{name:<14} {result['nodes']:>9} {result['time']:>7.2f}s {result['nps']:>8} {ebf:>6} {hit_rate:>6}  "
+              f"{result['best_move']}  {' '.join(result['pv'])}")
+
+    total_nodes = sum(result['nodes'] for result in results)
+    total_time = sum(result['time'] for result in results)
+    ebfs = [result['ebf'] for result in results if result['ebf'] is not None]
+    mean_ebf = sum(ebfs) / len(ebfs) if ebfs else None
+    total = {
+        'nodes': total_nodes,
+        'time': round(total_time, 4),
+        'nps': round(total_nodes / max(total_time, 1e-9)),
+        'ebf': round(mean_ebf, 3) if mean_ebf is not None else None,
+    }
+    print(f"{'total':<14} {total_nodes:>9} {total_time:>7.2f}s {total['nps']:>8} "
+          f"{total['ebf'] if total['ebf'] is not None else '-':>6}")
+    return {
+        'config': {'depth': depth, 'seed': seed, 'board': board_class.__name__, 'hash_size_mb': hash_size_mb,
+                   'workers': workers, 'strategy': strategy, 'python': platform.python_version(), 'cpus': os.cpu_count()},
+        'positions': results,
+        'total': total,
+    }
+
+
+def compare(result: Dict, baseline: Dict) -> bool:
+    """
+    Prints the differences between two benchmark results.
+    Args:
+        result (Dict): The new result.
+        baseline (Dict): The result to compare against.
+    Returns:
+        bool: True if every position searched the same number of nodes and chose the same move.
+    """
+    identical = True
+    old_positions = {position['name']: position for position in baseline['positions']}
+    for position in result['positions']:
+        old: Optional[Dict] = old_positions.get(position['name'])
+        if old is None:
+            print(f"{position['name']}: not in the baseline")
+            identical = False
+            continue
+        if old['nodes'] != position['nodes'] or old['best_move'] != position['best_move']:
+            identical = False
+            print(f"{position['name']}: nodes {old['nodes']} -> {position['nodes']}, "
+                  f"best move {old['best_move']} -> {position['best_move']}")
+    old_total, total = baseline['total'], result['total']
+    print(f"nodes {old_total['nodes']} -> {total['nodes']} ({total['nodes'] / max(old_total['nodes'], 1) - 1:+.1%}), "
+          f"nps {old_total['nps']} -> {total['nps']} ({total['nps'] / max(old_total['nps'], 1) - 1:+.1%})")
+    print("search unchanged" if identical else "search changed")
+    return identical
+
+
+def run_speedup(worker_counts: List[int], depth: int, seed: int, board_class: type, hash_size_mb: float,
+                strategy: str = ROOT_SPLIT) -> Dict:
+    """
+    Runs the benchmark with every worker count and prints the speedup over the first one.
+    Args:
+        worker_counts (List[int]): The numbers of search processes to compare, the baseline first.
+        depth (int): The search depth.
+        seed (int): The seed of the root move tie-break.
+        board_class (type): The board implementation, ChessBoard or BitBoard.
+        hash_size_mb (float): The memory cap of the transposition table in megabytes.
+        strategy (str): The parallel search strategy.
+    Returns:
+        Dict: The machine-readable result of every run, by worker count.
+    """
+    runs = {}
+    for workers in worker_counts:
+        print(f"workers: {workers}")
+        runs[workers] = run_bench(depth, seed, board_class, hash_size_mb, workers, strategy)
+        print()
+    base_time = runs[worker_counts[0]]['total']['time']
+    print(f"{'workers':>7} {'nodes':>9} {'time':>8} {'nps':>8} {'speedup':>8}")
+    for workers, result in runs.items():
+        total = result['total']
+        print(f"{workers:>7} {total['nodes']:>9} {total['time']:>7.2f}s {total['nps']:>8} "
+              f"{base_time / max(total['time'], 1e-9):>7.2f}x")
+    return {str(workers): result for workers, result in runs.items()}
+
+
+def main():
+    """
+    Parses the command line, runs the benchmark and writes or compares its result.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the search on a fixed set of positions.")
+    parser.add_argument('--depth', type=int, default=4, help="search depth (default 4)")
+    parser.add_argument('--seed', type=int, default=1, help="seed of the root move tie-break (default 1)")
+    parser.add_argument('--board', choices=sorted(BOARD_CLASSES), default='list', help="board implementation")
+    parser.add_argument('--hash', type=float, default=16, help="transposition table size in MB, 0 to disable")
+    parser.add_argument('--workers', default='1',
+                        help="number of search processes; a comma separated list prints a speedup table")
+    parser.add_argument('--strategy', choices=[ROOT_SPLIT, LAZY_SMP], default=ROOT_SPLIT,
+                        help="parallel search strategy")
+    parser.add_argument('--output', help="file to write the JSON result to")
+    parser.add_argument('--compare', help="JSON result of an earlier run to compare against")
+    args = parser.parse_args()
+
+    worker_counts = [int(count) for count in args.workers.split(',')]
+    if len(worker_counts) > 1:
+        result = run_speedup(worker_counts, args.depth, args.seed, BOARD_CLASSES[args.board], args.hash,
+                             args.strategy)
+        if args.output:
+            with open(args.output, 'w') as file:
+                json.dump(result, file, indent=2)
+        return
+
+    result = run_bench(args.depth, args.seed, BOARD_CLASSES[args.board], args.hash, worker_counts[0],
+                       args.strategy)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(result, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if not compare(result, baseline):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Builds the opening book file ChessAI consults before searching, from PGN collections and/or from games the
+engine plays against itself.
+
+    python build_book.py --pgn games.pgn --pgn more.pgn --output Assets/book.bin
+    python build_book.py --self-play 200 --depth 3 --output Assets/book.bin
+"""
+import argparse
+import random
+import threading
+import time
+from typing import List, Optional
+from chess_board import ChessBoard
+from chess_notation import parse_pgn, parse_san, Move
+from chess_ai import ChessAI
+from chess_ai.opening_book import OpeningBookBuilder
+
+PGN_RESULT_SCORES = {'1-0': 1.0, '0-1': 0.0, '1/2-1/2': 0.5}
+
+
+def add_pgn(builder: OpeningBookBuilder, path: str, max_ply: int) -> int:
+    """
+    Adds the games of a PGN file to the book. A game enters the book up to its first move the engine cannot
+    play, such as en passant or a promotion to another piece than a queen; games from a set-up position
+    are skipped.
+    Args:
+        builder (OpeningBookBuilder): The book being built.
+        path (str): The PGN file.
+        max_ply (int): The number of plies of every game to read.
+    Returns:
+        int: The number of games added.
+    """
+    with open(path, encoding='utf-8', errors='replace') as file:
+        games = parse_pgn(file.read())
+    added = 0
+    for tags, sans, result in games:
+        if 'FEN' in tags:
+            continue
+        board = ChessBoard()
+        moves: List[Move] = []
+        for san in sans[:max_ply]:
+            try:
+                move = parse_san(board, san)
+            except ValueError:
+                break
+            moves.append(move)
+            board.move_piece(move[0], move[1])
+            board.promote_pawn(move[1])
+            board.change_turn()
+        if moves:
+            builder.add_game(ChessBoard(), moves, PGN_RESULT_SCORES.get(result))
+            added += 1
+    return added
+
+
+def play_game(white: ChessAI, black: ChessAI, max_ply: int) -> List[Move]:
+    """
+    Plays the opening of a game between two AIs.
+    Args:
+        white (ChessAI): The AI playing white.
+        black (ChessAI): The AI playing black.
+        max_ply (int): The number of plies to play.
+    Returns:
+        List[Move]: The moves played.
+    """
+    board = ChessBoard()
+    moves = []
+    for ply in range(max_ply):
+        ai = white if board.is_white_turn() else black
+        ai.find_best_move(board)
+        move = ai.best_move
+        if move is None:
+            break
+        moves.append(move)
+        board.move_piece(move[0], move[1])
+        board.promote_pawn(move[1])
+        board.change_turn()
+    return moves
+
+
+def add_self_play(builder: OpeningBookBuilder, games: int, depth: int, max_ply: int, seed: Optional[int]) -> int:
+    """
+    Adds the openings of games the engine plays against itself. The AIs break ties between equally good
+    moves at random, so the games differ; the results are unknown and weigh like draws.
+    Args:
+        builder (OpeningBookBuilder): The book being built.
+        games (int): The number of games to play.
+        depth (int): The search depth of the AIs.
+        max_ply (int): The number of plies of every game.
+        seed (Optional[int]): Seed of the AI tie-breaks, None for a random one.
+    Returns:
+        int: The number of games added.
+    """
+    rng = random.Random(seed)
+    for game in range(games):
+        white = ChessAI(threading.Event(), seed=rng.randrange(1 << 32))
+        black = ChessAI(threading.Event(), seed=rng.randrange(1 << 32))
+        white.max_depth = black.max_depth = depth
+        builder.add_game(ChessBoard(), play_game(white, black, max_ply))
+        print(f"self-play game {game + 1}/{games}")
+    return games
+
+
+def main():
+    """
+    Parses the command line and builds the book.
+    """
+    parser = argparse.ArgumentParser(description="Build an opening book file.")
+    parser.add_argument('--pgn', action='append', default=[], help="PGN file to read, may be repeated")
+    parser.add_argument('--self-play', type=int, default=0, help="number of self-play games to add")
+    parser.add_argument('--depth', type=int, default=3, help="search depth of the self-play games (default 3)")
+    parser.add_argument('--seed', type=int, help="seed of the self-play games")
+    parser.add_argument('--max-ply', type=int, default=16, help="plies of every game in the book (default 16)")
+    parser.add_argument('--min-games', type=int, default=1, help="games a move needs to enter the book")
+    parser.add_argument('--output', required=True, help="book file to write")
+    args = parser.parse_args()
+    if not args.pgn and not args.self_play:
+        parser.error("give at least one --pgn file or --self-play games")
+
+    start = time.perf_counter()
+    builder = OpeningBookBuilder(args.max_ply)
+    for path in args.pgn:
+        print(f"{path}: {add_pgn(builder, path, args.max_ply)} games")
+    if args.self_play:
+        add_self_play(builder, args.self_play, args.depth, args.max_ply, args.seed)
+    records = builder.write(args.output, args.min_games)
+    print(f"{args.output}: {records} moves from {builder.games} games, {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
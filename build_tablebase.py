@@ -0,0 +1,66 @@
+"""
+Generates the endgame tablebase ChessAI probes during its search, by retrograde analysis.
+
+    python build_tablebase.py --output Assets/tablebase.bin                 # every 3 piece ending
+    python build_tablebase.py --pieces 4 --workers 4 --output Assets/tablebase.bin
+    python build_tablebase.py --tables KQvKR,KRvKP --output endings.bin    # these and what they need
+
+The 3 piece tables take seconds; a 4 piece table takes minutes, and the tables that do not depend on each
+other are generated in parallel.
+"""
+import argparse
+import collections
+import os
+import time
+from chess_ai.tablebase import TableLayout, decode_value, table_name
+from chess_ai.tablebase_generator import TablebaseGenerator, all_table_names
+
+
+def print_table(name: str, elapsed: float, table: bytes):
+    """
+    Prints the statistics of a generated table.
+    Args:
+        name (str): The table name.
+        elapsed (float): The generation time in seconds.
+        table (bytes): The table values.
+    """
+    wins = losses = longest = 0
+    for value, count in collections.Counter(table).items():
+        if value:
+            wdl, distance = decode_value(value)
+            if wdl > 0:
+                wins += count
+                longest = max(longest, distance)
+            else:
+                losses += count
+    print(f"{name:<8} {TableLayout(name).size:>10} {wins:>10} {losses:>10} {longest:>8} {elapsed:>8.1f}s")
+
+
+def main():
+    """
+    Parses the command line, generates the tables and writes the tablebase file.
+    """
+    parser = argparse.ArgumentParser(description="Generate an endgame tablebase file.")
+    parser.add_argument('--pieces', type=int, default=3, choices=[3, 4],
+                        help="generate every table with up to this many pieces, kings included (default 3)")
+    parser.add_argument('--tables', help="comma separated table names, e.g. KQvKR, instead of --pieces")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="number of processes")
+    parser.add_argument('--output', required=True, help="tablebase file to write")
+    args = parser.parse_args()
+
+    names = args.tables.split(',') if args.tables else all_table_names(args.pieces)
+    for name in names:
+        if not set(name) <= set('KQRBNPv') or name.count('vK') != 1 or not name.startswith('K') or \
+                table_name(*name[1:].split('vK'))[0] != name:
+            parser.error(f"invalid table name {name}, expected e.g. KQvKR with the stronger side first")
+    generator = TablebaseGenerator(args.workers)
+    start = time.perf_counter()
+    print(f"{'table':<8} {'positions':>10} {'wins':>10} {'losses':>10} {'max dtm':>8} {'time':>9}")
+    generator.generate(names, lambda name, elapsed: print_table(name, elapsed, generator.tables[name]))
+    generator.write(args.output)
+    print(f"{args.output}: {len(generator.tables)} tables, {os.path.getsize(args.output)} bytes, "
+          f"{time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
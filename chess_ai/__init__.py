@@ -1,6 +1,7 @@
 from .board_evaluation import Evaluation
+from .transposition_table import TranspositionTable
 from .minimax_algorithm import Minimax
 from .ai_engine import ChessAI
 
 
-__all__ = ["Evaluation", "Minimax", 'ChessAI']
\ No newline at end of file
+__all__ = ["Evaluation", "TranspositionTable", "Minimax", 'ChessAI']
\ No newline at end of file
@@ -1,8 +1,15 @@
+import random
 import threading
-from chess_engine import ChessBoard
-from typing import Optional, Tuple
-from copy import deepcopy
+from chess_board import ChessBoard
+from typing import Optional, Tuple, List
 from chess_ai import Minimax
+from chess_ai.minimax_algorithm import IterationCallback
+from chess_ai.transposition_table import TranspositionTable, SharedTranspositionTable, Move
+from chess_ai.parallel_search import ProcessSearch, RootSplitSearch, LazySMPSearch
+from chess_ai.opening_book import OpeningBook
+from chess_ai.tablebase import Tablebase
+
+ROOT_SPLIT, LAZY_SMP = 'root-split', 'lazy-smp'  # The parallel search strategies.
 
 
 class ChessAI:
@@ -12,25 +19,184 @@ class ChessAI:
     This class utilizes the algorithm to find the best move for the given chess position.
     Args:
         stop_event (threading.Event): Event to signal the algorithm to stop searching.
+        board_class (Optional[type]): The board implementation to search on, e.g. BitBoard.
+        hash_size_mb (float): The memory cap of the transposition table in megabytes, 0 to disable it.
+        time_limit (Optional[float]): The time budget of a move in seconds, enables iterative deepening.
+        node_limit (Optional[int]): The node budget of a move, enables iterative deepening.
+        seed (Optional[int]): Seed of the tie-break between equally ranked root moves, None for no randomness.
+        quiescence (bool): Whether the search resolves captures at its leaves.
+        delta_margin (Optional[int]): Delta pruning margin of the quiescence search, None to disable it.
+        iterative (bool): Whether to deepen iteratively even without a budget.
+        workers (int): The number of processes searching in parallel, 1 to search in the calling thread.
+        strategy (str): The parallel search strategy, ROOT_SPLIT or LAZY_SMP.
+        book_path (Optional[str]): The opening book file played from before searching, None for no book.
+        tablebase_path (Optional[str]): The endgame tablebase file ending the search in small endings, None for none.
     """
-    def __init__(self, stop_event: threading.Event):
+    def __init__(self, stop_event: threading.Event, board_class: Optional[type] = None, hash_size_mb: float = 16,
+                 time_limit: Optional[float] = None, node_limit: Optional[int] = None, seed: Optional[int] = None,
+                 quiescence: bool = True, delta_margin: Optional[int] = None, iterative: bool = False,
+                 workers: int = 1, strategy: str = ROOT_SPLIT, book_path: Optional[str] = None,
+                 tablebase_path: Optional[str] = None):
         """
         Initialize the ChessAI instance.
         Args:
             stop_event (threading.Event): Event to signal the algorithm to stop searching.
+            board_class (Optional[type]): The board implementation to search on, None for the type of the given
+                board. The given board is copied into it through a snapshot.
+            hash_size_mb (float): The memory cap of the transposition table in megabytes, 0 to disable it.
+                The table is kept between the searches of a game.
+            time_limit (Optional[float]): The time budget of a move in seconds. When a time or node budget is
+                set, the search deepens iteratively up to max_depth and stops when the budget runs out.
+            node_limit (Optional[int]): The node budget of a move.
+            seed (Optional[int]): Seed of the random tie-break between equally ranked root moves, which gives
+                playing variety. None keeps the search fully deterministic.
+            quiescence (bool): Whether the search resolves the captures left at its leaves with a capture-only
+                quiescence search instead of evaluating them statically.
+            delta_margin (Optional[int]): Delta pruning margin of the quiescence search: captures that cannot
+                raise the score above alpha even with this margin are skipped. None to disable it.
+            iterative (bool): Whether to deepen iteratively up to max_depth even without a budget, which
+                gives the node count of every depth.
+            workers (int): The number of processes searching in parallel. Above 1 the search always deepens
+                iteratively and runs in a pool of worker processes, following strategy.
+            strategy (str): How the workers share the search when there are several: ROOT_SPLIT hands
+                them the root moves, each worker with its own transposition table of hash_size_mb (see
+                RootSplitSearch); LAZY_SMP has them all search the whole position with one transposition
+                table of hash_size_mb in shared memory (see LazySMPSearch).
+            book_path (Optional[str]): The opening book file, as written by build_book.py. While the position
+                is in the book a book move is played without searching, drawn by weight when a seed is set.
+            tablebase_path (Optional[str]): The endgame tablebase file, as written by build_tablebase.py. The
+                search scores the positions it holds exactly, by their distance to mate, without searching them.
         """
+        if strategy not in (ROOT_SPLIT, LAZY_SMP):
+            raise ValueError(f"Unknown search strategy: {strategy}")
+        self._tablebase = Tablebase(tablebase_path) if tablebase_path is not None else None
         self._stop_event = stop_event
+        self._board_class = board_class
+        self.transposition_table: Optional[TranspositionTable] = None
+        self._parallel_search: Optional[ProcessSearch] = None
+        if workers > 1 and strategy == LAZY_SMP:
+            self.transposition_table = SharedTranspositionTable(max(hash_size_mb, 1))
+            self._parallel_search = LazySMPSearch(workers, stop_event, self.transposition_table, quiescence,
+                                                  delta_margin, self._tablebase)
+        elif workers > 1:
+            self._parallel_search = RootSplitSearch(workers, stop_event, hash_size_mb, quiescence, delta_margin,
+                                                    self._tablebase)
+        elif hash_size_mb > 0:
+            self.transposition_table = TranspositionTable(hash_size_mb)
         self.best_move: Optional[Tuple[Tuple[int, int], Tuple[int, int]]] = None
+        self.score = 0
         self.max_depth = 3
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self._rng = random.Random(seed) if seed is not None else None
+        self.quiescence = quiescence
+        self.delta_margin = delta_margin
+        self.iterative = iterative
+        self.completed_depth = 0
+        self.principal_variation: List[Tuple[Tuple[int, int], Tuple[int, int]]] = []
+        self.nodes = 0
+        self.iteration_nodes: List[int] = []
+        # called after every completed iteration with its depth, score, node count and principal variation
+        self.on_iteration: Optional[IterationCallback] = None
+        self._book = OpeningBook(book_path) if book_path is not None else None
 
-    def find_best_move(self, board: ChessBoard):
+    def find_best_move(self, board: ChessBoard, legal_moves: Optional[List[Move]] = None):
         """
         Find the best move for the given chess position.
         Args:
             board (ChessBoard): The current chessboard state.
+            legal_moves (Optional[List[Move]]): The legal moves of the position when already known, e.g. from a
+                MoveCache, so that the search does not generate them again.
         """
-        board = deepcopy(board)
+        board_class = self._board_class if self._board_class is not None else type(board)
+        board = board_class.from_snapshot(board.snapshot())
         self.best_move = None
-        minimax = Minimax(board, self.max_depth, self._stop_event)
-        minimax.find_best_move()
+        if self._book is not None and self._play_book_move(board):
+            return
+        if self._parallel_search is not None:
+            self._find_best_move_parallel(board, legal_moves)
+            return
+        if self.transposition_table is not None:
+            self.transposition_table.new_search()
+        minimax = Minimax(board, self.max_depth, self._stop_event, self.transposition_table, self._rng,
+                          self.quiescence, self.delta_margin, tablebase=self._tablebase,
+                          on_iteration=self.on_iteration, root_moves=legal_moves)
+        if self.iterative or self.time_limit is not None or self.node_limit is not None:
+            minimax.iterative_deepening(self.time_limit, self.node_limit)
+        else:
+            minimax.find_best_move()
         self.best_move = minimax.best_move
+        self.score = minimax.score
+        self.completed_depth = minimax.completed_depth
+        self.principal_variation = minimax.get_principal_variation()
+        self.nodes = minimax.get_nodes()
+        self.iteration_nodes = minimax.iteration_nodes
+
+    def _play_book_move(self, board: ChessBoard) -> bool:
+        """
+        Looks the position up in the opening book.
+        Args:
+            board (ChessBoard): The chessboard state.
+        Returns:
+            bool: True if a book move was found and set as the best move.
+        """
+        move = self._book.choose_move(board, self._rng)
+        if move is None:
+            return False
+        self.best_move = move
+        self.score = 0
+        self.completed_depth = 0
+        self.principal_variation = [move]
+        self.nodes = 0
+        self.iteration_nodes = []
+        return True
+
+    def ponder(self, board: ChessBoard, max_depth: int):
+        """
+        Searches a position the opponent may reach while the opponent thinks, without any budget, until the
+        depth is reached or the stop event is set. The results fill the transposition table, and best_move
+        holds the move of the deepest completed iteration.
+        Args:
+            board (ChessBoard): The position after the expected opponent move.
+            max_depth (int): The deepest iteration.
+        """
+        settings = self.max_depth, self.time_limit, self.node_limit, self.iterative
+        self.max_depth, self.time_limit, self.node_limit, self.iterative = max_depth, None, None, True
+        try:
+            self.find_best_move(board)
+        finally:
+            self.max_depth, self.time_limit, self.node_limit, self.iterative = settings
+
+    def _find_best_move_parallel(self, board: ChessBoard, legal_moves: Optional[List[Move]]):
+        """
+        Find the best move for the given chess position with the worker processes.
+        Args:
+            board (ChessBoard): The chessboard state, already copied.
+            legal_moves (Optional[List[Move]]): The legal moves of the position, if known.
+        """
+        search = self._parallel_search
+        search.search(board, self.max_depth, self.time_limit, self.node_limit, self._rng, self.on_iteration,
+                      legal_moves)
+        self.best_move = search.best_move
+        self.score = search.score
+        self.completed_depth = search.completed_depth
+        self.principal_variation = search.principal_variation
+        self.nodes = search.nodes
+        self.iteration_nodes = search.iteration_nodes
+
+    def close(self):
+        """
+        Stops the worker processes of the parallel search, frees the shared transposition table and unmaps the
+        opening book and the tablebase, if any.
+        """
+        if self._parallel_search is not None:
+            self._parallel_search.close()
+        if isinstance(self.transposition_table, SharedTranspositionTable):
+            self.transposition_table.unlink()
+            self.transposition_table = None
+        if self._book is not None:
+            self._book.close()
+            self._book = None
+        if self._tablebase is not None:
+            self._tablebase.close()
+            self._tablebase = None
@@ -0,0 +1,212 @@
+import atexit
+import threading
+import traceback
+from typing import Optional, List
+from chess_board import ChessBoard
+from chess_ai.ai_engine import ChessAI
+from chess_ai.minimax_algorithm import IterationCallback
+from chess_ai.process_context import get_process_context
+from chess_ai.transposition_table import Move
+
+SEARCH, PONDER, CLOSE = 'search', 'ponder', 'close'  # The requests sent to the worker process.
+READY, INFO, RESULT, ERROR = 'ready', 'info', 'result', 'error'  # The replies of the worker process.
+
+
+def _serve(connection, stop_event, settings: dict):
+    """
+    The worker process: owns a ChessAI and searches the positions it receives until it is asked to close
+    or the main process goes away. Every completed iteration is sent back as it finishes.
+    Args:
+        connection (multiprocessing.connection.Connection): The worker end of the pipe.
+        stop_event (multiprocessing.Event): Set by the main process to stop the running search.
+        settings (dict): The keyword arguments of ChessAI, stop_event excluded.
+    """
+    try:
+        ai = ChessAI(stop_event=stop_event, **settings)
+    except Exception:
+        connection.send((ERROR, traceback.format_exc()))
+        connection.close()
+        return
+    ai.on_iteration = lambda depth, score, nodes, principal_variation: \
+        connection.send((INFO, depth, score, nodes, principal_variation))
+    try:
+        connection.send((READY, ai.max_depth))
+        while True:
+            try:
+                request = connection.recv()
+            except EOFError:
+                break
+            if request[0] == CLOSE:
+                break
+            kind, board_class, snapshot, max_depth, legal_moves = request
+            try:
+                board = board_class.from_snapshot(snapshot)
+                if kind == PONDER:
+                    ai.ponder(board, max_depth)
+                else:
+                    ai.max_depth = max_depth
+                    ai.find_best_move(board, legal_moves)
+            except Exception:
+                connection.send((ERROR, traceback.format_exc()))
+                continue
+            connection.send((RESULT, ai.best_move, ai.score, ai.completed_depth, ai.principal_variation, ai.nodes))
+    finally:
+        ai.close()
+        connection.close()
+
+
+class AIProcess:
+    """
+    A ChessAI searching in its own process, so that a search never holds the interpreter lock of the caller,
+    e.g. the GUI. It is a drop-in replacement of ChessAI for one caller at a time: find_best_move and ponder
+    send the position to the worker and block the calling thread, without holding the interpreter lock,
+    until the result comes back; the completed iterations are passed to on_iteration as they arrive.
+    Args:
+        **settings: The keyword arguments of ChessAI, stop_event excluded: the process owns stop_event,
+            which stops the running search when set from any thread.
+    """
+    def __init__(self, **settings):
+        """
+        Initializes an AIProcess instance and starts its worker process.
+        Args:
+            **settings: The keyword arguments of ChessAI, stop_event excluded.
+        """
+        self._context = get_process_context()
+        self._settings = settings
+        self.stop_event = self._context.Event()
+        self._lock = threading.Lock()
+        self._connection = None
+        self._process = None
+        # a worker still running at exit would keep the interpreter waiting for it
+        atexit.register(self.close)
+        self.max_depth = self._start()
+        self.best_move: Optional[Move] = None
+        self.score = 0
+        self.completed_depth = 0
+        self.principal_variation: List[Move] = []
+        self.nodes = 0
+        self.on_iteration: Optional[IterationCallback] = None
+
+    def _start(self) -> int:
+        """
+        Starts the worker process.
+        Returns:
+            int: The default maximum depth of the worker AI.
+        Raises:
+            RuntimeError: If the worker could not create its AI.
+        """
+        self._connection, worker_connection = self._context.Pipe()
+        # not a daemon: the worker starts the processes of the parallel search itself
+        self._process = self._context.Process(target=_serve, args=(worker_connection, self.stop_event,
+                                                                   self._settings), name='chess-ai')
+        self._process.start()
+        worker_connection.close()
+        try:
+            reply = self._connection.recv()
+        except EOFError:
+            reply = (ERROR, f"exit code {self._process.exitcode}")
+        if reply[0] == ERROR:
+            self._connection.close()
+            self._connection = None
+            self._process.join()
+            raise RuntimeError(f"the AI process did not start:\n{reply[1]}")
+        return reply[1]
+
+    def _restart(self) -> RuntimeError:
+        """
+        Replaces a worker process that is gone, e.g. killed, by a new one for the next request.
+        Returns:
+            RuntimeError: The error reporting the lost search, to be raised by the caller.
+        """
+        self._connection.close()
+        self._process.join()
+        exitcode = self._process.exitcode
+        self._start()
+        return RuntimeError(f"the AI process exited unexpectedly with code {exitcode}, restarted it")
+
+    def _receive(self) -> tuple:
+        """
+        Returns:
+            tuple: The next reply of the worker.
+        Raises:
+            RuntimeError: If the search failed in the worker, which keeps serving, or if the worker is gone,
+                in which case a new one is started for the next request.
+        """
+        try:
+            reply = self._connection.recv()
+        except (EOFError, OSError):
+            reply = None
+        if reply is None:
+            raise self._restart()
+        if reply[0] == ERROR:
+            raise RuntimeError(f"the AI process failed:\n{reply[1]}")
+        return reply
+
+    def _request(self, kind: str, board: ChessBoard, max_depth: int, legal_moves: Optional[List[Move]]):
+        """
+        Sends a search to the worker and waits for its result, passing the completed iterations to on_iteration.
+        Args:
+            kind (str): SEARCH or PONDER.
+            board (ChessBoard): The position.
+            max_depth (int): The deepest iteration.
+            legal_moves (Optional[List[Move]]): The legal moves of the position, if known.
+        Raises:
+            RuntimeError: If the search failed or the worker process is gone.
+        """
+        with self._lock:
+            self.best_move = None
+            self.score = 0
+            self.completed_depth = 0
+            self.principal_variation = []
+            self.nodes = 0
+            if self._connection is None:
+                return
+            try:
+                self._connection.send((kind, type(board), board.snapshot(), max_depth, legal_moves))
+                sent = True
+            except OSError:
+                sent = False
+            if not sent:
+                raise self._restart()
+            while True:
+                reply = self._receive()
+                if reply[0] == RESULT:
+                    _, self.best_move, self.score, self.completed_depth, self.principal_variation, self.nodes = reply
+                    return
+                if self.on_iteration is not None:
+                    self.on_iteration(*reply[1:])
+
+    def find_best_move(self, board: ChessBoard, legal_moves: Optional[List[Move]] = None):
+        """
+        Find the best move for the given chess position in the worker process, see ChessAI.find_best_move.
+        Args:
+            board (ChessBoard): The current state of the chessboard.
+            legal_moves (Optional[List[Move]]): The legal moves of the position, if known.
+        """
+        self._request(SEARCH, board, self.max_depth, legal_moves)
+
+    def ponder(self, board: ChessBoard, max_depth: int):
+        """
+        Searches a position the opponent may reach in the worker process, see ChessAI.ponder.
+        Args:
+            board (ChessBoard): The position after the expected opponent move.
+            max_depth (int): The deepest iteration.
+        """
+        self._request(PONDER, board, max_depth, None)
+
+    def close(self):
+        """
+        Stops the running search, if any, and the worker process. Searches requested afterwards find no move.
+        """
+        atexit.unregister(self.close)
+        self.stop_event.set()
+        with self._lock:
+            if self._connection is None:
+                return
+            try:
+                self._connection.send((CLOSE,))
+            except OSError:
+                pass
+            self._connection.close()
+            self._connection = None
+        self._process.join()
@@ -0,0 +1,75 @@
+"""
+Evaluates many positions at once with NumPy, for analysis and tuning jobs.
+
+A position is encoded as 64 int8 square codes, row * 8 + col, in the layout of ChessBoard.snapshot: 0 for an
+empty square, else the piece index of zobrist.PIECE_INDEX plus 1. NumPy is an optional dependency, only needed
+by this module.
+"""
+from typing import Iterable
+from evaluation_tables import PIECE_SQUARE_SCORE
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+PIECE_CODES = len(PIECE_SQUARE_SCORE) + 1  # The square codes, empty included.
+BATCH_SIZE = 1 << 16  # The positions gathered at once, which bounds the memory of the intermediate array.
+
+
+def _require_numpy():
+    """
+    Raises:
+        ImportError: If NumPy is not installed.
+    """
+    if np is None:
+        raise ImportError("batch evaluation requires numpy: pip install numpy")
+
+
+def _score_table():
+    """
+    Returns:
+        np.ndarray: The (PIECE_CODES, 64) material and piece-square score of every square code on every square,
+            from white's point of view; the empty code scores 0.
+    """
+    table = np.zeros((PIECE_CODES, 64), dtype=np.int32)
+    table[1:] = PIECE_SQUARE_SCORE
+    return table
+
+
+def encode_positions(boards: Iterable) -> 'np.ndarray':
+    """
+    Encodes positions for evaluate_positions.
+    Args:
+        boards (Iterable[ChessBoard | BitBoard]): The positions.
+    Returns:
+        np.ndarray: The (N, 64) int8 square codes.
+    """
+    _require_numpy()
+    squares = b''.join(board.snapshot()[:64] for board in boards)
+    return np.frombuffer(squares, dtype=np.int8).reshape(-1, 64)
+
+
+def evaluate_positions(squares: 'np.ndarray') -> 'np.ndarray':
+    """
+    Computes the material and piece-square score of many positions: the score Evaluation.evaluate_board
+    gives each of them, from white's point of view.
+    Args:
+        squares (np.ndarray): The (N, 64) int8 square codes of the positions, see encode_positions.
+    Returns:
+        np.ndarray: The N int32 scores.
+    """
+    _require_numpy()
+    squares = np.asarray(squares)
+    if squares.ndim != 2 or squares.shape[1] != 64:
+        raise ValueError(f"expected an (N, 64) array of square codes, got shape {squares.shape}")
+    if squares.size and (squares.min() < 0 or squares.max() >= PIECE_CODES):
+        raise ValueError(f"square codes must be between 0 and {PIECE_CODES - 1}")
+    table = _score_table()
+    columns = np.arange(64)
+    scores = np.empty(len(squares), dtype=np.int32)
+    for start in range(0, len(squares), BATCH_SIZE):
+        block = squares[start:start + BATCH_SIZE].astype(np.intp)
+        scores[start:start + BATCH_SIZE] = table[block, columns].sum(axis=1)
+    return scores
+
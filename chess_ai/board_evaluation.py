@@ -1,87 +1,12 @@
-from typing import List, Dict
+from typing import Optional
 from chess_board import ChessBoard
 from chess_piece import Piece
+from chess_ai.tablebase import Tablebase
+from evaluation_tables import PIECE_VALUE, POSITION_SCORE
 
 CHECKMATE = 100000  # The score for checkmate.
 STALEMATE = 0  # The score for stalemate.
 
-PAWN_SCORE = [
-    [8, 8, 8, 8, 8, 8, 8, 8],
-    [8, 8, 8, 8, 8, 8, 8, 8],
-    [5, 6, 7, 7, 7, 7, 6, 5],
-    [2, 3, 3, 5, 5, 3, 3, 2],
-    [1, 2, 3, 4, 4, 3, 2, 1],
-    [1, 1, 3, 4, 4, 3, 1, 1],
-    [1, 1, 1, 0, 0, 1, 1, 1],
-    [0, 0, 0, 0, 0, 0, 0, 0]
-]
-
-KNIGHT_SCORE = [
-    [-10, -8, -6, -6, -6, -6, -8, -10],
-    [-8, -4, 0, 0, 0, 0, -4, -8],
-    [-6, 0, 4, 6, 6, 4, 0, -6],
-    [-6, 2, 6, 8, 8, 6, 2, -6],
-    [-6, 0, 6, 8, 8, 6, 0, -6],
-    [-6, 2, 4, 6, 6, 4, 2, -6],
-    [-8, -4, 0, 2, 2, 0, -4, -8],
-    [-10, -8, -6, -6, -6, -6, -8, -10]
-]
-
-BISHOP_SCORE = [
-    [5, 0, 0, 0, 0, 0, 0, 5],
-    [0, 5, 0, 0, 0, 0, 5, 0],
-    [0, 0, 10, 5, 5, 10, 0, 0],
-    [0, 0, 10, 15, 15, 10, 0, 0],
-    [0, 0, 10, 15, 15, 10, 0, 0],
-    [0, 0, 10, 5, 5, 10, 0, 0],
-    [0, 5, 0, 0, 0, 0, 5, 0],
-    [5, 0, 0, 0, 0, 0, 0, 5]
-]
-
-ROOK_SCORE = [
-    [0, 0, 4, 10, 10, 4, 0, 0],
-    [4, 4, 4, 10, 10, 4, 4, 4],
-    [1, 1, 2, 5, 5, 2, 1, 1],
-    [1, 2, 3, 10, 10, 3, 2, 1],
-    [1, 2, 3, 10, 10, 3, 2, 1],
-    [1, 1, 2, 5, 5, 2, 1, 1],
-    [4, 4, 4, 10, 10, 4, 4, 4],
-    [0, 0, 4, 10, 10, 4, 0, 0]
-]
-
-QUEEN_SCORE = [
-    [-5, -5, -5, -5, -5, -5, -5, -5],
-    [-5, 0, 5, 5, 5, 5, 0, -5],
-    [-5, 0, 5, 5, 5, 5, 0, -5],
-    [-5, 0, 5, 5, 5, 5, 0, -5],
-    [-5, 0, 5, 5, 5, 5, 0, -5],
-    [-5, 0, 5, 5, 5, 5, 0, -5],
-    [-5, 0, 5, 5, 5, 5, 0, -5],
-    [-5, -5, -5, -5, -5, -5, -5, -5]
-]
-
-KING_SCORE = [
-    [0, 0, 0, 0, 0, 0, 0, 0],
-    [0, 0, 5, 5, 5, 5, 0, 0],
-    [0, 5, 5, 10, 10, 5, 5, 0],
-    [0, 5, 10, 10, 10, 10, 5, 0],
-    [0, 5, 10, 10, 10, 10, 5, 0],
-    [0, 0, 5, 10, 10, 5, 0, 0],
-    [0, 5, 5, -5, -5, 5, 5, 0],
-    [0, 0, 10, 0, 0, 0, 10, 0]
-]
-
-PIECE_VALUE: Dict[str, int] = {"k": 0, "q": 900, "r": 500, "b": 310, "n": 300, "p": 100}
-
-POSITION_SCORE: Dict[str, List[List[int]]] = {
-    "n": KNIGHT_SCORE,
-    "b": BISHOP_SCORE,
-    "q": QUEEN_SCORE,
-    "r": ROOK_SCORE,
-    "p": PAWN_SCORE,
-    "k": KING_SCORE
-}
-
 
 class Evaluation:
     """
@@ -89,19 +14,27 @@ class Evaluation:
 
     This class provides methods to evaluate the current state of a chessboard,
     assigning scores based on various factors such as piece values and game end status.
+    The material and piece-square part of the score is kept up to date by the board on every move,
+    so it is read in O(1) instead of being rescanned from the 64 squares.
     Attributes:
         _rows (tuple): A tuple representing the range of rows on the chessboard.
         _board (ChessBoard): The chessboard instance to be evaluated.
+        _debug (bool): Whether to cross-check the incremental score against a full scan of the board.
+        _tablebase (Optional[Tablebase]): The endgame tablebase giving the exact score of small endings, if any.
     """
 
-    def __init__(self, board: ChessBoard):
+    def __init__(self, board: ChessBoard, debug: bool = False, tablebase: Optional[Tablebase] = None):
         """
         Initializes an Evaluation object with the given chessboard.
         Args:
             board (ChessBoard): The chessboard instance to be evaluated.
+            debug (bool): Whether every evaluation cross-checks the incremental score against a full scan.
+            tablebase (Optional[Tablebase]): The endgame tablebase giving the exact score of small endings.
         """
         self._rows = tuple(range(8))
         self._board = board
+        self._debug = debug
+        self._tablebase = tablebase
 
     def evaluate_board(self):
         """
@@ -109,18 +42,56 @@ class Evaluation:
         an evaluation score. The score represents the advantage of the current
         position for the white player. Positive scores indicate an advantage
         for white, negative scores indicate an advantage for black.
+
+        This is a static evaluation: it does not generate moves, so checkmate and stalemate are
+        detected by the caller from its own move list, see evaluate_game_end.
         Returns:
             int: The evaluation score of the current position.
         """
-        if self._board.is_game_end():
-            end_status = self._board.game_end_status()
-            if end_status == 0:  # Black won
-                return -CHECKMATE
-            elif end_status == 1:  # White won
-                return CHECKMATE
-            else:  # Stalemate
-                return STALEMATE
+        evaluation_score = self._board.get_score()
+        if self._debug:
+            full_score = self.scan_board()
+            if evaluation_score != full_score:
+                raise AssertionError(f"incremental score {evaluation_score} differs from full scan {full_score}")
+        return evaluation_score
+
+    def evaluate_game_end(self, ply: int = 0) -> int:
+        """
+        Evaluates a position in which the side to move has no legal moves.
+        Args:
+            ply (int): The distance of the position from the root of the search, so that faster mates score higher.
+        Returns:
+            int: The score from the side to move's point of view: a loss if it is checkmated, else a stalemate.
+        """
+        if self._board.is_check():
+            return -(CHECKMATE - ply)
+        return STALEMATE
 
+    def evaluate_tablebase(self, ply: int = 0) -> Optional[int]:
+        """
+        Looks the position up in the endgame tablebase.
+        Args:
+            ply (int): The distance of the position from the root of the search, so that faster mates score higher.
+        Returns:
+            Optional[int]: The exact score from the side to move's point of view, scored like a checkmate
+                found by the search, or None if the position is not in the tablebase.
+        """
+        if self._tablebase is None:
+            return None
+        result = self._tablebase.probe(self._board)
+        if result is None:
+            return None
+        wdl, distance = result
+        if wdl == 0:
+            return STALEMATE
+        return wdl * (CHECKMATE - ply - distance)
+
+    def scan_board(self) -> int:
+        """
+        Computes the material and position score by scanning every square of the board.
+        Returns:
+            int: The score from white's point of view.
+        """
         evaluation_score = 0
         for row in self._rows:
             for col in self._rows:
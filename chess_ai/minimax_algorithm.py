@@ -1,9 +1,22 @@
 import random
 import threading
+import time
 from chess_board import ChessBoard
+from typing import Callable, Optional, List
 from chess_ai import Evaluation
+from chess_ai.board_evaluation import PIECE_VALUE, CHECKMATE
+from chess_ai.transposition_table import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND, Move
+from chess_ai.move_ordering import MoveOrdering
+from chess_ai.tablebase import Tablebase
 
 MAX_INT32 = 2147483647
+MATE_BOUND = CHECKMATE - 1000  # Scores beyond this bound are mate scores, which depend on the ply.
+# Nodes between two checks of the stop event and the clock, a power of two. Setting a multiprocessing.Event
+# takes a lock on every check, and a few hundred nodes are a few milliseconds of search.
+STOP_CHECK_INTERVAL = 256
+
+# Called after every completed search iteration with its depth, root score, total node count and principal variation.
+IterationCallback = Callable[[int, int, int, List[Move]], None]
 
 
 class Minimax:
@@ -12,29 +25,174 @@ class Minimax:
 
     This class uses the Minimax algorithm to determine the best move for a given chess position.
     Args:
-        board (ChessBoard): The current chessboard state.
+        board (ChessBoard): The current chessboard state, either a ChessBoard or a BitBoard.
         max_depth (int): The maximum search depth for the Minimax algorithm.
         stop_event (threading.Event): Event to signal the algorithm to stop searching.
+        transposition_table (Optional[TranspositionTable]): Table of earlier search results to reuse, if any.
+        rng (Optional[random.Random]): When given, breaks ties between equally ranked root moves, for variety.
+        quiescence (bool): Whether to resolve the captures left at the leaves with a quiescence search.
+        delta_margin (Optional[int]): Delta pruning margin of the quiescence search, None to disable it.
+        debug (bool): Whether every evaluation cross-checks the incremental board score against a full scan.
+        tablebase (Optional[Tablebase]): Endgame tablebase ending the search in the positions it holds.
+        on_iteration (Optional[IterationCallback]): Called after every completed iteration, to report progress.
+        root_moves (Optional[List[Move]]): The legal moves of the root position when already known, so that
+            they are not generated again at every iteration.
     """
 
-    def __init__(self, board: ChessBoard, max_depth: int, stop_event: threading.Event):
+    def __init__(self, board: ChessBoard, max_depth: int, stop_event: threading.Event,
+                 transposition_table: Optional[TranspositionTable] = None, rng: Optional[random.Random] = None,
+                 quiescence: bool = True, delta_margin: Optional[int] = None, debug: bool = False,
+                 tablebase: Optional[Tablebase] = None, on_iteration: Optional[IterationCallback] = None,
+                 root_moves: Optional[List[Move]] = None):
         self._stop_event = stop_event
+        self._quiescence_enabled = quiescence
+        self._delta_margin = delta_margin
+        self._rng = rng
+        self._move_ordering = MoveOrdering(max_depth)
+        self._transposition_table = transposition_table
         self._board = board
         self._game_status = []
         self._max_depth = max_depth
         self._counter = 0
-        self._evaluation = Evaluation(board)
+        self._evaluation = Evaluation(board, debug, tablebase)
+        self._tablebase_pieces = tablebase.max_pieces if tablebase is not None else 0
+        self._piece_count = sum(board.get_piece((row, col)) is not None for row in range(8) for col in range(8))
+        self._deadline: Optional[float] = None
+        self._node_limit: Optional[int] = None
+        self._aborted = False
+        self._pv: List[List[Move]] = []
+        self._previous_pv: List[Move] = []
+        self._follow_pv = False
+        self._on_iteration = on_iteration
+        self._root_moves = root_moves
         self.best_move = None
+        self.score = 0
+        self.completed_depth = 0
+        self.iteration_nodes: List[int] = []
+
+    def get_nodes(self) -> int:
+        """
+        Returns:
+            int: The number of nodes visited by the last search.
+        """
+        return self._counter
+
+    def get_principal_variation(self) -> List[Move]:
+        """
+        Returns:
+            List[Move]: The expected line of play found by the last completed search iteration.
+        """
+        return list(self._previous_pv)
 
     def find_best_move(self):
         """
         Find the best move for the current board state using Minimax algorithm.
         """
         self._counter = 0
+        self._aborted = False
+        self._deadline = None
+        self._node_limit = None
+        self._pv = [[] for _ in range(self._max_depth + 1)]
         # self._minimax(depth=self._max_depth, maximizing_player=self._board.is_white_turn(), alpha=-MAX_INT32, beta=MAX_INT32)
-        self._negamax(depth=self._max_depth, color=1 if self._board.is_white_turn() else -1,
-                      alpha=-MAX_INT32, beta=MAX_INT32)
-        print(self._counter)
+        score = self._negamax(depth=self._max_depth, color=1 if self._board.is_white_turn() else -1,
+                              alpha=-MAX_INT32, beta=MAX_INT32)
+        if not self._aborted:
+            self.completed_depth = self._max_depth
+            self.score = score
+            self._previous_pv = self._pv[0]
+            if self._on_iteration is not None:
+                self._on_iteration(self._max_depth, score, self._counter, list(self._previous_pv))
+
+    def iterative_deepening(self, time_limit: Optional[float] = None, node_limit: Optional[int] = None):
+        """
+        Find the best move by searching to depth 1, 2, ... up to the maximum depth within a budget.
+
+        Each iteration searches the principal variation of the previous one first. When the budget runs
+        out during an iteration, that iteration is discarded and the best move of the last completed
+        depth is kept. The first iteration always completes, unless the stop event is set.
+        Args:
+            time_limit (Optional[float]): The wall-clock budget in seconds, or None for no time limit.
+            node_limit (Optional[int]): The budget in visited nodes, or None for no node limit.
+        """
+        start = time.perf_counter()
+        self._counter = 0
+        self._aborted = False
+        self._previous_pv = []
+        self.iteration_nodes = []
+        best_move = None
+        color = 1 if self._board.is_white_turn() else -1
+        for depth in range(1, self._max_depth + 1):
+            iteration_start = self._counter
+            self._pv = [[] for _ in range(depth + 1)]
+            self._follow_pv = True
+            self.best_move = None
+            score = self._negamax(depth=depth, color=color, alpha=-MAX_INT32, beta=MAX_INT32)
+            if self._aborted:
+                break
+            best_move = self.best_move
+            self.completed_depth = depth
+            self.score = score
+            self._previous_pv = self._pv[0]
+            self.iteration_nodes.append(self._counter - iteration_start)
+            if self._on_iteration is not None:
+                self._on_iteration(depth, score, self._counter, list(self._previous_pv))
+            elapsed = time.perf_counter() - start
+            if time_limit is not None and elapsed > time_limit / 2:
+                # the next iteration would most likely not complete within the budget
+                break
+            if depth == 1:
+                # the budget applies from the second iteration on, so there is always a move
+                self._deadline = start + time_limit if time_limit is not None else None
+                self._node_limit = node_limit
+        self.best_move = best_move
+        self._deadline = None
+        self._node_limit = None
+
+    def search_root_move(self, move: Move, depth: int, alpha: int, beta: int) -> int:
+        """
+        Searches a single root move, for searches that split the root moves between processes.
+
+        The search is fail-hard: a score not above alpha only proves the move is not better than alpha.
+        Args:
+            move (Move): The root move to search.
+            depth (int): The depth of the root, the move included.
+            alpha (int): The score the other root moves already guarantee.
+            beta (int): The upper bound of the window.
+        Returns:
+            int: The score of the move from the root side to move's point of view.
+        """
+        self._counter = 0
+        self._aborted = False
+        self._follow_pv = False
+        self._pv = [[] for _ in range(depth + 1)]
+        color = 1 if self._board.is_white_turn() else -1
+        self.move_piece(move)
+        score = -self._negamax(depth - 1, -color, -beta, -alpha)
+        self.undo_move()
+        self._previous_pv = [move] + self._pv[1]
+        return score
+
+    def is_aborted(self) -> bool:
+        """
+        Returns:
+            bool: True if the last search was stopped before it completed, False otherwise.
+        """
+        return self._aborted
+
+    def _is_stopped(self) -> bool:
+        """
+        Checks whether the search has to stop, because of the stop event or because its budget ran out.
+        The node budget is checked at every node, the stop event and the clock every STOP_CHECK_INTERVAL nodes.
+        Returns:
+            bool: True if the search has to stop, False otherwise.
+        """
+        if not self._aborted:
+            if (self._node_limit is not None and self._counter > self._node_limit) or \
+                    (self._counter & (STOP_CHECK_INTERVAL - 1) == 0 and
+                     (self._stop_event.is_set() or
+                      (self._deadline is not None and time.perf_counter() > self._deadline))):
+                self._aborted = True
+        return self._aborted
 
     def _minimax(self, depth: int, maximizing_player: bool, alpha, beta):
         """
@@ -48,17 +206,18 @@ class Minimax:
             int: The evaluated score of the current position.
         """
         self._counter += 1
-        if self._stop_event.is_set():
+        if self._is_stopped():
             return 0
 
         if depth <= 0:
             return self._evaluation.evaluate_board()
 
+        ply = len(self._game_status)
         all_moves = self._board.get_all_moves()
         if len(all_moves) == 0:
-            return self._evaluation.evaluate_board()
+            return (1 if maximizing_player else -1) * self._evaluation.evaluate_game_end(ply)
 
-        random.shuffle(all_moves)
+        all_moves = self._move_ordering.order_moves(self._board, all_moves, ply, rng=self._rng if ply == 0 else None)
         if maximizing_player:
             for move in all_moves:
                 self.move_piece(move)
@@ -66,7 +225,7 @@ class Minimax:
                 self.undo_move()
                 if score > alpha:
                     alpha = score
-                    if depth == self._max_depth:
+                    if not self._game_status:
                         self.best_move = move
                 if alpha >= beta:
                     break
@@ -78,7 +237,7 @@ class Minimax:
                 self.undo_move()
                 if score < beta:
                     beta = score
-                    if depth == self._max_depth:
+                    if not self._game_status:
                         self.best_move = move
                 if alpha >= beta:
                     break
@@ -97,27 +256,141 @@ class Minimax:
         """
         self._counter += 1
 
-        if self._stop_event.is_set():
+        if self._is_stopped():
             return 0
 
+        ply = len(self._game_status)
+        self._pv[ply] = []
+        if ply > 0 and self._piece_count <= self._tablebase_pieces:
+            score = self._evaluation.evaluate_tablebase(ply)
+            if score is not None:
+                return score
         if depth <= 0:
+            if self._quiescence_enabled:
+                return self._quiescence(color, alpha, beta)
             return color * self._evaluation.evaluate_board()
 
-        all_moves = self._board.get_all_moves()
+        alpha_orig = alpha
+        key = self._board.get_hash()
+        hash_move = None
+        if self._transposition_table is not None:
+            entry = self._transposition_table.probe(key)
+            if entry is not None:
+                entry_depth, bound, score, hash_move = entry
+                score = Minimax._mate_score_from_table(score, ply)
+                if entry_depth >= depth and ply > 0:
+                    if bound == EXACT or (bound == LOWER_BOUND and score >= beta) or \
+                            (bound == UPPER_BOUND and score <= alpha):
+                        return score
+
+        if ply == 0 and self._root_moves is not None:
+            all_moves = self._root_moves
+        else:
+            all_moves = self._board.get_all_moves()
         if len(all_moves) == 0:
-            return color * self._evaluation.evaluate_board()
+            return self._evaluation.evaluate_game_end(ply)
 
-        random.shuffle(all_moves)
+        if self._follow_pv:
+            if ply < len(self._previous_pv) and self._previous_pv[ply] in all_moves:
+                hash_move = self._previous_pv[ply]
+            else:
+                self._follow_pv = False
+        all_moves = self._move_ordering.order_moves(self._board, all_moves, ply, hash_move,
+                                                    rng=self._rng if ply == 0 else None)
+        best_move = None
         for move in all_moves:
             self.move_piece(move)
             score = -self._negamax(depth - 1, -color, -beta, -alpha)
             self.undo_move()
+            self._follow_pv = False
             if score > alpha:
                 alpha = score
-                if depth == self._max_depth:
+                best_move = move
+                self._pv[ply] = [move] + self._pv[ply + 1]
+                if ply == 0:
                     self.best_move = move
             if alpha >= beta:
+                if self._move_ordering.is_quiet(self._board, move):
+                    self._move_ordering.update_cutoff(move, ply, depth)
                 break
+
+        if self._transposition_table is not None and not self._aborted:
+            bound = UPPER_BOUND if alpha <= alpha_orig else LOWER_BOUND if alpha >= beta else EXACT
+            self._transposition_table.store(key, depth, bound, Minimax._mate_score_to_table(alpha, ply), best_move)
+        return alpha
+
+    @staticmethod
+    def _mate_score_to_table(score: int, ply: int) -> int:
+        """
+        Converts a mate score from distance to the root into distance to the node, to be stored.
+        Args:
+            score (int): The score of the node.
+            ply (int): The distance of the node from the root.
+        Returns:
+            int: The score to store in the transposition table.
+        """
+        if score > MATE_BOUND:
+            return score + ply
+        if score < -MATE_BOUND:
+            return score - ply
+        return score
+
+    @staticmethod
+    def _mate_score_from_table(score: int, ply: int) -> int:
+        """
+        Converts a stored mate score back into distance to the root.
+        Args:
+            score (int): The score read from the transposition table.
+            ply (int): The distance of the node from the root.
+        Returns:
+            int: The score of the node.
+        """
+        if score > MATE_BOUND:
+            return score - ply
+        if score < -MATE_BOUND:
+            return score + ply
+        return score
+
+    def _quiescence(self, color: int, alpha, beta):
+        """
+        Searches only the captures of a leaf position until it is quiet, so the static evaluation is not
+        taken in the middle of an exchange.
+        Args:
+            color (int): The sign representing the player's turn (+1 for white, -1 for black).
+            alpha (int): The best value that the maximizing player currently can guarantee.
+            beta (int): The best value that the minimizing player currently can guarantee.
+        Returns:
+            int: The evaluated score of the current position.
+        """
+        self._counter += 1
+        if self._is_stopped():
+            return 0
+
+        if self._piece_count <= self._tablebase_pieces:
+            score = self._evaluation.evaluate_tablebase(len(self._game_status))
+            if score is not None:
+                return score
+
+        # stand pat: the side to move may decline every capture
+        stand_pat = color * self._evaluation.evaluate_board()
+        if stand_pat >= beta:
+            return beta
+        if stand_pat > alpha:
+            alpha = stand_pat
+
+        ply = len(self._game_status)
+        captures = self._move_ordering.order_moves(self._board, self._board.get_all_attack_moves(), ply)
+        for move in captures:
+            if self._delta_margin is not None and \
+                    stand_pat + PIECE_VALUE[self._board.get_piece_name(move[1])] + self._delta_margin < alpha:
+                continue
+            self.move_piece(move)
+            score = -self._quiescence(-color, -beta, -alpha)
+            self.undo_move()
+            if score >= beta:
+                return beta
+            if score > alpha:
+                alpha = score
         return alpha
 
     def move_piece(self, move):
@@ -126,7 +399,10 @@ class Minimax:
         Args:
             move: The move to be made.
         """
-        self._game_status.append([move[0], move[1], self._board.get_piece(move[0]), self._board.get_piece(move[1])])
+        captured = self._board.get_piece(move[1])
+        if captured is not None:
+            self._piece_count -= 1
+        self._game_status.append([move[0], move[1], self._board.get_piece(move[0]), captured])
         self._board.move_piece(move[0], move[1])
         self._board.promote_pawn(move[1])
         self._board.change_turn()
@@ -137,4 +413,6 @@ class Minimax:
         """
         self._board.change_turn()
         [src_pos, dst_pos, src_pic, dst_pic] = self._game_status.pop()
+        if dst_pic is not None:
+            self._piece_count += 1
         self._board.undo_move(src_pos, dst_pos, src_pic, dst_pic)
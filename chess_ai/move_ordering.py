@@ -0,0 +1,97 @@
+import random
+from typing import List, Optional
+from chess_board import ChessBoard
+from chess_ai.transposition_table import Move, encode_move
+
+# Piece ranks for most-valuable-victim / least-valuable-attacker ordering.
+PIECE_ORDER = {"p": 1, "n": 2, "b": 3, "r": 4, "q": 5, "k": 6}
+
+HASH_MOVE_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 28
+KILLER_SCORES = (1 << 27, (1 << 27) - 1)
+HISTORY_LIMIT = (1 << 26) - 1
+
+
+class MoveOrdering:
+    """
+    Class ranking the moves of a position to make alpha-beta cutoffs happen as early as possible.
+
+    Moves are ranked: hash (or principal variation) move first, then captures and promotions by
+    most-valuable-victim / least-valuable-attacker, then the killer moves of the ply, then the other
+    quiet moves by their history heuristic score.
+    Args:
+        max_ply (int): The deepest ply killer moves are kept for.
+    """
+    def __init__(self, max_ply: int):
+        """
+        Initializes a MoveOrdering instance.
+        Args:
+            max_ply (int): The deepest ply killer moves are kept for.
+        """
+        self._killers: List[List[Optional[Move]]] = [[None, None] for _ in range(max_ply + 1)]
+        self._history = [0] * (1 << 13)
+
+    def order_moves(self, board: ChessBoard, moves: List[Move], ply: int, hash_move: Optional[Move] = None,
+                    rng: Optional[random.Random] = None) -> List[Move]:
+        """
+        Sorts the moves of a position from the most to the least promising.
+        Args:
+            board (ChessBoard): The board, in the position the moves belong to.
+            moves (List[Move]): The legal moves of the position.
+            ply (int): The distance of the position from the root of the search.
+            hash_move (Optional[Move]): The best move known for the position, searched first.
+            rng (Optional[random.Random]): When given, moves with equal rank are shuffled with it.
+        Returns:
+            List[Move]: The ordered moves.
+        """
+        killers = self._killers[ply] if ply < len(self._killers) else [None, None]
+        history = self._history
+        scores = {}
+        for move in moves:
+            if move == hash_move:
+                scores[move] = HASH_MOVE_SCORE
+                continue
+            victim = board.get_piece_name(move[1])
+            attacker = board.get_piece_name(move[0])
+            if victim is not None:
+                scores[move] = CAPTURE_SCORE + 10 * PIECE_ORDER[victim] - PIECE_ORDER[attacker]
+            elif attacker == 'p' and move[1][0] in (0, 7):
+                scores[move] = CAPTURE_SCORE + 10 * PIECE_ORDER['q'] - PIECE_ORDER[attacker]
+            elif move == killers[0]:
+                scores[move] = KILLER_SCORES[0]
+            elif move == killers[1]:
+                scores[move] = KILLER_SCORES[1]
+            else:
+                scores[move] = history[encode_move(move)]
+        if rng is not None:
+            moves = list(moves)
+            rng.shuffle(moves)
+        return sorted(moves, key=scores.__getitem__, reverse=True)
+
+    def is_quiet(self, board: ChessBoard, move: Move) -> bool:
+        """
+        Checks if a move is neither a capture nor a promotion.
+        Args:
+            board (ChessBoard): The board, before the move is made.
+            move (Move): The move.
+        Returns:
+            bool: True if the move is quiet, False otherwise.
+        """
+        return board.get_piece_name(move[1]) is None and \
+            not (move[1][0] in (0, 7) and board.get_piece_name(move[0]) == 'p')
+
+    def update_cutoff(self, move: Move, ply: int, depth: int):
+        """
+        Records a quiet move that caused a beta cutoff as a killer of its ply and in the history table.
+        Args:
+            move (Move): The move that caused the cutoff.
+            ply (int): The distance of the position from the root of the search.
+            depth (int): The remaining depth of the position.
+        """
+        if ply < len(self._killers):
+            killers = self._killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+        code = encode_move(move)
+        self._history[code] = min(HISTORY_LIMIT, self._history[code] + depth * depth)
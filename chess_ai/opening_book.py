@@ -0,0 +1,169 @@
+import mmap
+import random
+import struct
+from typing import Dict, List, Optional, Tuple
+from chess_ai.transposition_table import Move, encode_move, decode_move
+
+BOOK_MAGIC = b'CBK1'
+HEADER_FORMAT = struct.Struct('<4sI')  # The magic and the number of records.
+RECORD_FORMAT = struct.Struct('<QHH')  # The Zobrist key, the encoded move and the weight.
+MAX_WEIGHT = 0xFFFF
+
+
+class OpeningBook:
+    """
+    Read-only opening book: a binary file of (Zobrist key, move, weight) records sorted by key.
+
+    The file is memory-mapped and the records of a position are found by binary search, so opening a
+    book does not read it into memory and a lookup only touches a few pages.
+    Args:
+        path (str): The book file, as written by OpeningBookBuilder.
+    """
+    def __init__(self, path: str):
+        """
+        Initializes an OpeningBook instance by mapping the book file.
+        Args:
+            path (str): The book file, as written by OpeningBookBuilder.
+        """
+        with open(path, 'rb') as file:
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count = HEADER_FORMAT.unpack_from(self._data, 0)
+        if magic != BOOK_MAGIC or HEADER_FORMAT.size + self._count * RECORD_FORMAT.size > len(self._data):
+            self._data.close()
+            raise ValueError(f"Invalid opening book: {path}")
+
+    def __len__(self) -> int:
+        """
+        Returns:
+            int: The number of records of the book.
+        """
+        return self._count
+
+    def _key_at(self, index: int) -> int:
+        """
+        Args:
+            index (int): The record index.
+        Returns:
+            int: The Zobrist key of the record.
+        """
+        return RECORD_FORMAT.unpack_from(self._data, HEADER_FORMAT.size + index * RECORD_FORMAT.size)[0]
+
+    def find(self, key: int) -> List[Tuple[Move, int]]:
+        """
+        Looks up the book moves of a position.
+        Args:
+            key (int): The Zobrist key of the position.
+        Returns:
+            List[Tuple[Move, int]]: Every book move of the position with its weight.
+        """
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        moves = []
+        offset = HEADER_FORMAT.size + low * RECORD_FORMAT.size
+        while low < self._count:
+            record_key, code, weight = RECORD_FORMAT.unpack_from(self._data, offset)
+            if record_key != key:
+                break
+            moves.append((decode_move(code), weight))
+            low += 1
+            offset += RECORD_FORMAT.size
+        return moves
+
+    def choose_move(self, board, rng: Optional[random.Random] = None) -> Optional[Move]:
+        """
+        Chooses a book move for a position.
+        Args:
+            board (ChessBoard | BitBoard): The position.
+            rng (Optional[random.Random]): When given, the move is drawn with a probability proportional to
+                its weight; otherwise the move with the highest weight is chosen.
+        Returns:
+            Optional[Move]: A legal book move, or None if the position is not in the book.
+        """
+        legal_moves = board.get_all_moves()
+        moves = [(move, weight) for move, weight in self.find(board.get_hash()) if move in legal_moves and weight > 0]
+        if not moves:
+            return None
+        if rng is None:
+            return max(moves, key=lambda entry: entry[1])[0]
+        return rng.choices([move for move, _ in moves], weights=[weight for _, weight in moves])[0]
+
+    def close(self):
+        """
+        Unmaps the book file.
+        """
+        self._data.close()
+
+
+class OpeningBookBuilder:
+    """
+    Collects the moves played in known positions and writes them as an opening book file.
+
+    Every game adds, for each position of its first plies, the move played there with a weight that
+    depends on the result for the side that played it.
+    Args:
+        max_ply (int): The number of plies of every game that enter the book.
+    """
+    WIN, DRAW, LOSS = 2, 1, 0  # The weight a move gets from the result for the side that played it.
+
+    def __init__(self, max_ply: int = 16):
+        """
+        Initializes an OpeningBookBuilder instance.
+        Args:
+            max_ply (int): The number of plies of every game that enter the book.
+        """
+        self._max_ply = max_ply
+        self._entries: Dict[int, Dict[Move, List[int]]] = {}
+        self.games = 0
+
+    def add_game(self, board, moves: List[Move], result: Optional[float] = None):
+        """
+        Adds the opening of a game to the book.
+        Args:
+            board (ChessBoard | BitBoard): The starting position; it is restored before returning.
+            moves (List[Move]): The moves of the game.
+            result (Optional[float]): 1 if white won, 0.5 for a draw, 0 if black won, None if unknown;
+                an unknown result weighs like a draw.
+        """
+        self.games += 1
+        played = []
+        for move in moves[:self._max_ply]:
+            if result is None or result == 0.5:
+                weight = self.DRAW
+            else:
+                weight = self.WIN if (result == 1) == board.is_white_turn() else self.LOSS
+            stats = self._entries.setdefault(board.get_hash(), {}).setdefault(move, [0, 0])
+            stats[0] += 1
+            stats[1] += weight
+            played.append([move[0], move[1], board.get_piece(move[0]), board.get_piece(move[1])])
+            board.move_piece(move[0], move[1])
+            board.promote_pawn(move[1])
+            board.change_turn()
+        for src_pos, dst_pos, src_pic, dst_pic in reversed(played):
+            board.change_turn()
+            board.undo_move(src_pos, dst_pos, src_pic, dst_pic)
+
+    def write(self, path: str, min_games: int = 1) -> int:
+        """
+        Writes the book file, sorted by key and, for a key, by decreasing weight.
+        Args:
+            path (str): The book file.
+            min_games (int): The number of games a move needs to be played in to enter the book.
+        Returns:
+            int: The number of records written.
+        """
+        records = []
+        for key, moves in self._entries.items():
+            for move, (games, weight) in moves.items():
+                if games >= min_games:
+                    records.append((key, -min(weight, MAX_WEIGHT), encode_move(move)))
+        records.sort()
+        with open(path, 'wb') as file:
+            file.write(HEADER_FORMAT.pack(BOOK_MAGIC, len(records)))
+            for key, weight, code in records:
+                file.write(RECORD_FORMAT.pack(key, code, -weight))
+        return len(records)
@@ -0,0 +1,395 @@
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Optional, List, Tuple, Dict
+from chess_ai.minimax_algorithm import Minimax, MAX_INT32, IterationCallback
+from chess_ai.move_ordering import MoveOrdering
+from chess_ai.transposition_table import TranspositionTable, SharedTranspositionTable, Move
+from chess_ai.tablebase import Tablebase
+from chess_ai.process_context import get_process_context
+
+POLL_INTERVAL = 0.01  # Seconds between two checks of the stop event while the workers search.
+
+# State of a worker process, set once by _init_worker.
+_worker: Dict = {}
+
+
+def _init_worker(shared_alpha, stop_flag, hash_size_mb: float, shared_table: Optional[SharedTranspositionTable],
+                 quiescence: bool, delta_margin: Optional[int], tablebase: Optional[Tablebase]):
+    """
+    Initializes a worker process of the pool: the shared bound and stop flag, and the transposition table,
+    which is either shared by every process or private to the worker and kept between its tasks.
+    Args:
+        shared_alpha (multiprocessing.Value): The best root score found so far by any worker.
+        stop_flag (multiprocessing.Event): Set by the main process to stop every worker.
+        hash_size_mb (float): The memory cap of a private transposition table in megabytes, 0 to disable it.
+        shared_table (Optional[SharedTranspositionTable]): The table shared by every process, if any.
+        quiescence (bool): Whether the search resolves captures at its leaves.
+        delta_margin (Optional[int]): Delta pruning margin of the quiescence search, None to disable it.
+        tablebase (Optional[Tablebase]): The endgame tablebase, mapped again by the worker.
+    """
+    _worker['alpha'] = shared_alpha
+    _worker['stop'] = stop_flag
+    if shared_table is not None:
+        _worker['table'] = shared_table
+    else:
+        _worker['table'] = TranspositionTable(hash_size_mb) if hash_size_mb > 0 else None
+    _worker['quiescence'] = quiescence
+    _worker['delta_margin'] = delta_margin
+    _worker['tablebase'] = tablebase
+
+
+def _search_root_move(board_class: type, snapshot: bytes, move: Move, depth: int,
+                      search_id: int) -> Tuple[Move, int, int, int, List[Move], bool]:
+    """
+    Searches one root move in a worker process, with the best score of the other workers as alpha.
+    Args:
+        board_class (type): The board implementation to search on, ChessBoard or BitBoard.
+        snapshot (bytes): The root position, as taken by the snapshot method of the boards.
+        move (Move): The root move to search.
+        depth (int): The depth of the root, the move included.
+        search_id (int): Identifies the search the move belongs to; the first task of a new search
+            makes the entries of the earlier ones replaceable in the worker table.
+    Returns:
+        Tuple[Move, int, int, int, List[Move], bool]: The move, its score, the alpha it was searched with,
+            the number of visited nodes, its principal variation and whether the search was stopped.
+    """
+    if _worker.get('search_id') != search_id:
+        _worker['search_id'] = search_id
+        if _worker['table'] is not None:
+            _worker['table'].new_search()
+    shared_alpha = _worker['alpha']
+    alpha = shared_alpha.value
+    minimax = Minimax(board_class.from_snapshot(snapshot), depth, _worker['stop'], _worker['table'], quiescence=_worker['quiescence'],
+                      delta_margin=_worker['delta_margin'], tablebase=_worker['tablebase'])
+    score = minimax.search_root_move(move, depth, alpha, MAX_INT32)
+    aborted = minimax.is_aborted()
+    if not aborted and score > alpha:
+        with shared_alpha.get_lock():
+            if score > shared_alpha.value:
+                shared_alpha.value = score
+    return move, score, alpha, minimax.get_nodes(), minimax.get_principal_variation(), aborted
+
+
+def _helper_search(board_class: type, snapshot: bytes, max_depth: int, seed: int) -> int:
+    """
+    Searches the whole root position in a worker process until the depth is reached or the stop flag is
+    set, filling the shared transposition table for the other searchers.
+    Args:
+        board_class (type): The board implementation to search on, ChessBoard or BitBoard.
+        snapshot (bytes): The root position, as taken by the snapshot method of the boards.
+        max_depth (int): The deepest iteration.
+        seed (int): Seed of the root move tie-break, which makes the helpers search in different orders.
+    Returns:
+        int: The number of visited nodes.
+    """
+    minimax = Minimax(board_class.from_snapshot(snapshot), max_depth, _worker['stop'], _worker['table'],
+                      random.Random(seed), _worker['quiescence'], _worker['delta_margin'],
+                      tablebase=_worker['tablebase'])
+    minimax.iterative_deepening()
+    return minimax.get_nodes()
+
+
+class ProcessSearch(ABC):
+    """
+    Base class of the searches running in a pool of worker processes.
+
+    It owns the pool, the flag stopping the workers and the result of the last search: best_move, score,
+    completed_depth, principal_variation, nodes and iteration_nodes.
+    Args:
+        workers (int): The number of worker processes.
+        stop_event (threading.Event): Event to signal the search to stop.
+        hash_size_mb (float): The memory cap of the transposition table of each worker in megabytes.
+        quiescence (bool): Whether the search resolves captures at its leaves.
+        delta_margin (Optional[int]): Delta pruning margin of the quiescence search, None to disable it.
+        shared_table (Optional[SharedTranspositionTable]): A table shared by every worker instead of
+            a private one each.
+        tablebase (Optional[Tablebase]): Endgame tablebase ending the search in the positions it holds.
+    """
+    def __init__(self, workers: int, stop_event: threading.Event, hash_size_mb: float = 16,
+                 quiescence: bool = True, delta_margin: Optional[int] = None,
+                 shared_table: Optional[SharedTranspositionTable] = None, tablebase: Optional[Tablebase] = None):
+        """
+        Initializes a ProcessSearch instance. The worker processes are started by the first search
+        and kept until close is called.
+        Args:
+            workers (int): The number of worker processes.
+            stop_event (threading.Event): Event to signal the search to stop.
+            hash_size_mb (float): The memory cap of the transposition table of each worker in megabytes.
+            quiescence (bool): Whether the search resolves captures at its leaves.
+            delta_margin (Optional[int]): Delta pruning margin of the quiescence search, None to disable it.
+            shared_table (Optional[SharedTranspositionTable]): A table shared by every worker instead of
+                a private one each.
+            tablebase (Optional[Tablebase]): Endgame tablebase ending the search in the positions it holds.
+        """
+        self._context = get_process_context()
+        self._workers = workers
+        self._stop_event = stop_event
+        self._hash_size_mb = hash_size_mb
+        self._quiescence = quiescence
+        self._delta_margin = delta_margin
+        self._shared_table = shared_table
+        self._tablebase = tablebase
+        self._shared_alpha = self._context.Value('i', -MAX_INT32)
+        self._stop_flag = self._context.Event()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.best_move: Optional[Move] = None
+        self.score = 0
+        self.completed_depth = 0
+        self.principal_variation: List[Move] = []
+        self.nodes = 0
+        self.iteration_nodes: List[int] = []
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """
+        Returns:
+            ProcessPoolExecutor: The pool of worker processes, started on first use.
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers, mp_context=self._context, initializer=_init_worker,
+                initargs=(self._shared_alpha, self._stop_flag, self._hash_size_mb, self._shared_table,
+                          self._quiescence, self._delta_margin, self._tablebase))
+        return self._executor
+
+    def _reset(self):
+        """
+        Clears the result of the previous search and the stop flag of the workers.
+        """
+        self.best_move = None
+        self.score = 0
+        self.completed_depth = 0
+        self.principal_variation = []
+        self.nodes = 0
+        self.iteration_nodes = []
+        self._stop_flag.clear()
+
+    def close(self):
+        """
+        Stops the worker processes.
+        """
+        if self._executor is not None:
+            self._stop_flag.set()
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    @abstractmethod
+    def search(self, board, max_depth: int, time_limit: Optional[float] = None, node_limit: Optional[int] = None,
+               rng: Optional[random.Random] = None, on_iteration: Optional[IterationCallback] = None,
+               legal_moves: Optional[List[Move]] = None):
+        """
+        Finds the best move of a position by iterative deepening up to a depth or until the budget runs out.
+        The result is left in best_move, score, completed_depth, principal_variation, nodes and iteration_nodes.
+        Args:
+            board (ChessBoard | BitBoard): The position to search; it is not modified.
+            max_depth (int): The deepest iteration.
+            time_limit (Optional[float]): The wall-clock budget in seconds, or None for no time limit.
+            node_limit (Optional[int]): The budget in visited nodes, or None for no node limit.
+            rng (Optional[random.Random]): When given, breaks ties between equally ranked root moves.
+            on_iteration (Optional[IterationCallback]): Called after every completed iteration.
+            legal_moves (Optional[List[Move]]): The legal moves of the position when already known, e.g. from
+                a MoveCache, so that they are not generated again.
+        """
+
+
+class RootSplitSearch(ProcessSearch):
+    """
+    Parallel search splitting the root moves between the processes of a pool, so the search is not
+    limited to one core by the GIL.
+
+    Every iteration of the iterative deepening first searches the best move of the previous iteration
+    alone, to get a good bound (young brothers wait), then hands the other root moves to the workers.
+    The workers share the best root score found so far and start every move with it as alpha. The
+    stop event is polled by the main process and forwarded to the workers.
+    Args:
+        workers (int): The number of worker processes.
+        stop_event (threading.Event): Event to signal the search to stop.
+        hash_size_mb (float): The memory cap of the transposition table of each worker in megabytes.
+        quiescence (bool): Whether the search resolves captures at its leaves.
+        delta_margin (Optional[int]): Delta pruning margin of the quiescence search, None to disable it.
+        tablebase (Optional[Tablebase]): Endgame tablebase ending the search in the positions it holds.
+    """
+    def __init__(self, workers: int, stop_event: threading.Event, hash_size_mb: float = 16,
+                 quiescence: bool = True, delta_margin: Optional[int] = None, tablebase: Optional[Tablebase] = None):
+        """
+        Initializes a RootSplitSearch instance.
+        Args:
+            workers (int): The number of worker processes.
+            stop_event (threading.Event): Event to signal the search to stop.
+            hash_size_mb (float): The memory cap of the transposition table of each worker in megabytes.
+            quiescence (bool): Whether the search resolves captures at its leaves.
+            delta_margin (Optional[int]): Delta pruning margin of the quiescence search, None to disable it.
+            tablebase (Optional[Tablebase]): Endgame tablebase ending the search in the positions it holds.
+        """
+        super().__init__(workers, stop_event, hash_size_mb, quiescence, delta_margin, tablebase=tablebase)
+        self._search_id = 0
+
+    def search(self, board, max_depth: int, time_limit: Optional[float] = None, node_limit: Optional[int] = None,
+               rng: Optional[random.Random] = None, on_iteration: Optional[IterationCallback] = None,
+               legal_moves: Optional[List[Move]] = None):
+        """
+        Finds the best move of a position by iterative deepening up to a depth or until the budget runs out.
+        The result is left in best_move, score, completed_depth, principal_variation, nodes and iteration_nodes.
+        Args:
+            board (ChessBoard | BitBoard): The position to search; it is not modified.
+            max_depth (int): The deepest iteration.
+            time_limit (Optional[float]): The wall-clock budget in seconds, or None for no time limit.
+            node_limit (Optional[int]): The budget in visited nodes, or None for no node limit.
+            rng (Optional[random.Random]): When given, breaks ties between equally ranked root moves.
+            on_iteration (Optional[IterationCallback]): Called after every completed iteration.
+            legal_moves (Optional[List[Move]]): The legal moves of the position when already known, e.g. from
+                a MoveCache, so that they are not generated again.
+        """
+        start = time.perf_counter()
+        self._reset()
+        moves = legal_moves if legal_moves is not None else board.get_all_moves()
+        if not moves:
+            return
+        executor = self._get_executor()
+        self._search_id += 1
+
+        root_moves = MoveOrdering(max_depth).order_moves(board, moves, 0, rng=rng)
+        deadline, budget = None, None
+        for depth in range(1, max_depth + 1):
+            self._shared_alpha.value = -MAX_INT32
+            iteration_start = self.nodes
+            # the first move is searched alone so that the other ones start with its score as alpha
+            results = self._run(executor, board, root_moves[:1], depth, deadline, budget)
+            if results is not None:
+                more = self._run(executor, board, root_moves[1:], depth, deadline, budget)
+                results = results + more if more is not None else None
+            if results is None:
+                break
+
+            best_move, best_score, best_pv = None, -MAX_INT32 - 1, []
+            for index, (move, score, alpha, pv) in enumerate(results):
+                # the search is fail-hard: a move not scoring above the alpha it was searched with only
+                # proved it is not better than that alpha, and its score and principal variation mean nothing
+                if (index == 0 or score > alpha) and score > best_score:
+                    best_move, best_score, best_pv = move, score, pv
+            self.best_move = best_move
+            self.score = best_score
+            self.principal_variation = best_pv
+            self.completed_depth = depth
+            self.iteration_nodes.append(self.nodes - iteration_start)
+            if on_iteration is not None:
+                on_iteration(depth, best_score, self.nodes, list(best_pv))
+            root_moves.remove(best_move)
+            root_moves.insert(0, best_move)
+            elapsed = time.perf_counter() - start
+            if time_limit is not None and elapsed > time_limit / 2:
+                # the next iteration would most likely not complete within the budget
+                break
+            if depth == 1:
+                # the budget applies from the second iteration on, so there is always a move
+                deadline = start + time_limit if time_limit is not None else None
+                budget = node_limit
+
+    def _run(self, executor: ProcessPoolExecutor, board, moves: List[Move], depth: int, deadline: Optional[float],
+             node_limit: Optional[int]) -> Optional[List[Tuple[Move, int, int, List[Move]]]]:
+        """
+        Searches root moves in the worker processes, forwarding the stop event and the budget to them.
+        Args:
+            executor (ProcessPoolExecutor): The pool of worker processes.
+            board (ChessBoard | BitBoard): The root position.
+            moves (List[Move]): The root moves to search.
+            depth (int): The depth of the root.
+            deadline (Optional[float]): The time.perf_counter() value at which the search stops, or None.
+            node_limit (Optional[int]): The total number of nodes at which the search stops, or None.
+        Returns:
+            Optional[List[Tuple[Move, int, int, List[Move]]]]: The move, score, alpha it was searched with and
+                principal variation of every root move, in the order of moves, or None if the search was stopped.
+        """
+        snapshot = board.snapshot()
+        futures = [executor.submit(_search_root_move, type(board), snapshot, move, depth, self._search_id)
+                   for move in moves]
+        pending = set(futures)
+        aborted = False
+        while pending:
+            done, pending = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                _, _, _, nodes, _, stopped = future.result()
+                self.nodes += nodes
+                aborted = aborted or stopped
+            if not self._stop_flag.is_set() and (
+                    self._stop_event.is_set() or
+                    (deadline is not None and time.perf_counter() > deadline) or
+                    (node_limit is not None and self.nodes > node_limit)):
+                self._stop_flag.set()
+        if aborted or self._stop_flag.is_set():
+            return None
+        return [(move, score, alpha, pv) for move, score, alpha, _, pv, _ in (future.result() for future in futures)]
+
+
+class LazySMPSearch(ProcessSearch):
+    """
+    Lazy SMP parallel search: helper processes search the whole root position at the same time as the
+    main search, and all of them share one transposition table in shared memory.
+
+    The searchers do not coordinate: the helpers only fill the shared table, which lets the main search
+    cut off or order moves from results it did not compute. Half of the helpers search one ply deeper and
+    every helper breaks root ties with its own seed, so they do not all walk the same tree in lockstep.
+    The main search runs in the calling thread and gives the result; the helpers are stopped when it ends.
+    Args:
+        workers (int): The number of searchers, the main search included.
+        stop_event (threading.Event): Event to signal the search to stop.
+        shared_table (SharedTranspositionTable): The table shared by every searcher.
+        quiescence (bool): Whether the search resolves captures at its leaves.
+        delta_margin (Optional[int]): Delta pruning margin of the quiescence search, None to disable it.
+        tablebase (Optional[Tablebase]): Endgame tablebase ending the search in the positions it holds.
+    """
+    def __init__(self, workers: int, stop_event: threading.Event, shared_table: SharedTranspositionTable,
+                 quiescence: bool = True, delta_margin: Optional[int] = None, tablebase: Optional[Tablebase] = None):
+        """
+        Initializes a LazySMPSearch instance.
+        Args:
+            workers (int): The number of searchers, the main search included.
+            stop_event (threading.Event): Event to signal the search to stop.
+            shared_table (SharedTranspositionTable): The table shared by every searcher.
+            quiescence (bool): Whether the search resolves captures at its leaves.
+            delta_margin (Optional[int]): Delta pruning margin of the quiescence search, None to disable it.
+            tablebase (Optional[Tablebase]): Endgame tablebase ending the search in the positions it holds.
+        """
+        super().__init__(workers - 1, stop_event, 0, quiescence, delta_margin, shared_table, tablebase)
+        self._seed = 0
+
+    def search(self, board, max_depth: int, time_limit: Optional[float] = None, node_limit: Optional[int] = None,
+               rng: Optional[random.Random] = None, on_iteration: Optional[IterationCallback] = None,
+               legal_moves: Optional[List[Move]] = None):
+        """
+        Finds the best move of a position by iterative deepening up to a depth or until the budget runs out.
+        The result is left in best_move, score, completed_depth, principal_variation, nodes and iteration_nodes.
+        Args:
+            board (ChessBoard | BitBoard): The position to search; it is not modified.
+            max_depth (int): The deepest iteration of the main search.
+            time_limit (Optional[float]): The wall-clock budget in seconds, or None for no time limit.
+            node_limit (Optional[int]): The node budget of the main search, or None for no node limit.
+            rng (Optional[random.Random]): When given, breaks ties between equally ranked root moves.
+            on_iteration (Optional[IterationCallback]): Called after every completed iteration.
+            legal_moves (Optional[List[Move]]): The legal moves of the position when already known, e.g. from
+                a MoveCache, so that they are not generated again.
+        """
+        self._reset()
+        self._shared_table.new_search()
+        executor = self._get_executor()
+        helpers = []
+        snapshot = board.snapshot()
+        for index in range(self._workers):
+            self._seed += 1
+            helpers.append(executor.submit(_helper_search, type(board), snapshot, max_depth + index % 2, self._seed))
+
+        minimax = Minimax(board, max_depth, self._stop_event, self._shared_table, rng, self._quiescence,
+                          self._delta_margin, tablebase=self._tablebase, on_iteration=on_iteration,
+                          root_moves=legal_moves)
+        minimax.iterative_deepening(time_limit, node_limit)
+        self._stop_flag.set()
+        helper_nodes = sum(future.result() for future in helpers)
+
+        self.best_move = minimax.best_move
+        self.score = minimax.score
+        self.completed_depth = minimax.completed_depth
+        self.principal_variation = minimax.get_principal_variation()
+        self.nodes = minimax.get_nodes() + helper_nodes
+        self.iteration_nodes = minimax.iteration_nodes
@@ -0,0 +1,13 @@
+import multiprocessing
+
+
+def get_process_context():
+    """
+    Returns the multiprocessing context every worker process of the program is started with: fork where
+    available, which starts a worker without importing the main module again, else spawn, the only method
+    on Windows. Under spawn the main module is imported again in every worker, so the entry points keep their
+    side effects, e.g. the GUI window, under their __main__ guard.
+    Returns:
+        multiprocessing.context.BaseContext: The context.
+    """
+    return multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn')
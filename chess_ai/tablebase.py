@@ -0,0 +1,258 @@
+import mmap
+import struct
+from typing import Dict, List, Optional, Tuple
+from chess_board import FEN_PIECES, SNAPSHOT_FORMAT, SNAPSHOT_PIECES
+
+TABLEBASE_MAGIC = b'CTB1'
+HEADER_FORMAT = struct.Struct('<4sI')  # The magic and the number of tables.
+ENTRY_FORMAT = struct.Struct('<8sQQ')  # The table name, the offset and the size of its data.
+PIECE_ORDER = 'QRBNP'  # The non-king pieces from the strongest, the order of the pieces in a table name.
+PIECE_LETTERS = {piece_class: letter.upper() for letter, piece_class in FEN_PIECES.items()}
+
+# Table values: one byte per position, 0 for a draw, else the distance to mate in plies plus one. The
+# side to move wins when the distance is odd and is mated when it is even.
+DRAW = 0
+
+# The squares of the white king in a table, the others being mapped onto them by symmetry: the a1-d4 quarter
+# of the board for tables without pawns (mirrored files and ranks), the a-d half with pawns (mirrored files).
+PAWNLESS_KING_SQUARES = [row * 8 + col for row in range(4, 8) for col in range(4)]
+PAWN_KING_SQUARES = [row * 8 + col for row in range(8) for col in range(4)]
+
+
+def _symmetry_mask(king_sq: int, pawns: bool) -> int:
+    """
+    Returns the symmetry bringing the white king onto the squares a table stores it on, as a mask XORed
+    with every square index: 7 mirrors the files, 56 the ranks.
+    Args:
+        king_sq (int): The white king square index.
+        pawns (bool): Whether the table has pawns, which forbids mirroring the ranks.
+    Returns:
+        int: The mask.
+    """
+    mask = 7 if king_sq & 7 > 3 else 0
+    if not pawns and king_sq >> 3 < 4:
+        mask |= 56
+    return mask
+
+
+def _strength(pieces: str) -> Tuple[int, List[int]]:
+    """
+    Args:
+        pieces (str): The non-king pieces of a side, in PIECE_ORDER.
+    Returns:
+        Tuple[int, List[int]]: A key ordering the material of the sides, the strongest side last.
+    """
+    return len(pieces), [-PIECE_ORDER.index(piece) for piece in pieces]
+
+
+def sort_pieces(pieces: str) -> str:
+    """
+    Args:
+        pieces (str): Upper case piece letters.
+    Returns:
+        str: The letters in PIECE_ORDER.
+    """
+    return ''.join(sorted(pieces, key=PIECE_ORDER.index))
+
+
+def table_name(white: str, black: str) -> Tuple[Optional[str], bool]:
+    """
+    Returns the name of the table holding a material set. Tables are stored with the stronger side as white;
+    the positions with the stronger side as black are found in it with the colors swapped.
+    Args:
+        white (str): The non-king pieces of white, upper case.
+        black (str): The non-king pieces of black, upper case.
+    Returns:
+        Tuple[Optional[str], bool]: The table name, e.g. 'KQvKR', None for the bare kings, and whether the
+            colors are swapped in the table.
+    """
+    white, black = sort_pieces(white), sort_pieces(black)
+    if not white and not black:
+        return None, False
+    if _strength(white) < _strength(black):
+        return f"K{black}vK{white}", True
+    return f"K{white}vK{black}", False
+
+
+class TableLayout:
+    """
+    The indexing of the positions of one material set in its table.
+
+    A position is given by the squares of its pieces in slot order: the white king, the black king, the
+    white pieces and the black pieces, each side in the order of the table name. The index is built from
+    the side to move, the white king square brought onto the stored squares by symmetry, and the square of
+    every other piece, so a table holds 2 * 16 * 64^(n-1) positions, or 2 * 32 * 64^(n-1) with pawns,
+    including the impossible ones.
+    Args:
+        name (str): The table name, e.g. 'KQvKR'.
+    """
+    def __init__(self, name: str):
+        """
+        Initializes a TableLayout instance.
+        Args:
+            name (str): The table name, e.g. 'KQvKR'.
+        """
+        white, black = name[1:].split('vK')
+        self.name = name
+        self.white = white
+        self.black = black
+        self.kinds: List[str] = ['k', 'k'] + [piece.lower() for piece in white + black]
+        self.colors: List[bool] = [True, False] + [True] * len(white) + [False] * len(black)
+        self.piece_count = len(self.kinds)
+        self.pawns = 'P' in name
+        self.king_squares = PAWN_KING_SQUARES if self.pawns else PAWNLESS_KING_SQUARES
+        self._king_index = [-1] * 64
+        for index, sq in enumerate(self.king_squares):
+            self._king_index[sq] = index
+        self.size = 2 * len(self.king_squares) * 64 ** (self.piece_count - 1)
+
+    def index(self, squares: List[int], white_to_move: bool) -> int:
+        """
+        Args:
+            squares (List[int]): The square index (row * 8 + col) of every piece, in slot order.
+            white_to_move (bool): Whether white is to move.
+        Returns:
+            int: The index of the position in the table.
+        """
+        mask = _symmetry_mask(squares[0], self.pawns)
+        index = (0 if white_to_move else len(self.king_squares)) + self._king_index[squares[0] ^ mask]
+        for sq in squares[1:]:
+            index = index * 64 + (sq ^ mask)
+        return index
+
+    def decode(self, index: int) -> Tuple[List[int], bool]:
+        """
+        Args:
+            index (int): The index of a position in the table.
+        Returns:
+            Tuple[List[int], bool]: The squares of the pieces in slot order, the white king on its stored
+                squares, and whether white is to move.
+        """
+        squares = [0] * self.piece_count
+        for slot in range(self.piece_count - 1, 0, -1):
+            index, squares[slot] = divmod(index, 64)
+        side, king = divmod(index, len(self.king_squares))
+        squares[0] = self.king_squares[king]
+        return squares, side == 0
+
+
+def decode_value(value: int) -> Tuple[int, int]:
+    """
+    Args:
+        value (int): A table value.
+    Returns:
+        Tuple[int, int]: 1 if the side to move wins, -1 if it is mated, 0 for a draw, and the distance to mate
+            in plies.
+    """
+    if value == DRAW:
+        return 0, 0
+    distance = value - 1
+    return (1 if distance & 1 else -1), distance
+
+
+class Tablebase:
+    """
+    Read-only endgame tablebase: the win/draw/loss and distance to mate of every position of small material
+    sets, as written by TablebaseGenerator.
+
+    The file is memory-mapped, so opening it costs nothing and a probe reads a single byte. The values follow
+    the rules of the engine: pawns promote to a queen, and a game is only ended by checkmate or stalemate.
+    Args:
+        path (str): The tablebase file.
+    """
+    def __init__(self, path: str):
+        """
+        Initializes a Tablebase instance by mapping the tablebase file.
+        Args:
+            path (str): The tablebase file.
+        """
+        self._path = path
+        with open(path, 'rb') as file:
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = HEADER_FORMAT.unpack_from(self._data, 0)
+        if magic != TABLEBASE_MAGIC:
+            self._data.close()
+            raise ValueError(f"Invalid tablebase: {path}")
+        self._tables: Dict[str, Tuple[TableLayout, int]] = {}
+        for entry in range(count):
+            name, offset, size = ENTRY_FORMAT.unpack_from(self._data, HEADER_FORMAT.size + entry * ENTRY_FORMAT.size)
+            layout = TableLayout(name.rstrip(b'\0').decode('ascii'))
+            if size != layout.size or offset + size > len(self._data):
+                self._data.close()
+                raise ValueError(f"Invalid tablebase: {path}")
+            self._tables[layout.name] = (layout, offset)
+        self.max_pieces = max((layout.piece_count for layout, _ in self._tables.values()), default=0)
+
+    def __reduce__(self):
+        """
+        Pickles the tablebase as its path, so another process maps the same file.
+        """
+        return Tablebase, (self._path,)
+
+    def get_table_names(self) -> List[str]:
+        """
+        Returns:
+            List[str]: The names of the tables of the file.
+        """
+        return list(self._tables)
+
+    def probe_squares(self, white: List[Tuple[str, int]], black: List[Tuple[str, int]],
+                      white_to_move: bool) -> Optional[Tuple[int, int]]:
+        """
+        Looks a position up from the list of its pieces.
+        Args:
+            white (List[Tuple[str, int]]): The upper case letter and square index of every white piece.
+            black (List[Tuple[str, int]]): The upper case letter and square index of every black piece.
+            white_to_move (bool): Whether white is to move.
+        Returns:
+            Optional[Tuple[int, int]]: The result for the side to move (1 win, 0 draw, -1 loss) and the
+                distance to mate in plies, or None if the material is not in the file.
+        """
+        name, flipped = table_name(''.join(piece for piece, _ in white if piece != 'K'),
+                                   ''.join(piece for piece, _ in black if piece != 'K'))
+        if name is None:
+            return 0, 0
+        if name not in self._tables:
+            return None
+        if flipped:
+            white, black = [(piece, sq ^ 56) for piece, sq in black], [(piece, sq ^ 56) for piece, sq in white]
+            white_to_move = not white_to_move
+        layout, offset = self._tables[name]
+        squares = []
+        for pieces in (white, black):
+            squares.extend(sq for piece, sq in pieces if piece == 'K')
+        for pieces in (white, black):
+            squares.extend(sq for _, sq in sorted((PIECE_ORDER.index(piece), sq) for piece, sq in pieces
+                                                  if piece != 'K'))
+        return decode_value(self._data[offset + layout.index(squares, white_to_move)])
+
+    def probe(self, board) -> Optional[Tuple[int, int]]:
+        """
+        Looks a position up.
+        Args:
+            board (ChessBoard | BitBoard): The position.
+        Returns:
+            Optional[Tuple[int, int]]: The result for the side to move (1 win, 0 draw, -1 loss) and the
+                distance to mate in plies, or None if the position is not in the file: too many pieces,
+                a material set without a table, or castling rights left.
+        """
+        squares, flags, _, _ = SNAPSHOT_FORMAT.unpack(board.snapshot())
+        if flags >> 1:
+            return None
+        white: List[Tuple[str, int]] = []
+        black: List[Tuple[str, int]] = []
+        for sq, code in enumerate(squares):
+            if code:
+                piece_class, is_white = SNAPSHOT_PIECES[code]
+                pieces = white if is_white else black
+                if len(white) + len(black) == self.max_pieces:
+                    return None
+                pieces.append((PIECE_LETTERS[piece_class], sq))
+        return self.probe_squares(white, black, bool(flags & 1))
+
+    def close(self):
+        """
+        Unmaps the tablebase file.
+        """
+        self._data.close()
+
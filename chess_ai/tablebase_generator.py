@@ -0,0 +1,478 @@
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from chess_ai.tablebase import (TABLEBASE_MAGIC, HEADER_FORMAT, ENTRY_FORMAT, PIECE_ORDER, DRAW, TableLayout,
+                                table_name)
+from chess_ai.process_context import get_process_context
+
+NOT_A_LOSS = 255  # Loss bound of the positions that have a move to a draw or a win.
+MAX_DISTANCE = 253  # The longest distance to mate a table value holds.
+
+STEPS = {
+    'n': [(-2, -1), (-2, 1), (2, 1), (2, -1), (-1, -2), (-1, 2), (1, 2), (1, -2)],
+    'k': [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)],
+}
+DIRECTIONS = {
+    'r': [(1, 0), (0, 1), (-1, 0), (0, -1)],
+    'b': [(1, 1), (1, -1), (-1, 1), (-1, -1)],
+}
+DIRECTIONS['q'] = DIRECTIONS['r'] + DIRECTIONS['b']
+
+
+def _on_board(row: int, col: int) -> bool:
+    """
+    Returns:
+        bool: True if the (row, col) position is on the board.
+    """
+    return 0 <= row < 8 and 0 <= col < 8
+
+
+# The squares a knight or a king reaches from every square, and their masks.
+TARGETS = {kind: [[(sq // 8 + i) * 8 + sq % 8 + j for i, j in steps if _on_board(sq // 8 + i, sq % 8 + j)]
+                  for sq in range(64)] for kind, steps in STEPS.items()}
+TARGET_MASKS = {kind: [sum(1 << target for target in targets) for targets in squares]
+                for kind, squares in TARGETS.items()}
+# The squares along every ray of a slider from every square, the nearest first.
+RAYS = {kind: [[[(sq // 8 + i * step) * 8 + sq % 8 + j * step for step in range(1, 8)
+                 if _on_board(sq // 8 + i * step, sq % 8 + j * step)] for i, j in directions]
+               for sq in range(64)] for kind, directions in DIRECTIONS.items()}
+# The squares a pawn of each color attacks from every square, by is_white.
+PAWN_ATTACK_MASKS = {
+    is_white: [sum(1 << (sq // 8 + forward) * 8 + sq % 8 + j for j in (-1, 1)
+                   if _on_board(sq // 8 + forward, sq % 8 + j)) for sq in range(64)]
+    for is_white, forward in ((True, -1), (False, 1))}
+
+
+def _line(src: int, dst: int) -> Tuple[str, int]:
+    """
+    Args:
+        src (int): A square index.
+        dst (int): Another square index.
+    Returns:
+        Tuple[str, int]: 'r' if the squares share a rank or a file, 'b' if they share a diagonal, '' otherwise,
+            and the mask of the squares between them.
+    """
+    for kind, directions in DIRECTIONS.items():
+        if kind == 'q':
+            continue
+        for ray in RAYS[kind][src]:
+            if dst in ray:
+                return kind, sum(1 << sq for sq in ray[:ray.index(dst)])
+    return '', 0
+
+
+LINES = [[_line(src, dst) for dst in range(64)] for src in range(64)]
+
+
+def _is_attacked(target: int, by_white: bool, kinds: List[str], colors: List[bool], squares: List[int],
+                 occupied: int, captured: int = -1) -> bool:
+    """
+    Checks whether a square is attacked by the pieces of a side.
+    Args:
+        target (int): The square index.
+        by_white (bool): The attacking side.
+        kinds (List[str]): The piece name of every slot.
+        colors (List[bool]): Whether the piece of every slot is white.
+        squares (List[int]): The square of every slot.
+        occupied (int): The mask of the occupied squares.
+        captured (int): The slot of a captured piece, which does not attack, or -1.
+    Returns:
+        bool: True if the square is attacked, False otherwise.
+    """
+    for slot, sq in enumerate(squares):
+        if colors[slot] != by_white or slot == captured:
+            continue
+        kind = kinds[slot]
+        if kind == 'n' or kind == 'k':
+            if TARGET_MASKS[kind][sq] >> target & 1:
+                return True
+        elif kind == 'p':
+            if PAWN_ATTACK_MASKS[by_white][sq] >> target & 1:
+                return True
+        else:
+            line, between = LINES[sq][target]
+            if line and (kind == 'q' or kind == line) and not between & occupied:
+                return True
+    return False
+
+
+def _pseudo_moves(slot: int, kinds: List[str], colors: List[bool], squares: List[int],
+                  occupied: int) -> List[Tuple[int, int]]:
+    """
+    Returns the moves of a piece, ignoring whether its own king is left in check.
+    Args:
+        slot (int): The slot of the piece.
+        kinds (List[str]): The piece name of every slot.
+        colors (List[bool]): Whether the piece of every slot is white.
+        squares (List[int]): The square of every slot.
+        occupied (int): The mask of the occupied squares.
+    Returns:
+        List[Tuple[int, int]]: The destination square of every move and the slot of the piece it captures,
+            or -1.
+    """
+    kind, sq, is_white = kinds[slot], squares[slot], colors[slot]
+    moves = []
+    if kind == 'p':
+        forward = sq - 8 if is_white else sq + 8
+        if not occupied >> forward & 1:
+            moves.append((forward, -1))
+            double = forward - 8 if is_white else forward + 8
+            if sq >> 3 == (6 if is_white else 1) and not occupied >> double & 1:
+                moves.append((double, -1))
+        attacks = PAWN_ATTACK_MASKS[is_white][sq] & occupied
+        if attacks:
+            for other, other_sq in enumerate(squares):
+                if attacks >> other_sq & 1 and colors[other] != is_white:
+                    moves.append((other_sq, other))
+        return moves
+    if kind == 'n' or kind == 'k':
+        for dst in TARGETS[kind][sq]:
+            if not occupied >> dst & 1:
+                moves.append((dst, -1))
+            else:
+                other = squares.index(dst)
+                if colors[other] != is_white:
+                    moves.append((dst, other))
+        return moves
+    for ray in RAYS[kind][sq]:
+        for dst in ray:
+            if not occupied >> dst & 1:
+                moves.append((dst, -1))
+                continue
+            other = squares.index(dst)
+            if colors[other] != is_white:
+                moves.append((dst, other))
+            break
+    return moves
+
+
+def _unmoves(slot: int, kinds: List[str], colors: List[bool], squares: List[int], occupied: int) -> List[int]:
+    """
+    Returns the squares a piece may have come from by a move that captured nothing and promoted nothing.
+    Args:
+        slot (int): The slot of the piece.
+        kinds (List[str]): The piece name of every slot.
+        colors (List[bool]): Whether the piece of every slot is white.
+        squares (List[int]): The square of every slot.
+        occupied (int): The mask of the occupied squares.
+    Returns:
+        List[int]: The source squares.
+    """
+    kind, sq = kinds[slot], squares[slot]
+    if kind == 'p':
+        is_white = colors[slot]
+        back = sq + 8 if is_white else sq - 8
+        sources = []
+        if not occupied >> back & 1 and back >> 3 not in (0, 7):
+            sources.append(back)
+            double = back + 8 if is_white else back - 8
+            if back >> 3 == (5 if is_white else 2) and not occupied >> double & 1:
+                sources.append(double)
+        return sources
+    if kind == 'n' or kind == 'k':
+        return [src for src in TARGETS[kind][sq] if not occupied >> src & 1]
+    sources = []
+    for ray in RAYS[kind][sq]:
+        for src in ray:
+            if occupied >> src & 1:
+                break
+            sources.append(src)
+    return sources
+
+
+def table_dependencies(name: str) -> Set[str]:
+    """
+    Returns the tables a table needs to be generated: the material sets reached by a capture or a promotion.
+    Args:
+        name (str): The table name, e.g. 'KRvKP'.
+    Returns:
+        Set[str]: The names of the tables.
+    """
+    layout = TableLayout(name)
+    dependencies = set()
+    for white, black, _ in _material_changes(layout).values():
+        child, _ = table_name(white, black)
+        if child is not None:
+            dependencies.add(child)
+    return dependencies
+
+
+def _material_changes(layout: TableLayout) -> Dict[Tuple[int, int], Tuple[str, str, List[int]]]:
+    """
+    Lists the moves that leave a table: a capture, a promotion, or both at once.
+    Args:
+        layout (TableLayout): The table.
+    Returns:
+        Dict[Tuple[int, int], Tuple[str, str, List[int]]]: By slot of the captured piece and slot of the
+            promoted pawn (-1 for none), the white and black pieces left and the slots of the pieces in the
+            slot order of the table they form, before the colors are swapped.
+    """
+    changes = {}
+    slots = range(2, layout.piece_count)
+    promotions = [-1] + [slot for slot in slots if layout.kinds[slot] == 'p']
+    for captured in [-1] + list(slots):
+        for promoted in promotions:
+            if (captured == -1 and promoted == -1) or captured == promoted or \
+                    (captured != -1 and promoted != -1 and layout.colors[captured] == layout.colors[promoted]):
+                continue
+            pieces = {True: [], False: []}
+            for slot in slots:
+                if slot != captured:
+                    letter = 'Q' if slot == promoted else layout.kinds[slot].upper()
+                    pieces[layout.colors[slot]].append((PIECE_ORDER.index(letter), slot, letter))
+            order = [0, 1]
+            for is_white in (True, False):
+                order.extend(slot for _, slot, _ in sorted(pieces[is_white]))
+            changes[(captured, promoted)] = (''.join(letter for _, _, letter in sorted(pieces[True])),
+                                             ''.join(letter for _, _, letter in sorted(pieces[False])), order)
+    return changes
+
+
+class TablebaseGenerator:
+    """
+    Generates endgame tables by retrograde analysis.
+
+    A table starts from the positions decided at once: checkmates, and the positions with a capture or a
+    promotion into an already generated table. The results then spread backwards, one ply of distance at
+    a time, through the moves that stay in the table: a position is won when one of its moves reaches a
+    position lost for the opponent, and lost when every move reaches a position won for the opponent,
+    which is counted down per position. What is never decided is a draw. The tables of independent
+    material sets are generated in parallel by a pool of processes.
+    Args:
+        workers (int): The number of processes, 1 to generate in the calling process.
+    """
+    def __init__(self, workers: int = 1):
+        """
+        Initializes a TablebaseGenerator instance.
+        Args:
+            workers (int): The number of processes, 1 to generate in the calling process.
+        """
+        self._workers = workers
+        self.tables: Dict[str, bytes] = {}
+
+    def generate(self, names: List[str], progress: Optional[Callable[[str, float], None]] = None):
+        """
+        Generates tables and the tables they depend on, into tables.
+        Args:
+            names (List[str]): The table names, e.g. ['KQvK', 'KRvK'].
+            progress (Optional[Callable[[str, float], None]]): Called with the name and the generation time of
+                every finished table.
+        """
+        pending: Dict[str, Set[str]] = {}
+        todo = [name for name in names if name not in self.tables]
+        while todo:
+            name = todo.pop()
+            if name in pending:
+                continue
+            pending[name] = {dependency for dependency in table_dependencies(name) if dependency not in self.tables}
+            todo.extend(pending[name])
+        if self._workers <= 1:
+            while pending:
+                name = next(name for name, dependencies in pending.items() if dependencies <= set(self.tables))
+                start = time.perf_counter()
+                self.tables[name] = generate_table(name, self.tables)
+                del pending[name]
+                if progress is not None:
+                    progress(name, time.perf_counter() - start)
+            return
+
+        context = get_process_context()
+        with ProcessPoolExecutor(max_workers=self._workers, mp_context=context) as executor:
+            running = {}
+            while pending or running:
+                for name in [name for name, dependencies in pending.items() if dependencies <= set(self.tables)]:
+                    dependencies = {child: self.tables[child] for child in table_dependencies(name)}
+                    running[executor.submit(_generate_timed, name, dependencies)] = name
+                    del pending[name]
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    self.tables[name], elapsed = future.result()
+                    if progress is not None:
+                        progress(name, elapsed)
+
+    def write(self, path: str):
+        """
+        Writes every generated table to a tablebase file: a directory of the tables, then one byte per
+        position of each.
+        Args:
+            path (str): The tablebase file.
+        """
+        names = sorted(self.tables, key=lambda name: (len(name), name))
+        offset = HEADER_FORMAT.size + len(names) * ENTRY_FORMAT.size
+        with open(path, 'wb') as file:
+            file.write(HEADER_FORMAT.pack(TABLEBASE_MAGIC, len(names)))
+            for name in names:
+                file.write(ENTRY_FORMAT.pack(name.encode('ascii'), offset, len(self.tables[name])))
+                offset += len(self.tables[name])
+            for name in names:
+                file.write(self.tables[name])
+
+
+def all_table_names(max_pieces: int) -> List[str]:
+    """
+    Args:
+        max_pieces (int): The largest number of pieces, kings included.
+    Returns:
+        List[str]: The name of every table with at most that many pieces, the smallest first.
+    """
+    names = set()
+    for count in range(1, max_pieces - 1):
+        for pieces in itertools.combinations_with_replacement(PIECE_ORDER, count):
+            for split in range(count + 1):
+                for white in itertools.combinations(pieces, split):
+                    black = list(pieces)
+                    for piece in white:
+                        black.remove(piece)
+                    names.add(table_name(''.join(white), ''.join(black))[0])
+    return sorted(names, key=lambda name: (len(name), name))
+
+
+def _generate_timed(name: str, tables: Dict[str, bytes]) -> Tuple[bytes, float]:
+    """
+    Generates a table in a worker process.
+    Args:
+        name (str): The table name.
+        tables (Dict[str, bytes]): The tables it depends on.
+    Returns:
+        Tuple[bytes, float]: The table and its generation time in seconds.
+    """
+    start = time.perf_counter()
+    table = generate_table(name, tables)
+    return table, time.perf_counter() - start
+
+
+def generate_table(name: str, tables: Dict[str, bytes]) -> bytes:
+    """
+    Generates one table by retrograde analysis.
+    Args:
+        name (str): The table name, e.g. 'KQvKR'.
+        tables (Dict[str, bytes]): The generated tables, which include every table it depends on.
+    Returns:
+        bytes: The value of every position, see Tablebase.
+    """
+    layout = TableLayout(name)
+    kinds, colors, count = layout.kinds, layout.colors, layout.piece_count
+    values = bytearray(layout.size)
+    # the moves of every position that stay in the table and are not known to lose yet
+    counters = bytearray(layout.size)
+    # the longest loss among the decided moves, or NOT_A_LOSS
+    bounds = bytearray(layout.size)
+    # the positions to decide at every distance; a position may be listed more than once
+    queues: Dict[int, List[int]] = {}
+
+    exits = {}
+    for key, (white, black, order) in _material_changes(layout).items():
+        child, flipped = table_name(white, black)
+        exits[key] = (TableLayout(child) if child is not None else None, tables.get(child), flipped, order)
+
+    index = 0
+    for white_to_move in (True, False):
+        king_slot, enemy_king_slot = (0, 1) if white_to_move else (1, 0)
+        for white_king in layout.king_squares:
+            for others in itertools.product(range(64), repeat=count - 1):
+                squares = [white_king, *others]
+                position = index
+                index += 1
+                occupied = 0
+                for sq in squares:
+                    occupied |= 1 << sq
+                if bin(occupied).count('1') != count or \
+                        any(kinds[slot] == 'p' and squares[slot] >> 3 in (0, 7) for slot in range(2, count)) or \
+                        _is_attacked(squares[enemy_king_slot], white_to_move, kinds, colors, squares, occupied):
+                    bounds[position] = NOT_A_LOSS
+                    continue
+
+                king = squares[king_slot]
+                in_check = _is_attacked(king, not white_to_move, kinds, colors, squares, occupied)
+                quiet = 0
+                moves = 0
+                win = None
+                loss = 0
+                drawn = False
+                for slot in range(count):
+                    if colors[slot] != white_to_move:
+                        continue
+                    src = squares[slot]
+                    # out of check, only the king and the pieces on a line from it may expose it
+                    exposes = in_check or slot == king_slot or LINES[king][src][0]
+                    for dst, captured in _pseudo_moves(slot, kinds, colors, squares, occupied):
+                        squares[slot] = dst
+                        if not exposes or not _is_attacked(squares[king_slot], not white_to_move, kinds, colors,
+                                                           squares, (occupied ^ (1 << src)) | (1 << dst), captured):
+                            moves += 1
+                            promoted = slot if kinds[slot] == 'p' and dst >> 3 in (0, 7) else -1
+                            if captured == -1 and promoted == -1:
+                                quiet += 1
+                            else:
+                                child_layout, child_table, flipped, order = exits[(captured, promoted)]
+                                value = DRAW
+                                if child_layout is not None:
+                                    child_squares = [squares[other] ^ 56 if flipped else squares[other]
+                                                     for other in order]
+                                    if flipped:
+                                        child_squares[0], child_squares[1] = child_squares[1], child_squares[0]
+                                        child_squares[2:] = child_squares[2 + len(child_layout.black):] + \
+                                            child_squares[2:2 + len(child_layout.black)]
+                                    value = child_table[child_layout.index(child_squares, white_to_move == flipped)]
+                                if value == DRAW:
+                                    drawn = True
+                                elif value & 1:
+                                    # the opponent is mated in value - 1 plies
+                                    win = value if win is None else min(win, value)
+                                else:
+                                    loss = max(loss, value)
+                        squares[slot] = src
+
+                if moves == 0:
+                    if in_check:
+                        queues.setdefault(0, []).append(position)
+                    else:
+                        bounds[position] = NOT_A_LOSS
+                    continue
+                counters[position] = quiet
+                if win is not None:
+                    queues.setdefault(win, []).append(position)
+                if win is not None or drawn:
+                    bounds[position] = NOT_A_LOSS
+                else:
+                    bounds[position] = loss
+                    if quiet == 0:
+                        queues.setdefault(loss, []).append(position)
+
+    distance = 0
+    while distance <= max(queues, default=-1):
+        for position in queues.pop(distance, []):
+            if values[position] != DRAW:
+                continue
+            if distance > MAX_DISTANCE:
+                raise ValueError(f"{name}: distance to mate beyond {MAX_DISTANCE} plies")
+            values[position] = distance + 1
+            squares, white_to_move = layout.decode(position)
+            occupied = 0
+            for sq in squares:
+                occupied |= 1 << sq
+            # the positions before the last move, with the other side to move
+            mover = not white_to_move
+            king_slot = 0 if white_to_move else 1
+            for slot in range(count):
+                if colors[slot] != mover:
+                    continue
+                dst = squares[slot]
+                for src in _unmoves(slot, kinds, colors, squares, occupied):
+                    squares[slot] = src
+                    before = (occupied ^ (1 << dst)) | (1 << src)
+                    if not _is_attacked(squares[king_slot], mover, kinds, colors, squares, before):
+                        previous = layout.index(squares, mover)
+                        if values[previous] == DRAW:
+                            if distance & 1 == 0:
+                                queues.setdefault(distance + 1, []).append(previous)
+                            elif bounds[previous] != NOT_A_LOSS:
+                                bounds[previous] = max(bounds[previous], distance + 1)
+                                counters[previous] -= 1
+                                if counters[previous] == 0:
+                                    queues.setdefault(bounds[previous], []).append(previous)
+                    squares[slot] = dst
+        distance += 1
+    return bytes(values)
@@ -0,0 +1,252 @@
+from array import array
+from multiprocessing import shared_memory, resource_tracker
+from typing import Optional, Tuple
+
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2  # The bound type of a stored score.
+
+ENTRY_SIZE = 16  # Bytes per entry: the 64-bit key and the 64-bit packed data.
+SCORE_OFFSET = 1 << 31
+
+Move = Tuple[Tuple[int, int], Tuple[int, int]]
+
+
+def encode_move(move: Optional[Move]) -> int:
+    """
+    Encodes a move into 13 bits, 0 meaning no move.
+    Args:
+        move (Optional[Move]): The move as (source position, destination position).
+    Returns:
+        int: The encoded move.
+    """
+    if move is None:
+        return 0
+    (src_row, src_col), (dst_row, dst_col) = move
+    return 1 + ((src_row * 8 + src_col) << 6 | (dst_row * 8 + dst_col))
+
+
+def decode_move(code: int) -> Optional[Move]:
+    """
+    Decodes a move encoded by encode_move.
+    Args:
+        code (int): The encoded move.
+    Returns:
+        Optional[Move]: The move as (source position, destination position), or None.
+    """
+    if code == 0:
+        return None
+    code -= 1
+    src, dst = code >> 6, code & 63
+    return (src >> 3, src & 7), (dst >> 3, dst & 7)
+
+
+class TranspositionTable:
+    """
+    Fixed-size hash table of search results keyed on the Zobrist key of a position.
+
+    Every entry holds the search depth, the bound type, the score and the best move, packed
+    into two 64-bit slots of preallocated arrays, so the table never grows beyond its memory cap.
+    A slot is replaced when it is empty, holds the same position, was written by an earlier
+    search or was searched to a depth not greater than the new one.
+    Args:
+        size_mb (float): The memory cap of the table in megabytes.
+    """
+    def __init__(self, size_mb: float = 16):
+        """
+        Initializes a TranspositionTable instance.
+        Args:
+            size_mb (float): The memory cap of the table in megabytes.
+        """
+        self._size = max(1, int(size_mb * 1024 * 1024) // ENTRY_SIZE)
+        self._keys = array('Q', [0]) * self._size
+        self._data = array('Q', [0]) * self._size
+        self._age = 0
+        self.probes = 0
+        self.hits = 0
+
+    def __len__(self) -> int:
+        """
+        Returns:
+            int: The number of entries the table can hold.
+        """
+        return self._size
+
+    def new_search(self):
+        """
+        Starts a new search: entries of earlier searches become replaceable and the statistics are reset.
+        """
+        self._age = (self._age + 1) & 0xFF
+        self.probes = 0
+        self.hits = 0
+
+    def clear(self):
+        """
+        Removes all the entries of the table.
+        """
+        self._keys = array('Q', [0]) * self._size
+        self._data = array('Q', [0]) * self._size
+
+    def probe(self, key: int) -> Optional[Tuple[int, int, int, Optional[Move]]]:
+        """
+        Looks up a position in the table.
+        Args:
+            key (int): The Zobrist key of the position.
+        Returns:
+            Optional[Tuple[int, int, int, Optional[Move]]]: The depth, bound type, score and best move
+                stored for the position, or None if the position is not in the table.
+        """
+        self.probes += 1
+        index = key % self._size
+        if self._keys[index] != key:
+            return None
+        self.hits += 1
+        data = self._data[index]
+        return (data >> 15) & 0xFF, (data >> 13) & 0x3, (data >> 32) - SCORE_OFFSET, decode_move(data & 0x1FFF)
+
+    def store(self, key: int, depth: int, bound: int, score: int, move: Optional[Move]):
+        """
+        Stores a search result, following the depth and age replacement policy.
+        Args:
+            key (int): The Zobrist key of the position.
+            depth (int): The remaining depth the position was searched to.
+            bound (int): EXACT, LOWER_BOUND or UPPER_BOUND.
+            score (int): The score of the position, from the side to move's point of view.
+            move (Optional[Move]): The best move found, or None.
+        """
+        index = key % self._size
+        stored_key = self._keys[index]
+        if stored_key != 0 and stored_key != key:
+            data = self._data[index]
+            if (data >> 23) & 0xFF == self._age and (data >> 15) & 0xFF > depth:
+                return
+        elif stored_key == key and move is None:
+            # keep the best move of an earlier search of the same position
+            move = decode_move(self._data[index] & 0x1FFF)
+        self._keys[index] = key
+        self._data[index] = (score + SCORE_OFFSET) << 32 | self._age << 23 | max(0, min(depth, 0xFF)) << 15 | \
+            bound << 13 | encode_move(move)
+
+    def hit_rate(self) -> float:
+        """
+        Returns:
+            float: The fraction of probes of the current search that found their position.
+        """
+        return self.hits / self.probes if self.probes else 0.0
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """
+    Transposition table placed in multiprocessing.shared_memory, so that several search processes read
+    and write the same entries without locks.
+
+    Every entry is stored as (key XOR data, data). A reader recomputes the key from both words and
+    drops the entry when it does not match, so an entry torn by two processes writing it at the same
+    time reads as a miss instead of a wrong result. The search age lives in the first word of the
+    block so that every process stores entries with the age of the current search.
+    Args:
+        size_mb (float): The memory cap of the table in megabytes.
+        name (Optional[str]): The name of an existing block to attach to, None to create a new one.
+    """
+    def __init__(self, size_mb: float = 16, name: Optional[str] = None):
+        """
+        Initializes a SharedTranspositionTable instance, creating the shared block or attaching to it.
+        The process that creates the block owns it and has to call unlink when the table is no longer used.
+        Args:
+            size_mb (float): The memory cap of the table in megabytes.
+            name (Optional[str]): The name of an existing block to attach to, None to create a new one.
+        """
+        self._size = max(1, int(size_mb * 1024 * 1024) // ENTRY_SIZE)
+        self._size_mb = size_mb
+        if name is None:
+            self._memory = shared_memory.SharedMemory(create=True, size=(self._size + 1) * ENTRY_SIZE)
+            self._memory.buf[:] = bytes(len(self._memory.buf))
+        else:
+            self._memory = shared_memory.SharedMemory(name=name)
+            # the creating process owns the block: attaching ones must not remove it when they exit
+            resource_tracker.unregister(self._memory._name, 'shared_memory')
+        self._slots = self._memory.buf.cast('Q')
+        self.probes = 0
+        self.hits = 0
+
+    @property
+    def name(self) -> str:
+        """
+        Returns:
+            str: The name of the shared block, to attach to it from another process.
+        """
+        return self._memory.name
+
+    def __reduce__(self):
+        """
+        Pickles the table as a reference to its shared block, so a process receiving it attaches to it.
+        """
+        return SharedTranspositionTable, (self._size_mb, self._memory.name)
+
+    def new_search(self):
+        """
+        Starts a new search: entries of earlier searches become replaceable and the statistics are reset.
+        """
+        self._slots[0] = (self._slots[0] + 1) & 0xFF
+        self.probes = 0
+        self.hits = 0
+
+    def clear(self):
+        """
+        Removes all the entries of the table.
+        """
+        self._memory.buf[ENTRY_SIZE:] = bytes(len(self._memory.buf) - ENTRY_SIZE)
+
+    def probe(self, key: int) -> Optional[Tuple[int, int, int, Optional[Move]]]:
+        """
+        Looks up a position in the table.
+        Args:
+            key (int): The Zobrist key of the position.
+        Returns:
+            Optional[Tuple[int, int, int, Optional[Move]]]: The depth, bound type, score and best move
+                stored for the position, or None if the position is not in the table.
+        """
+        self.probes += 1
+        slot = 2 + 2 * (key % self._size)
+        data = self._slots[slot + 1]
+        if self._slots[slot] ^ data != key or data == 0:
+            return None
+        self.hits += 1
+        return (data >> 15) & 0xFF, (data >> 13) & 0x3, (data >> 32) - SCORE_OFFSET, decode_move(data & 0x1FFF)
+
+    def store(self, key: int, depth: int, bound: int, score: int, move: Optional[Move]):
+        """
+        Stores a search result, following the depth and age replacement policy.
+        Args:
+            key (int): The Zobrist key of the position.
+            depth (int): The remaining depth the position was searched to.
+            bound (int): EXACT, LOWER_BOUND or UPPER_BOUND.
+            score (int): The score of the position, from the side to move's point of view.
+            move (Optional[Move]): The best move found, or None.
+        """
+        age = self._slots[0]
+        slot = 2 + 2 * (key % self._size)
+        data = self._slots[slot + 1]
+        stored_key = self._slots[slot] ^ data
+        if data != 0 and stored_key != key:
+            if (data >> 23) & 0xFF == age and (data >> 15) & 0xFF > depth:
+                return
+        elif data != 0 and move is None:
+            # keep the best move of an earlier search of the same position
+            move = decode_move(data & 0x1FFF)
+        data = (score + SCORE_OFFSET) << 32 | age << 23 | max(0, min(depth, 0xFF)) << 15 | bound << 13 | \
+            encode_move(move)
+        self._slots[slot] = key ^ data
+        self._slots[slot + 1] = data
+
+    def close(self):
+        """
+        Detaches the process from the shared block.
+        """
+        self._slots.release()
+        self._memory.close()
+
+    def unlink(self):
+        """
+        Detaches from the shared block and frees it; called once by the process that created it.
+        """
+        self.close()
+        self._memory.unlink()
@@ -0,0 +1,819 @@
+from typing import Dict, Optional, List, Tuple
+from chess_piece import Piece, King, Rook
+from chess_board import ChessBoard, SNAPSHOT_FORMAT
+from chess_move import attack_tables
+from const import PIECES
+from zobrist import PIECE_SQUARE_KEYS, CASTLING_KEYS, SIDE_KEY
+from evaluation_tables import PIECE_SQUARE_SCORE
+
+# Piece codes follow the order of the PIECES image names: black pieces 0-5, white pieces 6-11.
+PIECE_NAMES = 'rnbqkp'
+WHITE_OFFSET = 6
+ROOK, KNIGHT, BISHOP, QUEEN, KING, PAWN = range(6)
+
+# Castling rights bits: white king side, white queen side, black king side, black queen side.
+WHITE_KING_SIDE, WHITE_QUEEN_SIDE, BLACK_KING_SIDE, BLACK_QUEEN_SIDE = 1, 2, 4, 8
+
+SQUARE_POSITION: Tuple[Tuple[int, int], ...] = tuple((sq >> 3, sq & 7) for sq in range(64))
+
+DIRECTIONS = [(1, 0), (0, 1), (1, 1), (1, -1), (-1, 0), (0, -1), (-1, -1), (-1, 1)]
+# Directions in which the square index grows; the nearest blocker is then the lowest set bit.
+POSITIVE_DIRECTIONS = (True, True, True, True, False, False, False, False)
+STRAIGHT_DIRECTIONS = (0, 1, 4, 5)
+DIAGONAL_DIRECTIONS = (2, 3, 6, 7)
+
+
+def _masks(table: List[List[Tuple[Tuple[int, int], ...]]]) -> List[int]:
+    """
+    Converts a square table of chess_move.attack_tables to bitmasks.
+    Args:
+        table (List[List[Tuple[Tuple[int, int], ...]]]): The squares of every square, indexed [row][col].
+    Returns:
+        List[int]: The bitmask of the squares of every square, indexed by square index.
+    """
+    return [sum(1 << (row * 8 + col) for row, col in table[sq >> 3][sq & 7]) for sq in range(64)]
+
+
+KNIGHT_ATTACKS = _masks(attack_tables.KNIGHT_TARGETS)
+KING_ATTACKS = _masks(attack_tables.KING_TARGETS)
+# PAWN_ATTACKS[is_white][sq]: the squares attacked by a pawn of that color standing on sq, which are the
+# squares a pawn of the other color attacks sq from.
+PAWN_ATTACKS = [_masks(attack_tables.WHITE_PAWN_ATTACKERS), _masks(attack_tables.BLACK_PAWN_ATTACKERS)]
+RAYS = [_masks(attack_tables.RAYS[direction]) for direction in DIRECTIONS]
+
+# Castling rights kept after a piece leaves or arrives at a square.
+CASTLING_MASK = [0xF] * 64
+CASTLING_MASK[60] &= ~(WHITE_KING_SIDE | WHITE_QUEEN_SIDE)
+CASTLING_MASK[63] &= ~WHITE_KING_SIDE
+CASTLING_MASK[56] &= ~WHITE_QUEEN_SIDE
+CASTLING_MASK[4] &= ~(BLACK_KING_SIDE | BLACK_QUEEN_SIDE)
+CASTLING_MASK[7] &= ~BLACK_KING_SIDE
+CASTLING_MASK[0] &= ~BLACK_QUEEN_SIDE
+
+
+def piece_code(name: str, is_white: bool) -> int:
+    """
+    Returns the bitboard index of a piece.
+    Args:
+        name (str): The piece name ('r', 'n', 'b', 'q', 'k' or 'p').
+        is_white (bool): Indicates whether the piece is white.
+    Returns:
+        int: The piece code, in the order of the PIECES image names.
+    """
+    return PIECES.index(('white_' if is_white else 'black_') + name)
+
+
+class BitBoard:
+    """
+    Chessboard backed by bitboards: twelve 64-bit integers (one per piece type and color) plus
+    occupancy masks. Square index is row * 8 + col, so bit 0 is the top-left square of the
+    list-of-lists ChessBoard. Offers the same public API as ChessBoard, except that undo_move only undoes
+    moves made on this board: it restores them from its own move history, which a board built by from_board,
+    from_fen, from_snapshot or clone starts without.
+    """
+    def __init__(self):
+        """
+        Initializes a BitBoard instance with the starting position.
+        """
+        self._bitboards: List[int] = [0] * 12
+        self._squares: List[Optional[int]] = [None] * 64
+        self._occupancy = [0, 0]
+        self._occupied = 0
+        self._is_white_turn = True
+        self._castling_rights = WHITE_KING_SIDE | WHITE_QUEEN_SIDE | BLACK_KING_SIDE | BLACK_QUEEN_SIDE
+        self._history: List[Tuple[int, int, int, Optional[int], int, int, int]] = []
+
+        piece_order = [ROOK, KNIGHT, BISHOP, QUEEN, KING, BISHOP, KNIGHT, ROOK]
+        for row, offset in [(0, 0), (7, WHITE_OFFSET)]:
+            for col, kind in enumerate(piece_order):
+                self._put(row * 8 + col, kind + offset)
+        for row, offset in [(1, 0), (6, WHITE_OFFSET)]:
+            for col in range(8):
+                self._put(row * 8 + col, PAWN + offset)
+        self._hash = self._compute_hash()
+        self._score = self._compute_score()
+
+    @classmethod
+    def from_board(cls, board) -> 'BitBoard':
+        """
+        Builds a BitBoard holding the same position as a list-of-lists ChessBoard.
+        Args:
+            board (ChessBoard): The board to convert.
+        Returns:
+            BitBoard: The converted board.
+        """
+        bit_board = cls.__new__(cls)
+        bit_board._bitboards = [0] * 12
+        bit_board._squares = [None] * 64
+        bit_board._occupancy = [0, 0]
+        bit_board._occupied = 0
+        bit_board._is_white_turn = board.is_white_turn()
+        bit_board._history = []
+        for sq, pos in enumerate(SQUARE_POSITION):
+            piece = board.get_piece(pos)
+            if piece is not None:
+                bit_board._put(sq, piece_code(piece.get_name(), piece.is_white()))
+
+        rights = 0
+        for row, king_side, queen_side in [(7, WHITE_KING_SIDE, WHITE_QUEEN_SIDE),
+                                           (0, BLACK_KING_SIDE, BLACK_QUEEN_SIDE)]:
+            king = board.get_piece((row, 4))
+            if isinstance(king, King) and not king.has_moved():
+                for col, right in [(7, king_side), (0, queen_side)]:
+                    rook = board.get_piece((row, col))
+                    if isinstance(rook, Rook) and not rook.has_moved():
+                        rights |= right
+        bit_board._castling_rights = rights
+        bit_board._hash = bit_board._compute_hash()
+        bit_board._score = bit_board._compute_score()
+        return bit_board
+
+    @classmethod
+    def from_fen(cls, fen: str) -> 'BitBoard':
+        """
+        Builds a board from a FEN string, see ChessBoard.from_fen.
+        Args:
+            fen (str): The position in Forsyth-Edwards Notation.
+        Returns:
+            BitBoard: The board holding the position.
+        """
+        return cls.from_board(ChessBoard.from_fen(fen))
+
+    def snapshot(self) -> bytes:
+        """
+        Returns a compact, immutable copy of the position, in the SNAPSHOT_FORMAT shared with ChessBoard.
+        Returns:
+            bytes: The snapshot, cheap to store or to send to another process.
+        """
+        squares = bytes(0 if code is None else code + 1 for code in self._squares)
+        flags = (1 if self._is_white_turn else 0) | self._castling_rights << 1
+        return SNAPSHOT_FORMAT.pack(squares, flags, self._hash, self._score)
+
+    @classmethod
+    def from_snapshot(cls, data: bytes) -> 'BitBoard':
+        """
+        Builds a board from a snapshot taken by snapshot, of this or of another board implementation.
+        Args:
+            data (bytes): The snapshot.
+        Returns:
+            BitBoard: The board holding the position.
+        """
+        squares, flags, key, score = SNAPSHOT_FORMAT.unpack(data)
+        bit_board = cls.__new__(cls)
+        bit_board._bitboards = [0] * 12
+        bit_board._squares = [None] * 64
+        bit_board._occupancy = [0, 0]
+        bit_board._occupied = 0
+        bit_board._is_white_turn = bool(flags & 1)
+        bit_board._castling_rights = flags >> 1
+        bit_board._history = []
+        for sq, code in enumerate(squares):
+            if code:
+                bit_board._put(sq, code - 1)
+        bit_board._hash = key
+        bit_board._score = score
+        return bit_board
+
+    def clone(self) -> 'BitBoard':
+        """
+        Returns:
+            BitBoard: An independent board holding the same position, without the move history.
+        """
+        return self.from_snapshot(self.snapshot())
+
+    def _put(self, sq: int, code: int):
+        """
+        Places a piece on an empty square.
+        Args:
+            sq (int): The square index.
+            code (int): The piece code.
+        """
+        bit = 1 << sq
+        self._bitboards[code] |= bit
+        self._occupancy[code >= WHITE_OFFSET] |= bit
+        self._occupied |= bit
+        self._squares[sq] = code
+
+    def _remove(self, sq: int) -> Optional[int]:
+        """
+        Removes the piece standing on a square.
+        Args:
+            sq (int): The square index.
+        Returns:
+            Optional[int]: The code of the removed piece, or None if the square was empty.
+        """
+        code = self._squares[sq]
+        if code is not None:
+            bit = 1 << sq
+            self._bitboards[code] ^= bit
+            self._occupancy[code >= WHITE_OFFSET] ^= bit
+            self._occupied ^= bit
+            self._squares[sq] = None
+        return code
+
+    def is_white_turn(self) -> bool:
+        """
+        Returns:
+             bool: True if it is currently the white player's turn, False otherwise.
+        """
+        return self._is_white_turn
+
+    def change_turn(self):
+        """
+        Switches the turn from the current player to the opposite player.
+        """
+        self._is_white_turn = not self._is_white_turn
+        self._hash ^= SIDE_KEY
+
+    def get_hash(self) -> int:
+        """
+        Returns the Zobrist key of the current position, covering the pieces, castling rights and side to move.
+        Returns:
+            int: The 64-bit position key.
+        """
+        return self._hash
+
+    def _compute_hash(self) -> int:
+        """
+        Computes the Zobrist key of the current position from scratch.
+        Returns:
+            int: The 64-bit position key.
+        """
+        key = CASTLING_KEYS[self._castling_rights]
+        if not self._is_white_turn:
+            key ^= SIDE_KEY
+        for sq, code in enumerate(self._squares):
+            if code is not None:
+                key ^= PIECE_SQUARE_KEYS[code][sq]
+        return key
+
+    def get_score(self) -> int:
+        """
+        Returns the material and piece-square score of the position, kept up to date move by move.
+        Returns:
+            int: The score from white's point of view: positive when white is ahead.
+        """
+        return self._score
+
+    def _compute_score(self) -> int:
+        """
+        Computes the material and piece-square score of the position from scratch.
+        Returns:
+            int: The score from white's point of view.
+        """
+        return sum(PIECE_SQUARE_SCORE[code][sq] for sq, code in enumerate(self._squares) if code is not None)
+
+    def get_board(self) -> List[List[Optional[Piece]]]:
+        """
+        Returns a list-of-lists view of the current position.
+        Returns:
+            List[List[Optional[Piece]]]: The 8x8 chessboard.
+        """
+        return [[self.get_piece((row, col)) for col in range(8)] for row in range(8)]
+
+    def get_piece(self, pos: Tuple[int, int]) -> Optional[Piece]:
+        """
+        Returns the piece at the specified position on the chessboard.
+        Args:
+            pos (Tuple[int, int]): The position (row, col) on the chessboard.
+        Returns:
+            Optional[Piece]: A piece describing the square content or None if the position is empty.
+        """
+        code = self._squares[pos[0] * 8 + pos[1]]
+        if code is None:
+            return None
+        return Piece(PIECE_NAMES[code % WHITE_OFFSET], code >= WHITE_OFFSET, pos)
+
+    def get_piece_name(self, pos: Tuple[int, int]) -> Optional[str]:
+        """
+        Returns the name of the piece at the specified position on the chessboard.
+        Args:
+            pos (Tuple[int, int]): The position (row, col) on the chessboard.
+        Returns:
+            Optional[str]: The name of the piece at the specified position or None if the position is empty.
+        """
+        code = self._squares[pos[0] * 8 + pos[1]]
+        return None if code is None else PIECE_NAMES[code % WHITE_OFFSET]
+
+    def is_white_piece(self, pos: Tuple[int, int]) -> Optional[bool]:
+        """
+        Returns whether the piece at the specified position is white or black.
+        Args:
+            pos (Tuple[int, int]): The position (row, col) on the chessboard.
+        Returns:
+            Optional[bool]: True if the piece is white, False if black, and None if the position is empty.
+        """
+        code = self._squares[pos[0] * 8 + pos[1]]
+        return None if code is None else code >= WHITE_OFFSET
+
+    def _slider_attacks(self, sq: int, directions: Tuple[int, ...]) -> int:
+        """
+        Returns the squares attacked from a square along the given ray directions.
+        Args:
+            sq (int): The origin square index.
+            directions (Tuple[int, ...]): Indexes into DIRECTIONS.
+        Returns:
+            int: The bitmask of attacked squares, up to and including the first blocker of each ray.
+        """
+        occupied = self._occupied
+        attacks = 0
+        for direction in directions:
+            ray = RAYS[direction][sq]
+            blockers = ray & occupied
+            if blockers:
+                if POSITIVE_DIRECTIONS[direction]:
+                    blocker = (blockers & -blockers).bit_length() - 1
+                else:
+                    blocker = blockers.bit_length() - 1
+                ray ^= RAYS[direction][blocker]
+            attacks |= ray
+        return attacks
+
+    def _is_attacked(self, sq: int, by_white: bool) -> bool:
+        """
+        Checks whether a square is attacked by any piece of the given color.
+        Args:
+            sq (int): The square index.
+            by_white (bool): The color of the attacking side.
+        Returns:
+            bool: True if the square is attacked, False otherwise.
+        """
+        offset = WHITE_OFFSET if by_white else 0
+        bitboards = self._bitboards
+        if KNIGHT_ATTACKS[sq] & bitboards[KNIGHT + offset]:
+            return True
+        if KING_ATTACKS[sq] & bitboards[KING + offset]:
+            return True
+        if PAWN_ATTACKS[not by_white][sq] & bitboards[PAWN + offset]:
+            return True
+        queens = bitboards[QUEEN + offset]
+        occupied = self._occupied
+        for directions, sliders in ((DIAGONAL_DIRECTIONS, bitboards[BISHOP + offset] | queens),
+                                    (STRAIGHT_DIRECTIONS, bitboards[ROOK + offset] | queens)):
+            if not sliders:
+                continue
+            for direction in directions:
+                ray = RAYS[direction][sq]
+                # only the rays holding a slider need their nearest blocker
+                if ray & sliders:
+                    blockers = ray & occupied
+                    if POSITIVE_DIRECTIONS[direction]:
+                        nearest = blockers & -blockers
+                    else:
+                        nearest = 1 << (blockers.bit_length() - 1)
+                    if nearest & sliders:
+                        return True
+        return False
+
+    def is_square_attacked(self, pos: Tuple[int, int], by_white: bool) -> bool:
+        """
+        Checks if a square is attacked by any piece of the given color.
+        Args:
+            pos (Tuple[int, int]): The position (row, col) of the square.
+            by_white (bool): The color of the attacking pieces.
+        Returns:
+            bool: True if the square is attacked, False otherwise.
+        """
+        return self._is_attacked(pos[0] * 8 + pos[1], by_white)
+
+    def _king_square(self, is_white: bool) -> Optional[int]:
+        """
+        Returns the square index of the king of the given color.
+        Args:
+            is_white (bool): The king color.
+        Returns:
+            Optional[int]: The king square, or None if there is no king on the board.
+        """
+        kings = self._bitboards[KING + (WHITE_OFFSET if is_white else 0)]
+        return kings.bit_length() - 1 if kings else None
+
+    def is_check(self) -> bool:
+        """
+        Checks if the current player's king is in check.
+        Returns:
+            bool: True if the king is in check, False otherwise.
+        """
+        sq = self._king_square(self._is_white_turn)
+        return sq is not None and self._is_attacked(sq, not self._is_white_turn)
+
+    def _pseudo_moves(self, sq: int, code: int) -> int:
+        """
+        Returns the destination squares of a piece, ignoring whether its own king is left in check.
+        Args:
+            sq (int): The piece square index.
+            code (int): The piece code.
+        Returns:
+            int: The bitmask of destination squares.
+        """
+        is_white = code >= WHITE_OFFSET
+        kind = code % WHITE_OFFSET
+        own = self._occupancy[is_white]
+        if kind == PAWN:
+            targets = PAWN_ATTACKS[is_white][sq] & self._occupancy[not is_white]
+            front = sq - 8 if is_white else sq + 8
+            if not (self._occupied >> front) & 1:
+                targets |= 1 << front
+                if sq >> 3 == (6 if is_white else 1):
+                    two_front = sq - 16 if is_white else sq + 16
+                    if not (self._occupied >> two_front) & 1:
+                        targets |= 1 << two_front
+            return targets
+        if kind == KNIGHT:
+            return KNIGHT_ATTACKS[sq] & ~own
+        if kind == BISHOP:
+            return self._slider_attacks(sq, DIAGONAL_DIRECTIONS) & ~own
+        if kind == ROOK:
+            return self._slider_attacks(sq, STRAIGHT_DIRECTIONS) & ~own
+        if kind == QUEEN:
+            return (self._slider_attacks(sq, DIAGONAL_DIRECTIONS) |
+                    self._slider_attacks(sq, STRAIGHT_DIRECTIONS)) & ~own
+        return (KING_ATTACKS[sq] & ~own) | self._castle_moves(sq, is_white)
+
+    def _castle_moves(self, sq: int, is_white: bool) -> int:
+        """
+        Returns the castling destinations of the king, following the rules of ChessBoard.
+        Args:
+            sq (int): The king square index.
+            is_white (bool): The king color.
+        Returns:
+            int: The bitmask of castling destination squares.
+        """
+        king_side, queen_side = (WHITE_KING_SIDE, WHITE_QUEEN_SIDE) if is_white else \
+            (BLACK_KING_SIDE, BLACK_QUEEN_SIDE)
+        rights = self._castling_rights
+        if not rights & (king_side | queen_side) or self._is_attacked(sq, not is_white):
+            return 0
+        targets = 0
+        row_start = sq & ~7
+        # the king may not pass through an attacked square; its destination is checked like any king move
+        if rights & queen_side and not self._occupied & (0b1110 << row_start) and \
+                not self._is_attacked(sq - 1, not is_white):
+            targets |= 1 << (sq - 2)
+        if rights & king_side and not self._occupied & (0b1100000 << row_start) and \
+                not self._is_attacked(sq + 1, not is_white):
+            targets |= 1 << (sq + 2)
+        return targets
+
+    def _is_legal(self, src: int, dst: int, code: int) -> bool:
+        """
+        Checks whether a pseudo legal move leaves the mover's own king safe.
+        Args:
+            src (int): The source square index.
+            dst (int): The destination square index.
+            code (int): The code of the moving piece.
+        Returns:
+            bool: True if the move is legal, False otherwise.
+        """
+        is_white = code >= WHITE_OFFSET
+        captured = self._remove(dst)
+        self._remove(src)
+        self._put(dst, code)
+        rook_move = None
+        if code % WHITE_OFFSET == KING and abs(dst - src) == 2:
+            rook_move = (src - 4, src - 1) if dst < src else (src + 3, src + 1)
+            self._put(rook_move[1], self._remove(rook_move[0]))
+        king_sq = self._king_square(is_white)
+        is_legal = king_sq is None or not self._is_attacked(king_sq, not is_white)
+        if rook_move is not None:
+            self._put(rook_move[0], self._remove(rook_move[1]))
+        self._remove(dst)
+        self._put(src, code)
+        if captured is not None:
+            self._put(dst, captured)
+        return is_legal
+
+    def _pins(self, king_sq: int, is_white: bool) -> Dict[int, int]:
+        """
+        Finds the pieces pinned to their king: the own pieces standing alone between the king and an enemy
+        slider moving along that line.
+        Args:
+            king_sq (int): The king square index.
+            is_white (bool): The king color.
+        Returns:
+            Dict[int, int]: The square of every pinned piece with the bitmask of the squares it may still
+                move to: the line from the king to the pinning piece, which is included.
+        """
+        pins = {}
+        occupied = self._occupied
+        own = self._occupancy[is_white]
+        offset = 0 if is_white else WHITE_OFFSET
+        bitboards = self._bitboards
+        queens = bitboards[QUEEN + offset]
+        for directions, sliders in ((DIAGONAL_DIRECTIONS, bitboards[BISHOP + offset] | queens),
+                                    (STRAIGHT_DIRECTIONS, bitboards[ROOK + offset] | queens)):
+            if not sliders:
+                continue
+            for direction in directions:
+                ray = RAYS[direction][king_sq]
+                if not ray & sliders:
+                    continue
+                blockers = ray & occupied
+                positive = POSITIVE_DIRECTIONS[direction]
+                first = (blockers & -blockers).bit_length() - 1 if positive else blockers.bit_length() - 1
+                if not (own >> first) & 1:
+                    continue
+                blockers ^= 1 << first
+                if not blockers:
+                    continue
+                second = (blockers & -blockers).bit_length() - 1 if positive else blockers.bit_length() - 1
+                if (sliders >> second) & 1:
+                    pins[first] = ray ^ RAYS[direction][second]
+        return pins
+
+    def _legality(self) -> Tuple[Optional[int], bool, Dict[int, int]]:
+        """
+        Computes what the legality of the moves of the side to move depends on, once per position.
+        Returns:
+            Tuple[Optional[int], bool, Dict[int, int]]: The king square, or None without a king, whether the
+                king is in check and the pinned pieces, see _pins.
+        """
+        is_white = self._is_white_turn
+        king_sq = self._king_square(is_white)
+        if king_sq is None:
+            return None, False, {}
+        return king_sq, self._is_attacked(king_sq, not is_white), self._pins(king_sq, is_white)
+
+    def _legal_target_mask(self, sq: int, code: int, legality: Tuple[Optional[int], bool, Dict[int, int]],
+                           restrict: int = -1) -> int:
+        """
+        Returns the legal destination squares of a piece of the side to move. Out of check, a piece that is
+        not pinned and not the king cannot expose its king, there being no en passant, so only king moves
+        and pinned pieces need a test; in check every move is played out by _is_legal.
+        Args:
+            sq (int): The piece square index.
+            code (int): The piece code.
+            legality (Tuple[Optional[int], bool, Dict[int, int]]): The result of _legality for the position.
+            restrict (int): The bitmask of the destinations of interest, e.g. the enemy pieces, all by default.
+        Returns:
+            int: The bitmask of legal destination squares.
+        """
+        king_sq, in_check, pins = legality
+        targets = self._pseudo_moves(sq, code) & restrict
+        if king_sq is None:
+            return targets
+        if in_check:
+            legal = 0
+            while targets:
+                low = targets & -targets
+                targets ^= low
+                if self._is_legal(sq, low.bit_length() - 1, code):
+                    legal |= low
+            return legal
+        if sq == king_sq:
+            # the king must not stay on a line it attacks through its own square
+            is_white = code >= WHITE_OFFSET
+            self._occupied ^= 1 << sq
+            legal = 0
+            while targets:
+                low = targets & -targets
+                targets ^= low
+                if not self._is_attacked(low.bit_length() - 1, not is_white):
+                    legal |= low
+            self._occupied ^= 1 << sq
+            return legal
+        pin = pins.get(sq)
+        return targets if pin is None else targets & pin
+
+    def _legal_targets(self, sq: int, legality: Optional[Tuple[Optional[int], bool, Dict[int, int]]] = None) \
+            -> List[int]:
+        """
+        Returns the legal destination squares of the piece on a square.
+        Args:
+            sq (int): The piece square index.
+            legality (Optional[Tuple[Optional[int], bool, Dict[int, int]]]): The result of _legality for the
+                position, computed when not given.
+        Returns:
+            List[int]: The legal destination square indexes.
+        """
+        code = self._squares[sq]
+        if code is None:
+            return []
+        if (code >= WHITE_OFFSET) != self._is_white_turn:
+            # a piece of the side not to move: its king is not the one _legality looked at
+            targets = self._pseudo_moves(sq, code)
+            legal = []
+            while targets:
+                low = targets & -targets
+                dst = low.bit_length() - 1
+                targets ^= low
+                if self._is_legal(sq, dst, code):
+                    legal.append(dst)
+            return legal
+        targets = self._legal_target_mask(sq, code, legality if legality is not None else self._legality())
+        legal = []
+        while targets:
+            low = targets & -targets
+            legal.append(low.bit_length() - 1)
+            targets ^= low
+        return legal
+
+    def get_piece_moves(self, pos: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Returns all valid moves for the piece at the specified position.
+        Args:
+            pos (Tuple[int, int]): The position (row, col) of the piece on the chessboard.
+        Returns:
+            List[Tuple[int, int]]: A list of valid moves for the piece at the specified position.
+        """
+        return [SQUARE_POSITION[dst] for dst in self._legal_targets(pos[0] * 8 + pos[1])]
+
+    def get_piece_peace_moves(self, pos: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Returns valid non-attack (peaceful) moves for the piece at the specified position.
+        Args:
+            pos (Tuple[int, int]): The position (row, col) of the piece on the chessboard.
+        Returns:
+            List[Tuple[int, int]]: A list of valid peaceful moves for the piece.
+        """
+        return [SQUARE_POSITION[dst] for dst in self._legal_targets(pos[0] * 8 + pos[1])
+                if self._squares[dst] is None]
+
+    def get_piece_attack_moves(self, pos: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Returns valid attack moves for the piece at the specified position.
+        Args:
+            pos (Tuple[int, int]): The position (row, col) of the piece on the chessboard.
+        Returns:
+            List[Tuple[int, int]]: A list of valid attack moves for the piece.
+        """
+        return [SQUARE_POSITION[dst] for dst in self._legal_targets(pos[0] * 8 + pos[1])
+                if self._squares[dst] is not None]
+
+    def get_all_moves(self) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        """
+        Get all possible moves for the pieces of the current player.
+        Returns:
+            List[Tuple[Tuple[int, int], Tuple[int, int]]]: A list of tuples representing all possible moves.
+                Each tuple contains the source position and destination position of a valid move.
+        """
+        all_moves = []
+        legality = self._legality()
+        squares = self._squares
+        pieces = self._occupancy[self._is_white_turn]
+        while pieces:
+            low = pieces & -pieces
+            src = low.bit_length() - 1
+            pieces ^= low
+            src_pos = SQUARE_POSITION[src]
+            targets = self._legal_target_mask(src, squares[src], legality)
+            while targets:
+                target = targets & -targets
+                all_moves.append((src_pos, SQUARE_POSITION[target.bit_length() - 1]))
+                targets ^= target
+        return all_moves
+
+    def get_all_attack_moves(self) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        """
+        Get all possible capture moves for the pieces of the current player.
+        Returns:
+            List[Tuple[Tuple[int, int], Tuple[int, int]]]: A list of tuples representing all possible captures.
+                Each tuple contains the source position and destination position of a valid move.
+        """
+        all_moves = []
+        legality = self._legality()
+        squares = self._squares
+        enemy = self._occupancy[not self._is_white_turn]
+        pieces = self._occupancy[self._is_white_turn]
+        while pieces:
+            low = pieces & -pieces
+            src = low.bit_length() - 1
+            pieces ^= low
+            src_pos = SQUARE_POSITION[src]
+            targets = self._legal_target_mask(src, squares[src], legality, enemy)
+            while targets:
+                target = targets & -targets
+                all_moves.append((src_pos, SQUARE_POSITION[target.bit_length() - 1]))
+                targets ^= target
+        return all_moves
+
+    def move_piece(self, src_pos: Tuple[int, int], dst_pos: Tuple[int, int]):
+        """
+        Moves a piece from the source position to the destination position.
+        Args:
+            src_pos (Tuple[int, int]): The source position (row, col) of the piece to be moved.
+            dst_pos (Tuple[int, int]): The destination position (row, col) for the piece.
+        """
+        src = src_pos[0] * 8 + src_pos[1]
+        dst = dst_pos[0] * 8 + dst_pos[1]
+        squares = self._squares
+        code = squares[src]
+        captured = self._remove(dst)
+        self._history.append((src, dst, code, captured, self._castling_rights, self._hash, self._score))
+        if captured is not None:
+            self._hash ^= PIECE_SQUARE_KEYS[captured][dst]
+            self._score -= PIECE_SQUARE_SCORE[captured][dst]
+        if code is None:
+            return
+        # the source is occupied and the destination empty: one xor moves the piece in every mask
+        move_mask = 1 << src | 1 << dst
+        self._bitboards[code] ^= move_mask
+        self._occupancy[code >= WHITE_OFFSET] ^= move_mask
+        self._occupied ^= move_mask
+        squares[src] = None
+        squares[dst] = code
+        self._hash ^= PIECE_SQUARE_KEYS[code][src] ^ PIECE_SQUARE_KEYS[code][dst]
+        self._score += PIECE_SQUARE_SCORE[code][dst] - PIECE_SQUARE_SCORE[code][src]
+        rights = self._castling_rights & CASTLING_MASK[src] & CASTLING_MASK[dst]
+        if rights != self._castling_rights:
+            self._hash ^= CASTLING_KEYS[self._castling_rights] ^ CASTLING_KEYS[rights]
+            self._castling_rights = rights
+        # if is a castle move
+        if code % WHITE_OFFSET == KING and abs(dst - src) == 2:
+            rook_src, rook_dst = (src - 4, src - 1) if dst < src else (src + 3, src + 1)
+            rook = self._remove(rook_src)
+            self._put(rook_dst, rook)
+            self._hash ^= PIECE_SQUARE_KEYS[rook][rook_src] ^ PIECE_SQUARE_KEYS[rook][rook_dst]
+            self._score += PIECE_SQUARE_SCORE[rook][rook_dst] - PIECE_SQUARE_SCORE[rook][rook_src]
+
+    def undo_move(self, src_pos: Tuple[int, int], dst_pos: Tuple[int, int],
+                  src_pic: Optional[Piece], dst_pic: Optional[Piece]):
+        """
+        Undoes the last move, restoring the chessboard to its state before the move.
+        The board keeps its own move history; the arguments are accepted for compatibility with ChessBoard.
+        Args:
+            src_pos (Tuple[int, int]): The source position (row, col) of the piece that was moved.
+            dst_pos (Tuple[int, int]): The destination position (row, col) for the piece.
+            src_pic (Optional[Piece]): The piece that was at the source position before the move.
+            dst_pic (Optional[Piece]): The piece that was at the destination position before the move.
+        Raises:
+            RuntimeError: If no move was made on this board since it was built, e.g. by from_fen or clone.
+        """
+        if not self._history:
+            raise RuntimeError("no move to undo: BitBoard only undoes the moves made on it")
+        src, dst, code, captured, rights, key, score = self._history.pop()
+        self._castling_rights = rights
+        self._hash = key
+        self._score = score
+        if code is not None:
+            # the moved piece may have been promoted meanwhile
+            squares = self._squares
+            self._bitboards[squares[dst]] ^= 1 << dst
+            self._bitboards[code] ^= 1 << src
+            move_mask = 1 << src | 1 << dst
+            self._occupancy[code >= WHITE_OFFSET] ^= move_mask
+            self._occupied ^= move_mask
+            squares[dst] = None
+            squares[src] = code
+            if code % WHITE_OFFSET == KING and abs(dst - src) == 2:
+                rook_src, rook_dst = (src - 4, src - 1) if dst < src else (src + 3, src + 1)
+                self._put(rook_src, self._remove(rook_dst))
+        if captured is not None:
+            self._put(dst, captured)
+
+    def is_check_move(self, src_pos: Tuple[int, int], dst_pos: Tuple[int, int]) -> bool:
+        """
+        Checks if a move puts the current player's king in check.
+        Args:
+            src_pos (Tuple[int, int]): The source position (row, col) of the piece to be moved.
+            dst_pos (Tuple[int, int]): The destination position (row, col) for the piece.
+        Returns:
+            bool: True if the move puts the king in check, False otherwise.
+        """
+        src = src_pos[0] * 8 + src_pos[1]
+        code = self._squares[src]
+        return code is not None and not self._is_legal(src, dst_pos[0] * 8 + dst_pos[1], code)
+
+    def is_game_end(self) -> bool:
+        """
+        Checks if the game has ended (either through checkmate or stalemate).
+        Returns:
+            bool: True if the game has ended, False otherwise.
+        """
+        legality = self._legality()
+        squares = self._squares
+        pieces = self._occupancy[self._is_white_turn]
+        while pieces:
+            low = pieces & -pieces
+            pieces ^= low
+            src = low.bit_length() - 1
+            if self._legal_target_mask(src, squares[src], legality):
+                return False
+        return True
+
+    def game_end_status(self) -> int:
+        """
+        Returns the status of the game at the end: 0 for 'Black won', and 1 if 'White won', or 2 if 'Stalemate'.
+        Returns:
+            int: The status of the game at the end.
+        """
+        if self.is_check():
+            return 0 if self.is_white_turn() else 1
+        return 2
+
+    def promote_pawn(self, pos: Tuple[int, int]):
+        """
+        Promotes a pawn to a queen if it reaches the promotion location.
+        Args:
+            pos (Tuple[int, int]): The pawn position to be promoted.
+        """
+        sq = pos[0] * 8 + pos[1]
+        code = self._squares[sq]
+        if code is not None and code % WHITE_OFFSET == PAWN and pos[0] == (0 if code >= WHITE_OFFSET else 7):
+            self._remove(sq)
+            self._put(sq, code - PAWN + QUEEN)
+            self._hash ^= PIECE_SQUARE_KEYS[code][sq] ^ PIECE_SQUARE_KEYS[code - PAWN + QUEEN][sq]
+            self._score += PIECE_SQUARE_SCORE[code - PAWN + QUEEN][sq] - PIECE_SQUARE_SCORE[code][sq]
+
+
+# The board implementations by the name the command line tools select them with.
+BOARD_CLASSES = {'list': ChessBoard, 'bitboard': BitBoard}
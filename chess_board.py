@@ -1,5 +1,22 @@
-from typing import Optional, List, Tuple, Union
+import struct
+from typing import Optional, List, Tuple, Union, Dict, Set
 from chess_piece import Piece, Rook, King, Knight, Bishop, Queen, Pawn
+from chess_move.attack_tables import is_square_attacked, KNIGHT_TARGETS, WHITE_PAWN_ATTACKERS, BLACK_PAWN_ATTACKERS, \
+    SLIDER_RAYS
+from zobrist import PIECE_INDEX, PIECE_SQUARE_KEYS, CASTLING_KEYS, SIDE_KEY
+from evaluation_tables import PIECE_SQUARE_SCORE
+
+# The piece classes by their FEN letter.
+FEN_PIECES = {'r': Rook, 'n': Knight, 'b': Bishop, 'q': Queen, 'k': King, 'p': Pawn}
+
+# Snapshot layout: 64 squares (0 empty, else piece index + 1), flags (bit 0 white to move, bits 1-4 castling
+# rights), the Zobrist key and the score.
+SNAPSHOT_FORMAT = struct.Struct('<64sBQi')
+SNAPSHOT_PIECES: List[Optional[Tuple[type, bool]]] = [None] + [
+    (FEN_PIECES[name], is_white) for (name, is_white), _ in sorted(PIECE_INDEX.items(), key=lambda item: item[1])]
+
+# The king position, the squares that resolve a check (None if not in check) and the ray of every pinned piece.
+MoveConstraints = Tuple[Optional[Tuple[int, int]], Optional[Set[Tuple[int, int]]], Dict[Tuple[int, int], Set[Tuple[int, int]]]]
 
 
 class ChessBoard:
@@ -21,6 +38,122 @@ class ChessBoard:
         for row, is_white in [(1, False), (6, True)]:
             for col in self._rows:
                 self._board[row][col] = Pawn(is_white=is_white, pos=(row, col))
+        self._hash = self._compute_hash()
+        self._score = self._compute_score()
+
+    @classmethod
+    def from_fen(cls, fen: str) -> 'ChessBoard':
+        """
+        Builds a board from a FEN string. The en passant square and the move counters are ignored,
+        as the engine does not play en passant.
+        Args:
+            fen (str): The position in Forsyth-Edwards Notation.
+        Returns:
+            ChessBoard: The board holding the position.
+        """
+        fields = fen.split()
+        rows = fields[0].split('/')
+        if len(rows) != 8:
+            raise ValueError(f"Invalid FEN position: {fen}")
+        board = cls()
+        board._board = [[None] * 8 for _ in board._rows]
+        board._is_white_turn = len(fields) < 2 or fields[1] == 'w'
+        for row, text in enumerate(rows):
+            col = 0
+            for char in text:
+                if char.isdigit():
+                    col += int(char)
+                    continue
+                if char.lower() not in FEN_PIECES or col > 7:
+                    raise ValueError(f"Invalid FEN position: {fen}")
+                piece = FEN_PIECES[char.lower()](is_white=char.isupper(), pos=(row, col))
+                board._board[row][col] = piece
+                if char == 'K':
+                    board._white_king_location = (row, col)
+                elif char == 'k':
+                    board._black_king_location = (row, col)
+                col += 1
+            if col != 8:
+                raise ValueError(f"Invalid FEN position: {fen}")
+
+        castling = fields[2] if len(fields) > 2 else '-'
+        board._set_castling_rights(sum(bit for bit, right in zip((1, 2, 4, 8), 'KQkq') if right in castling))
+        board._hash = board._compute_hash()
+        board._score = board._compute_score()
+        return board
+
+    def snapshot(self) -> bytes:
+        """
+        Returns a compact, immutable copy of the position: the pieces, the side to move, the castling rights,
+        the Zobrist key and the score, in SNAPSHOT_FORMAT. The move history is not included.
+        Returns:
+            bytes: The snapshot, cheap to store or to send to another process.
+        """
+        squares = bytearray(64)
+        for row in self._rows:
+            for col in self._rows:
+                piece = self._board[row][col]
+                if piece is not None:
+                    squares[row * 8 + col] = PIECE_INDEX[(piece.get_name(), piece.is_white())] + 1
+        flags = (1 if self._is_white_turn else 0) | self._castling_rights() << 1
+        return SNAPSHOT_FORMAT.pack(bytes(squares), flags, self._hash, self._score)
+
+    @classmethod
+    def from_snapshot(cls, data: bytes) -> 'ChessBoard':
+        """
+        Builds a board from a snapshot taken by snapshot, of this or of another board implementation.
+        Args:
+            data (bytes): The snapshot.
+        Returns:
+            ChessBoard: The board holding the position.
+        """
+        squares, flags, key, score = SNAPSHOT_FORMAT.unpack(data)
+        board = cls.__new__(cls)
+        board._rows = tuple(range(8))
+        board._board = [[None] * 8 for _ in board._rows]
+        board._is_white_turn = bool(flags & 1)
+        board._white_king_location = (7, 4)
+        board._black_king_location = (0, 4)
+        for sq, code in enumerate(squares):
+            if code:
+                piece_class, is_white = SNAPSHOT_PIECES[code]
+                pos = (sq >> 3, sq & 7)
+                board._board[pos[0]][pos[1]] = piece_class(is_white=is_white, pos=pos)
+                if piece_class is King:
+                    if is_white:
+                        board._white_king_location = pos
+                    else:
+                        board._black_king_location = pos
+        board._set_castling_rights(flags >> 1)
+        board._hash = key
+        board._score = score
+        return board
+
+    def clone(self) -> 'ChessBoard':
+        """
+        Returns:
+            ChessBoard: An independent board holding the same position, without the move history.
+        """
+        return self.from_snapshot(self.snapshot())
+
+    def _set_castling_rights(self, rights: int):
+        """
+        Sets the King and Rook move counters of a new board so that they give the castling rights: every
+        king and rook without a right counts as moved.
+        Args:
+            rights (int): Bit mask of 1 white king side, 2 white queen side, 4 black king side and 8 black
+                queen side.
+        """
+        unmoved = set()
+        for row, shift in [(7, 0), (0, 2)]:
+            for col, bit in [(7, 1), (0, 2)]:
+                if rights & (bit << shift):
+                    unmoved.update([(row, 4), (row, col)])
+        for row in self._rows:
+            for col in self._rows:
+                piece = self._board[row][col]
+                if isinstance(piece, (King, Rook)) and (row, col) not in unmoved:
+                    piece.increase_moves_counter()
 
     def is_white_turn(self) -> bool:
         """
@@ -34,6 +167,82 @@ class ChessBoard:
         Switches the turn from the current player to the opposite player.
         """
         self._is_white_turn = not self._is_white_turn
+        self._hash ^= SIDE_KEY
+
+    def get_hash(self) -> int:
+        """
+        Returns the Zobrist key of the current position, covering the pieces, castling rights and side to move.
+        Returns:
+            int: The 64-bit position key.
+        """
+        return self._hash
+
+    def _compute_hash(self) -> int:
+        """
+        Computes the Zobrist key of the current position from scratch.
+        Returns:
+            int: The 64-bit position key.
+        """
+        key = CASTLING_KEYS[self._castling_rights()]
+        if not self._is_white_turn:
+            key ^= SIDE_KEY
+        for row in self._rows:
+            for col in self._rows:
+                piece = self._board[row][col]
+                if piece is not None:
+                    key ^= PIECE_SQUARE_KEYS[PIECE_INDEX[(piece.get_name(), piece.is_white())]][row * 8 + col]
+        return key
+
+    def get_score(self) -> int:
+        """
+        Returns the material and piece-square score of the position, kept up to date move by move.
+        Returns:
+            int: The score from white's point of view: positive when white is ahead.
+        """
+        return self._score
+
+    def _compute_score(self) -> int:
+        """
+        Computes the material and piece-square score of the position from scratch.
+        Returns:
+            int: The score from white's point of view.
+        """
+        score = 0
+        for row in self._rows:
+            for col in self._rows:
+                piece = self._board[row][col]
+                if piece is not None:
+                    score += PIECE_SQUARE_SCORE[PIECE_INDEX[(piece.get_name(), piece.is_white())]][row * 8 + col]
+        return score
+
+    def _update_piece_state(self, piece: Piece, pos: Tuple[int, int], sign: int):
+        """
+        Adds or removes the contribution of a piece on a square to the position key and score.
+        Args:
+            piece (Piece): The piece.
+            pos (Tuple[int, int]): The position (row, col) of the piece.
+            sign (int): 1 when the piece arrives on the square, -1 when it leaves it.
+        """
+        index = PIECE_INDEX[(piece.get_name(), piece.is_white())]
+        sq = pos[0] * 8 + pos[1]
+        self._hash ^= PIECE_SQUARE_KEYS[index][sq]
+        self._score += sign * PIECE_SQUARE_SCORE[index][sq]
+
+    def _castling_rights(self) -> int:
+        """
+        Returns the castling rights derived from the King and Rook move counters.
+        Returns:
+            int: Bit mask of 1 white king side, 2 white queen side, 4 black king side and 8 black queen side.
+        """
+        rights = 0
+        for row, shift in [(7, 0), (0, 2)]:
+            king = self._board[row][4]
+            if king is not None and king.get_name() == 'k' and not king.has_moved():
+                for col, bit in [(7, 1), (0, 2)]:
+                    rook = self._board[row][col]
+                    if rook is not None and rook.get_name() == 'r' and not rook.has_moved():
+                        rights |= bit << shift
+        return rights
 
     def get_board(self) -> List[List[Optional[Piece]]]:
         """
@@ -105,7 +314,7 @@ class ChessBoard:
         pos = self._get_king_location()
         piece: Optional[King] = self._board[pos[0]][pos[1]]
         if piece:
-            return piece.is_check(self._board)
+            return is_square_attacked(self._board, pos, not piece.is_white())
         return False
 
     def is_check_move(self, src_pos: Tuple[int, int], dst_pos: Tuple[int, int]):
@@ -124,6 +333,98 @@ class ChessBoard:
         self.undo_move(src_pos, dst_pos, src_pic, dst_pic)
         return is_check
 
+    def is_square_attacked(self, pos: Tuple[int, int], by_white: bool,
+                           ignore: Optional[Tuple[int, int]] = None) -> bool:
+        """
+        Checks if a square is attacked by any piece of the given color, stopping at the first attacker found.
+        Args:
+            pos (Tuple[int, int]): The position (row, col) of the square.
+            by_white (bool): The color of the attacking pieces.
+            ignore (Optional[Tuple[int, int]]): A square treated as empty, e.g. the square a king leaves.
+        Returns:
+            bool: True if the square is attacked, False otherwise.
+        """
+        return is_square_attacked(self._board, pos, by_white, ignore)
+
+    def _get_move_constraints(self, is_white: bool) -> MoveConstraints:
+        """
+        Computes once per position what legal moves of a side must respect: the checks against its
+        king and the pieces pinned to it.
+        Args:
+            is_white (bool): The color of the side.
+        Returns:
+            MoveConstraints: The king position (None if the side has no king), the set of squares a non king
+                move must land on to resolve a check (None if not in check, empty if in double check), and
+                for every pinned piece the set of squares it may move to along its pin.
+        """
+        board = self._board
+        king_pos = self._white_king_location if is_white else self._black_king_location
+        king = board[king_pos[0]][king_pos[1]]
+        if king is None or king.get_name() != 'k' or king.is_white() != is_white:
+            return None, None, {}
+        row, col = king_pos
+        checks: List[Set[Tuple[int, int]]] = []
+        pins: Dict[Tuple[int, int], Set[Tuple[int, int]]] = {}
+
+        for r, c in KNIGHT_TARGETS[row][col]:
+            piece = board[r][c]
+            if piece is not None and piece.is_white() != is_white and piece.get_name() == 'n':
+                checks.append({(r, c)})
+        for r, c in (BLACK_PAWN_ATTACKERS if is_white else WHITE_PAWN_ATTACKERS)[row][col]:
+            piece = board[r][c]
+            if piece is not None and piece.is_white() != is_white and piece.get_name() == 'p':
+                checks.append({(r, c)})
+
+        for rays, names in SLIDER_RAYS:
+            ray = set()
+            own_piece = None
+            for r, c in rays[row][col]:
+                ray.add((r, c))
+                piece = board[r][c]
+                if piece is not None:
+                    if piece.is_white() == is_white:
+                        if own_piece is not None:
+                            break
+                        own_piece = (r, c)
+                    else:
+                        if piece.get_name() in names:
+                            if own_piece is None:
+                                checks.append(ray)
+                            else:
+                                pins[own_piece] = ray
+                        break
+
+        if not checks:
+            return king_pos, None, pins
+        return king_pos, checks[0] if len(checks) == 1 else set(), pins
+
+    def _filter_legal(self, pos: Tuple[int, int], piece: Piece, moves: List[Tuple[int, int]],
+                      constraints: MoveConstraints) -> List[Tuple[int, int]]:
+        """
+        Keeps the moves of a piece that do not leave its own king in check.
+        Args:
+            pos (Tuple[int, int]): The position (row, col) of the piece.
+            piece (Piece): The piece.
+            moves (List[Tuple[int, int]]): The pseudo legal destinations of the piece.
+            constraints (MoveConstraints): The constraints of the piece's side, from _get_move_constraints.
+        Returns:
+            List[Tuple[int, int]]: The legal destinations.
+        """
+        king_pos, evasions, pins = constraints
+        if king_pos is None or not moves:
+            return moves
+        if pos == king_pos:
+            legal = []
+            for dst in moves:
+                # the squares a castling king starts from and passes through are checked by King.castle_move
+                if not is_square_attacked(self._board, dst, not piece.is_white(), ignore=pos):
+                    legal.append(dst)
+            return legal
+        pin = pins.get(pos)
+        if evasions is None:
+            return moves if pin is None else [dst for dst in moves if dst in pin]
+        return [dst for dst in moves if dst in evasions and (pin is None or dst in pin)]
+
     def get_piece_moves(self, pos: Tuple[int, int]) -> List[Tuple[int, int]]:
         """
         Returns all valid moves for the piece at the specified position.
@@ -144,7 +445,8 @@ class ChessBoard:
         """
         piece: Optional[Piece] = self._board[pos[0]][pos[1]]
         if piece is not None:
-            return [index for index in piece.get_peace_moves(self._board) if not self.is_check_move(pos, index)]
+            return self._filter_legal(pos, piece, piece.get_peace_moves(self._board),
+                                      self._get_move_constraints(piece.is_white()))
         return []
 
     def get_piece_attack_moves(self, pos: Tuple[int, int]) -> List[Tuple[int, int]]:
@@ -157,7 +459,8 @@ class ChessBoard:
         """
         piece: Optional[Piece] = self._board[pos[0]][pos[1]]
         if piece is not None:
-            return [index for index in piece.get_attack_moves(self._board) if not self.is_check_move(pos, index)]
+            return self._filter_legal(pos, piece, piece.get_attack_moves(self._board),
+                                      self._get_move_constraints(piece.is_white()))
         return []
 
     def get_all_moves(self) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
@@ -168,12 +471,34 @@ class ChessBoard:
                 Each tuple contains the source position and destination position of a valid move.
         """
         all_moves = []
+        constraints = self._get_move_constraints(self._is_white_turn)
         for row in self._rows:
             for col in self._rows:
-                src_pos = (row, col)
-                piece = self.get_piece(src_pos)
-                if piece and piece.is_white() == self.is_white_turn():
-                    all_moves.extend([(src_pos, dst_pos) for dst_pos in self.get_piece_moves(src_pos)])
+                piece = self._board[row][col]
+                if piece and piece.is_white() == self._is_white_turn:
+                    src_pos = (row, col)
+                    all_moves.extend([(src_pos, dst_pos) for dst_pos in
+                                      self._filter_legal(src_pos, piece, piece.get_peace_moves(self._board), constraints)])
+                    all_moves.extend([(src_pos, dst_pos) for dst_pos in
+                                      self._filter_legal(src_pos, piece, piece.get_attack_moves(self._board), constraints)])
+        return all_moves
+
+    def get_all_attack_moves(self) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        """
+        Get all possible capture moves for the pieces of the current player.
+        Returns:
+            List[Tuple[Tuple[int, int], Tuple[int, int]]]: A list of tuples representing all possible captures.
+                Each tuple contains the source position and destination position of a valid move.
+        """
+        all_moves = []
+        constraints = self._get_move_constraints(self._is_white_turn)
+        for row in self._rows:
+            for col in self._rows:
+                piece = self._board[row][col]
+                if piece and piece.is_white() == self._is_white_turn:
+                    src_pos = (row, col)
+                    all_moves.extend([(src_pos, dst_pos) for dst_pos in
+                                      self._filter_legal(src_pos, piece, piece.get_attack_moves(self._board), constraints)])
         return all_moves
 
     def move_piece(self, src_pos: Tuple[int, int], dst_pos: Tuple[int, int]):
@@ -184,9 +509,17 @@ class ChessBoard:
             dst_pos (Tuple[int, int]): The destination position (row, col) for the piece.
         """
         src_pic: Optional[Piece] = self._board[src_pos[0]][src_pos[1]]
+        dst_pic: Optional[Piece] = self._board[dst_pos[0]][dst_pos[1]]
+        update_rights = self._affects_castling(src_pic, dst_pic)
+        if update_rights:
+            self._hash ^= CASTLING_KEYS[self._castling_rights()]
+        if dst_pic:
+            self._update_piece_state(dst_pic, dst_pos, -1)
         self._board[dst_pos[0]][dst_pos[1]] = src_pic
         self._board[src_pos[0]][src_pos[1]] = None
         if src_pic:
+            self._update_piece_state(src_pic, src_pos, -1)
+            self._update_piece_state(src_pic, dst_pos, 1)
             src_pic.set_position(dst_pos)
             if src_pic.get_name() == 'k' and isinstance(src_pic, King):
                 self._set_king_location(dst_pos)
@@ -198,6 +531,21 @@ class ChessBoard:
                     self.move_piece((src_pos[0], 7), (src_pos[0], src_pos[1] + 1))
             elif src_pic.get_name() == 'r' and isinstance(src_pic, Rook):
                 src_pic.increase_moves_counter()
+        if update_rights:
+            self._hash ^= CASTLING_KEYS[self._castling_rights()]
+
+    @staticmethod
+    def _affects_castling(src_pic: Optional[Piece], dst_pic: Optional[Piece]) -> bool:
+        """
+        Checks if a move between the given pieces may change the castling rights.
+        Args:
+            src_pic (Optional[Piece]): The moving piece.
+            dst_pic (Optional[Piece]): The piece at the destination square.
+        Returns:
+            bool: True if the move involves a king or a rook, False otherwise.
+        """
+        return (src_pic is not None and src_pic.get_name() in ('k', 'r')) or \
+            (dst_pic is not None and dst_pic.get_name() == 'r')
 
     def undo_move(self, src_pos: Tuple[int, int], dst_pos: Tuple[int, int],
                   src_pic: Optional[Piece], dst_pic: Optional[Piece]):
@@ -209,6 +557,17 @@ class ChessBoard:
             src_pic (Optional[Piece]): The piece that was at the source position before the move.
             dst_pic (Optional[Piece]): The piece that was at the destination position before the move.
         """
+        update_rights = self._affects_castling(src_pic, dst_pic)
+        if update_rights:
+            self._hash ^= CASTLING_KEYS[self._castling_rights()]
+        # the piece on the destination square may differ from src_pic after a promotion
+        current_pic: Optional[Piece] = self._board[dst_pos[0]][dst_pos[1]]
+        if current_pic:
+            self._update_piece_state(current_pic, dst_pos, -1)
+        if src_pic:
+            self._update_piece_state(src_pic, src_pos, 1)
+        if dst_pic:
+            self._update_piece_state(dst_pic, dst_pos, 1)
         if src_pic:
             src_pic.set_position(src_pos)
             if src_pic.get_name() == 'k' and isinstance(src_pic, King):
@@ -225,6 +584,8 @@ class ChessBoard:
                 src_pic.decrease_moves_counter()
         self._board[src_pos[0]][src_pos[1]] = src_pic
         self._board[dst_pos[0]][dst_pos[1]] = dst_pic
+        if update_rights:
+            self._hash ^= CASTLING_KEYS[self._castling_rights()]
 
     def is_game_end(self) -> bool:
         """
@@ -232,11 +593,14 @@ class ChessBoard:
         Returns:
             bool: True if the game has ended, False otherwise.
         """
+        constraints = self._get_move_constraints(self._is_white_turn)
         for row in self._rows:
             for col in self._rows:
-                pos = (row, col)
-                if self.is_white_piece(pos) == self.is_white_turn():
-                    if self.get_piece_moves(pos):
+                piece = self._board[row][col]
+                if piece and piece.is_white() == self._is_white_turn:
+                    pos = (row, col)
+                    if self._filter_legal(pos, piece, piece.get_peace_moves(self._board), constraints) or \
+                            self._filter_legal(pos, piece, piece.get_attack_moves(self._board), constraints):
                         return False
         return True
 
@@ -258,4 +622,7 @@ class ChessBoard:
         """
         piece: Optional[Union[Piece, Pawn]] = self._board[pos[0]][pos[1]]
         if piece is not None and piece.get_name() == 'p' and piece.is_promote_location():
-            self._board[piece.get_position()[0]][piece.get_position()[1]] = Queen(is_white=piece.is_white(), pos=piece.get_position())
+            queen = Queen(is_white=piece.is_white(), pos=piece.get_position())
+            self._board[piece.get_position()[0]][piece.get_position()[1]] = queen
+            self._update_piece_state(piece, pos, -1)
+            self._update_piece_state(queen, pos, 1)
@@ -1,23 +1,58 @@
+import sys
 import threading
+from typing import Optional
 from chess_board import ChessBoard
-from chess_ai import ChessAI
+from chess_ai.ai_engine import ROOT_SPLIT
+from chess_ai.ai_process import AIProcess
+from chess_ai.minimax_algorithm import MATE_BOUND, CHECKMATE
+from move_cache import MoveCache
+
+# Extra depth the AI ponders to when it has a time limit; a ponder hit then stops it when the time runs out.
+PONDER_EXTRA_DEPTH = 1
 
 
 class ChessEngine:
-    def __init__(self, is_human_white: bool):
+    def __init__(self, is_human_white: bool, board_class: type = ChessBoard, time_limit: Optional[float] = None,
+                 seed: Optional[int] = None, workers: int = 1, strategy: str = ROOT_SPLIT, ponder: bool = False,
+                 book_path: Optional[str] = None, tablebase_path: Optional[str] = None):
         """
         Initializes a ChessEngine instance.
+        Args:
+            is_human_white (bool): True if the human plays the white pieces.
+            board_class (type): The board implementation, ChessBoard or BitBoard.
+            time_limit (Optional[float]): The AI thinking time per move in seconds, None for a fixed depth search.
+            seed (Optional[int]): Seed of the AI tie-break between equally good moves, None for a deterministic AI.
+            workers (int): The number of processes the AI searches with.
+            strategy (str): How the processes share the search, 'root-split' or 'lazy-smp'.
+            ponder (bool): Whether the AI searches the expected human reply during the human's turn.
+            book_path (Optional[str]): The opening book file of the AI, None to always search.
+            tablebase_path (Optional[str]): The endgame tablebase file of the AI, None for none.
         """
         self.selected_square = ()
         self.board_change = True
         self.available_moves: list[tuple[int, int]] = []
         self.moving_update = False
         self._game_status = []
-        self._chess_board = ChessBoard()
-        self._stop_ai_event = threading.Event()
+        self._chess_board = board_class()
+        # the legal moves and check status of the positions of the game, generated once per ply
+        self._move_cache = MoveCache()
+        self._move_cache.get(self._chess_board)
         self._is_human_white = is_human_white
         self._ai_run = False
-        self._ai_engine = ChessAI(stop_event=self._stop_ai_event)
+        # the AI searches in its own process, so that the GUI keeps drawing while it thinks
+        self._ai_engine = AIProcess(board_class=board_class, time_limit=time_limit, seed=seed, workers=workers,
+                                    strategy=strategy, book_path=book_path, tablebase_path=tablebase_path)
+        self._ai_engine.on_iteration = self._on_iteration
+        self._stop_ai_event = self._ai_engine.stop_event
+        self._search_info: Optional[str] = None
+        self._time_limit = time_limit
+        self._ponder_enabled = ponder
+        self._ponder_lock = threading.Lock()
+        self._ponder_thread: Optional[threading.Thread] = None
+        self._ponder_timer: Optional[threading.Timer] = None
+        self._ponder_move: Optional[tuple[tuple[int, int], tuple[int, int]]] = None
+        self._ponder_hit = False
+        self._ponder_done = False
 
     def get_piece_name(self, pos: tuple[int, int]):
         """
@@ -37,7 +72,7 @@ class ChessEngine:
         Returns:
             list[tuple[int, int]]: List of valid moves for the piece at the specified position.
         """
-        return self._chess_board.get_piece_moves(pos)
+        return self._move_cache.get_piece_moves(self._chess_board, pos)
 
     def is_check(self):
         """
@@ -45,7 +80,15 @@ class ChessEngine:
         Returns:
             bool: True if the king is in check, False otherwise.
         """
-        return self._chess_board.is_check()
+        return self._move_cache.is_check(self._chess_board)
+
+    def get_hash(self) -> int:
+        """
+        Gets the Zobrist key of the current position.
+        Returns:
+            int: The 64-bit position key, usable to key caches on the position.
+        """
+        return self._chess_board.get_hash()
 
     def get_turn(self) -> str:
         """
@@ -115,24 +158,173 @@ class ChessEngine:
 
     def move_ai(self) -> None:
         """
-        Executes the AI engine to make a move if it's the AI's turn.
+        Executes the AI engine to make a move if it's the AI's turn. If the search fails, the error is
+        reported and the first legal move is played, so that the game goes on.
         """
         if self.is_ai_turn():
             self._ai_run = True
+            try:
+                if self.is_stop_set():
+                    self.unset_stop_ai()
+                legal_moves = self._move_cache.get_all_moves(self._chess_board)
+                try:
+                    self._ai_engine.find_best_move(self._chess_board, legal_moves)
+                    move = self._ai_engine.best_move
+                except RuntimeError as error:
+                    print(f"AI search failed: {error}", file=sys.stderr)
+                    move = legal_moves[0] if legal_moves else None
 
-            if self.is_stop_set():
-                self.unset_stop_ai()
-            self._ai_engine.find_best_move(self._chess_board)
+                if not self.is_stop_set() and move is not None:
+                    self.move_piece(move[0], move[1])
+                    self.moving_update = True
+                    self.board_change = True
+                    self._start_pondering()
+                else:
+                    self.unset_stop_ai()
+            finally:
+                self._ai_run = False
 
-            move = self._ai_engine.best_move
-            if not self.is_stop_set() and move is not None:
-                self.move_piece(move[0], move[1])
-                self.moving_update = True
-                self.board_change = True
-            else:
-                self.unset_stop_ai()
+    def _on_iteration(self, depth: int, score: int, nodes: int, principal_variation: list):
+        """
+        Records a completed iteration of the AI search, streamed back by the AI process. The iterations of a
+        pondering search are only recorded once the human played the expected move.
+        Args:
+            depth (int): The depth of the iteration.
+            score (int): Its score from the AI's point of view.
+            nodes (int): The nodes visited since the search started.
+            principal_variation (list): Its principal variation.
+        """
+        if not self.is_ai_turn():
+            return
+        if score > MATE_BOUND:
+            score_text = f"mate in {(CHECKMATE - score + 1) // 2}"
+        elif score < -MATE_BOUND:
+            score_text = f"mated in {(CHECKMATE + score) // 2}"
+        else:
+            score_text = f"score {score / 100:+.2f}"
+        self._search_info = f"depth {depth}, {score_text}, {nodes} nodes"
+
+    def get_search_info(self) -> Optional[str]:
+        """
+        Gets the progress of the AI: its last completed iteration.
+        Returns:
+            Optional[str]: The depth, score and node count of the iteration, None before the first one.
+        """
+        return self._search_info
+
+    def _start_pondering(self):
+        """
+        Starts searching, in the background, the position after the human reply the AI expects: the second
+        move of its principal variation. The search runs while the human thinks and fills the AI caches.
+        """
+        principal_variation = self._ai_engine.principal_variation
+        if not self._ponder_enabled or len(principal_variation) < 2 or \
+                principal_variation[1] not in self._move_cache.get_all_moves(self._chess_board):
+            return
+        src_pos, dst_pos = principal_variation[1]
+        board = self._chess_board.clone()
+        board.move_piece(src_pos, dst_pos)
+        board.promote_pawn(dst_pos)
+        board.change_turn()
+        with self._ponder_lock:
+            self._ponder_move = principal_variation[1]
+            self._ponder_hit = False
+            self._ponder_done = False
+            self._ponder_thread = threading.Thread(target=self._ponder, args=(board,), daemon=True)
+            self._ponder_thread.start()
+
+    def _ponder(self, board):
+        """
+        The pondering thread: searches the expected position, then plays the result if the human has
+        played the expected move meanwhile.
+        Args:
+            board (ChessBoard): The position after the expected human move.
+        """
+        max_depth = self._ai_engine.max_depth + (PONDER_EXTRA_DEPTH if self._time_limit is not None else 0)
+        try:
+            self._ai_engine.ponder(board, max_depth)
+        except RuntimeError as error:
+            # a ponder hit then finds no move and lets the AI search the position again
+            print(f"AI pondering failed: {error}", file=sys.stderr)
+        finally:
+            with self._ponder_lock:
+                self._ponder_done = True
+                hit = self._ponder_hit
+            if hit:
+                self._finish_ponder_hit()
+
+    def _on_human_move(self, move: tuple[tuple[int, int], tuple[int, int]]):
+        """
+        Checks a human move against the pondered one. On a ponder hit the running search becomes the AI
+        search: it is given the AI time limit from now on, or played at once if it already finished. On a
+        miss the pondering is cancelled through the stop event and the AI searches the actual position.
+        Args:
+            move (tuple[tuple[int, int], tuple[int, int]]): The move the human played.
+        """
+        if self._ponder_thread is None:
+            return
+        with self._ponder_lock:
+            hit = move == self._ponder_move
+            done = self._ponder_done
+            if hit:
+                self._ponder_hit = True
+                self._ai_run = True
+                if not done and self._time_limit is not None:
+                    self._ponder_timer = threading.Timer(self._time_limit, self.set_stop_ai)
+                    self._ponder_timer.daemon = True
+                    self._ponder_timer.start()
+        if not hit:
+            self._stop_pondering()
+        elif done:
+            self._finish_ponder_hit()
+
+    def _finish_ponder_hit(self):
+        """
+        Plays the move found by the pondering search after a ponder hit, and ponders on the next reply.
+        """
+        if self._ponder_timer is not None:
+            self._ponder_timer.cancel()
+            self._ponder_timer = None
+        # the stop event may have been set by the time limit: the deepest completed iteration still counts
+        self.unset_stop_ai()
+        with self._ponder_lock:
+            hit = self._ponder_hit
+            self._ponder_hit = False
+        self._ponder_thread = None
+        move = self._ai_engine.best_move
+        if hit and move is not None and self.is_ai_turn():
+            self.move_piece(move[0], move[1])
+            self.moving_update = True
+            self.board_change = True
+            self._start_pondering()
+        self._ai_run = False
+
+    def _stop_pondering(self):
+        """
+        Cancels the pondering search through the stop event and waits for it to end.
+        """
+        thread = self._ponder_thread
+        while thread is not None:
+            with self._ponder_lock:
+                self._ponder_hit = False
+            self.set_stop_ai()
+            thread.join()
+            if self._ponder_timer is not None:
+                self._ponder_timer.cancel()
+                self._ponder_timer = None
+            self.unset_stop_ai()
+            # a ponder hit finishing meanwhile may have started pondering on the next reply
+            if self._ponder_thread is thread:
+                self._ponder_thread = None
+            thread = self._ponder_thread
+        self._ai_run = False
 
-            self._ai_run = False
+    def close(self):
+        """
+        Stops the AI search and pondering, if any, and the AI process.
+        """
+        self._stop_pondering()
+        self._ai_engine.close()
 
     def move_piece(self, src_pos: tuple[int, int], dst_pos: tuple[int, int]) -> None:
         """
@@ -145,27 +337,34 @@ class ChessEngine:
         self._chess_board.move_piece(src_pos, dst_pos)
         self._chess_board.promote_pawn(dst_pos)
         self._chess_board.change_turn()
+        self._move_cache.get(self._chess_board)
 
     def undo_move(self):
         """
         Undoes the last move and restores the previous game state.
         """
         if len(self._game_status) > 0:
+            self._stop_pondering()
             if self.is_ai_turn():
                 self.set_stop_ai()
-            self._chess_board.change_turn()
-            [src_pos, dst_pos, src_pic, dst_pic] = self._game_status.pop()
-            self._chess_board.undo_move(src_pos, dst_pos, src_pic, dst_pic)
-
+            self._take_back()
             if len(self._game_status) > 0 and self._is_human_white != self._chess_board.is_white_turn():
-                self._chess_board.change_turn()
-                [src_pos, dst_pos, src_pic, dst_pic] = self._game_status.pop()
-                self._chess_board.undo_move(src_pos, dst_pos, src_pic, dst_pic)
+                self._take_back()
+            self._move_cache.get(self._chess_board)
 
             self.board_change = True
             self.selected_square = ()
             self.available_moves = []
 
+    def _take_back(self):
+        """
+        Takes the last move back, dropping the cached moves of the position it led to.
+        """
+        self._move_cache.invalidate(self._chess_board.get_hash())
+        self._chess_board.change_turn()
+        [src_pos, dst_pos, src_pic, dst_pic] = self._game_status.pop()
+        self._chess_board.undo_move(src_pos, dst_pos, src_pic, dst_pic)
+
     def get_piece_color(self, pos: tuple[int, int]) -> str:
         """
         Gets the color of the piece at the specified position.
@@ -182,7 +381,7 @@ class ChessEngine:
         Returns:
             bool: True if the game has ended, False otherwise.
         """
-        return self._chess_board.is_game_end()
+        return self._move_cache.is_game_end(self._chess_board)
 
     def game_end_status(self) -> str:
         """
@@ -208,6 +407,7 @@ class ChessEngine:
             if pos in self.available_moves:
                 self.move_piece(self.selected_square, pos)
                 self.moving_update = True
+                self._on_human_move((self.selected_square, pos))
             self.available_moves = []
             self.selected_square = ()
             self.board_change = True
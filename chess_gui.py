@@ -1,14 +1,18 @@
 import pygame as pg
 from chess_engine import ChessEngine
-from typing import List, Tuple
+from typing import Dict, Optional, Tuple
+import multiprocessing
 import os
+import random
 import threading
 from const import *
 
-pg.font.init()
-WIN = pg.display.set_mode((WIN_WIDTH, WIN_HEIGHT))
-BOARD = pg.transform.scale(pg.image.load(os.path.join("Assets", "board.png")), (WIN_WIDTH, WIN_HEIGHT))
-FONT = pg.font.SysFont("Helvitca", 90, bold=True)
+# Created by load_screen, so that importing the module opens no window: a process started with spawn, e.g.
+# the AI process on Windows, imports the main module again.
+WIN: Optional[pg.Surface] = None
+BOARD: Optional[pg.Surface] = None
+FONT: Optional[pg.font.Font] = None
+RENDERER: Optional['BoardRenderer'] = None
 PIECE_IMAGE = {}
 
 KEY_COLOR_MAPPING = {
@@ -28,79 +32,130 @@ KEY_COLOR_MAPPING = {
 def load_screen():
     """
     Load the initial screen settings, set the window caption and icon, and load piece images.
-    This function initializes the Pygame display settings, sets the window caption and icon,
-    and loads the images of chess pieces.
+    This function opens the game window, sets the window caption and icon, loads the board and the images
+    of chess pieces, and creates the font and the board renderer.
     """
+    global WIN, BOARD, FONT, RENDERER
+    pg.font.init()
+    WIN = pg.display.set_mode((WIN_WIDTH, WIN_HEIGHT))
+    BOARD = pg.transform.scale(pg.image.load(os.path.join("Assets", "board.png")), (WIN_WIDTH, WIN_HEIGHT))
+    FONT = pg.font.SysFont("Helvitca", 90, bold=True)
     pg.display.set_caption("Chess")
     pg.display.set_icon(pg.image.load(os.path.join('Assets', 'chess_icon.png')))
     for p in PIECES:
-        PIECE_IMAGE[p] = pg.transform.scale(pg.image.load(os.path.join("Assets", p + ".png")), SQ_SIZE)
+        PIECE_IMAGE[p] = pg.transform.scale(pg.image.load(os.path.join("Assets", p + ".png")), SQ_SIZE).convert_alpha()
+    RENDERER = BoardRenderer(WIN)
 
 
-def draw_pieces(chess_engine: ChessEngine):
+class BoardRenderer:
     """
-    Draw chess pieces on the game window.
-    Args:
-        chess_engine (ChessEngine): The instance of the ChessEngine class representing the game state.
+    Draws the game on the window, redrawing only the squares whose piece or highlight changed since the last
+    frame and pushing just those to the screen. The board background of every color scheme and the highlight
+    surfaces are rendered once and reused.
     """
-    for row in range(DIMENSION):
-        for col in range(DIMENSION):
-            piece_name = chess_engine.get_piece_name((row, col))
-            if piece_name is not None:
-                color = chess_engine.get_piece_color((row, col))
-                rect = pg.Rect(col * SQ_SIZE[0], row * SQ_SIZE[1], SQ_SIZE[0], SQ_SIZE[1])
-                WIN.blit(PIECE_IMAGE[color + "_" + piece_name], rect)
+    def __init__(self, window: pg.Surface):
+        """
+        Initializes a BoardRenderer instance.
+        Args:
+            window (pg.Surface): The game window.
+        """
+        self._window = window
+        self._backgrounds: Dict[tuple | str, pg.Surface] = {}
+        self._selected_surface = BoardRenderer._highlight_surface(BLUE, 60)
+        self._move_surface = BoardRenderer._highlight_surface(GREEN, 120)
+        # what is shown on every square: the piece image name and the highlight surface, if any
+        self._squares: Dict[Tuple[int, int], Tuple[Optional[str], Optional[pg.Surface]]] = {}
+        self._background: Optional[pg.Surface] = None
 
+    @staticmethod
+    def _highlight_surface(color: tuple, alpha: int) -> pg.Surface:
+        """
+        Args:
+            color (tuple): The highlight color.
+            alpha (int): The highlight opacity, from 0 to 255.
+        Returns:
+            pg.Surface: A translucent square of the color.
+        """
+        surface = pg.Surface(SQ_SIZE).convert()
+        surface.set_alpha(alpha)
+        surface.fill(color)
+        return surface
 
-def highlight_selected_square(square_selected: Tuple[int, int]):
-    """
-    Highlight the currently selected square on the game window.
-    Args:
-        square_selected (Tuple[int, int]): The coordinates (row, col) of the selected square.
-    """
-    surface = pg.Surface(SQ_SIZE)
-    surface.set_alpha(60)
-    surface.fill(BLUE)
-    WIN.blit(surface, (square_selected[1] * SQ_SIZE[0], square_selected[0] * SQ_SIZE[1]))
+    def _get_background(self, selected_color: tuple | str) -> pg.Surface:
+        """
+        Returns the empty board of a color scheme, rendering it on first use.
+        Args:
+            selected_color (tuple | str): The board color, or "image" for the board image.
+        Returns:
+            pg.Surface: The board background, the size of the window.
+        """
+        background = self._backgrounds.get(selected_color)
+        if background is None:
+            if selected_color == "image":
+                background = BOARD.convert()
+            else:
+                background = pg.Surface((WIN_WIDTH, WIN_HEIGHT)).convert()
+                for r in range(DIMENSION):
+                    for c in range(DIMENSION):
+                        square_color = selected_color if (r + c) % 2 == 1 else WHITE
+                        background.fill(square_color, pg.Rect(c * SQ_SIZE[0], r * SQ_SIZE[1], SQ_SIZE[0], SQ_SIZE[1]))
+            self._backgrounds[selected_color] = background
+        return background
 
+    def invalidate(self):
+        """
+        Makes the next draw repaint the whole window, e.g. after a text was drawn over the board.
+        """
+        self._squares = {}
 
-def highlight_moves_squares(valid_moves: List[Tuple[int, int]]):
-    """
-    Highlight the squares representing valid moves on the game window.
-    Args:
-        valid_moves (List[Tuple[int, int]]): List of coordinates (row, col) representing valid moves.
-    """
-    surface = pg.Surface(SQ_SIZE)
-    surface.set_alpha(120)
-    surface.fill(GREEN)
-    for move in valid_moves:
-        WIN.blit(surface, (move[1] * SQ_SIZE[0], move[0] * SQ_SIZE[1]))
-
-
-def draw_board(selected_color: tuple | str):
-    if selected_color == "image":
-        WIN.blit(BOARD, (0, 0))
-    else:
-        for r in range(DIMENSION):
-            for c in range(DIMENSION):
-                square_color = selected_color if (r+c) % 2 == 1 else WHITE
-                pg.draw.rect(WIN, square_color, pg.Rect(c * SQ_SIZE[0], r * SQ_SIZE[1], SQ_SIZE[0], SQ_SIZE[1]))
+    def draw(self, chess_engine: ChessEngine, selected_color: tuple | str):
+        """
+        Draws the board, the highlights of the selected piece and the pieces, updating on the screen only the
+        squares that changed: the squares of a move, a selection or an undo.
+        Args:
+            chess_engine (ChessEngine): The instance of the ChessEngine class representing the game state.
+            selected_color (tuple | str): the board color
+        """
+        background = self._get_background(selected_color)
+        full = background is not self._background or not self._squares
+        highlights: Dict[Tuple[int, int], pg.Surface] = {}
+        if chess_engine.selected_square != ():
+            for move in chess_engine.available_moves:
+                highlights[move] = self._move_surface
+            highlights[chess_engine.selected_square] = self._selected_surface
+        rects = []
+        for row in range(DIMENSION):
+            for col in range(DIMENSION):
+                pos = (row, col)
+                piece_name = chess_engine.get_piece_name(pos)
+                image = chess_engine.get_piece_color(pos) + "_" + piece_name if piece_name is not None else None
+                square = (image, highlights.get(pos))
+                if not full and self._squares.get(pos) == square:
+                    continue
+                self._squares[pos] = square
+                rect = pg.Rect(col * SQ_SIZE[0], row * SQ_SIZE[1], SQ_SIZE[0], SQ_SIZE[1])
+                self._window.blit(background, rect, rect)
+                if square[1] is not None:
+                    self._window.blit(square[1], rect)
+                if image is not None:
+                    self._window.blit(PIECE_IMAGE[image], rect)
+                rects.append(rect)
+        self._background = background
+        if full:
+            pg.display.flip()
+        elif rects:
+            pg.display.update(rects)
 
 
 def draw_window(chess_engine: ChessEngine, selected_color: tuple | str):
     """
-    Draw the entire game window, including the chessboard and pieces.
+    Draw the game window, including the chessboard and pieces. Only the squares that changed since the
+    last call are redrawn.
     Args:
         chess_engine (ChessEngine): The instance of the ChessEngine class representing the game state.
         selected_color (tuple | str): the board color
     """
-    draw_board(selected_color)
-    if chess_engine.selected_square != ():
-        highlight_selected_square(chess_engine.selected_square)
-        if chess_engine.available_moves:
-            highlight_moves_squares(chess_engine.available_moves)
-    draw_pieces(chess_engine)
-    pg.display.flip()
+    RENDERER.draw(chess_engine, selected_color)
 
 
 def draw_text(text):
@@ -112,6 +167,8 @@ def draw_text(text):
     text_render = FONT.render(text, True, GREEN, BLUE)
     WIN.blit(text_render, (WIN_WIDTH//2 - text_render.get_width()//2, WIN_HEIGHT//2 - text_render.get_height()//2))
     pg.display.flip()
+    # the text covers squares the renderer does not know about
+    RENDERER.invalidate()
 
 
 def main():
@@ -120,9 +177,12 @@ def main():
     This function initializes the game, handles user input, and continuously updates the game window.
     """
     load_screen()
-    chess_engine = ChessEngine(is_human_white=True)
+    chess_engine = ChessEngine(is_human_white=True, time_limit=AI_TIME_LIMIT, seed=random.randrange(1 << 32),
+                               ponder=AI_PONDER, book_path=OPENING_BOOK if os.path.exists(OPENING_BOOK) else None,
+                               tablebase_path=TABLEBASE if os.path.exists(TABLEBASE) else None)
     clock = pg.time.Clock()
     run = True
+    search_info = None
 
     is_game_end = False
     game_end_time = 0
@@ -134,8 +194,12 @@ def main():
     while run:
         clock.tick(FPS)
         if not is_game_end and chess_engine.is_ai_turn() and not chess_engine.is_ai_running():
+            # the search runs in the AI process: the thread only waits for its result
             thread_ai_move = threading.Thread(target=ChessEngine.move_ai, args=(chess_engine,), daemon=True)
             thread_ai_move.start()
+        if chess_engine.get_search_info() != search_info:
+            search_info = chess_engine.get_search_info()
+            pg.display.set_caption(f"Chess - AI {search_info}")
         for event in pg.event.get():
             if event.type == pg.QUIT:
                 run = False
@@ -183,8 +247,11 @@ def main():
                 is_check = True
                 game_check_time = pg.time.get_ticks()
         chess_engine.moving_update = False
+    chess_engine.close()
     pg.quit()
 
 
 if __name__ == "__main__":
+    # lets the AI process start from a frozen executable
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,93 @@
+from typing import Dict, List, Optional, Tuple
+from chess_piece import Piece
+
+Square = Tuple[int, int]
+
+KNIGHT_DIRECTIONS = [(-2, -1), (-2, 1), (2, 1), (2, -1), (-1, -2), (-1, 2), (1, 2), (1, -2)]
+KING_DIRECTIONS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+DIAGONAL_DIRECTIONS = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+STRAIGHT_DIRECTIONS = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+
+
+def _targets(directions: List[Tuple[int, int]]) -> List[List[Tuple[Square, ...]]]:
+    """
+    Computes the squares one step away from every square, in the order of the directions.
+    Args:
+        directions (List[Tuple[int, int]]): The steps (row, col).
+    Returns:
+        List[List[Tuple[Square, ...]]]: The target squares of every square, indexed [row][col].
+    """
+    return [[tuple((row + i, col + j) for i, j in directions if 0 <= row + i < 8 and 0 <= col + j < 8)
+             for col in range(8)] for row in range(8)]
+
+
+def _ray(row: int, col: int, direction: Tuple[int, int]) -> Tuple[Square, ...]:
+    """
+    Args:
+        row (int): The row of the start square.
+        col (int): The column of the start square.
+        direction (Tuple[int, int]): The step (row, col).
+    Returns:
+        Tuple[Square, ...]: The squares from the start square, excluded, to the edge of the board.
+    """
+    squares = []
+    row, col = row + direction[0], col + direction[1]
+    while 0 <= row < 8 and 0 <= col < 8:
+        squares.append((row, col))
+        row, col = row + direction[0], col + direction[1]
+    return tuple(squares)
+
+
+# The squares a knight or a king attacks from every square, indexed [row][col].
+KNIGHT_TARGETS = _targets(KNIGHT_DIRECTIONS)
+KING_TARGETS = _targets(KING_DIRECTIONS)
+
+# RAYS[direction][row][col]: the squares along a direction from a square to the edge of the board,
+# nearest first.
+RAYS: Dict[Tuple[int, int], List[List[Tuple[Square, ...]]]] = {
+    direction: [[_ray(row, col, direction) for col in range(8)] for row in range(8)]
+    for direction in DIAGONAL_DIRECTIONS + STRAIGHT_DIRECTIONS}
+
+# The squares a pawn of each color attacks a square from, indexed [row][col]: a white pawn stands one row
+# below the square it attacks, a black pawn one row above.
+WHITE_PAWN_ATTACKERS = _targets([(1, -1), (1, 1)])
+BLACK_PAWN_ATTACKERS = _targets([(-1, -1), (-1, 1)])
+
+# The rays of every direction with the names of the pieces sliding along them.
+SLIDER_RAYS = [(RAYS[direction], ('b', 'q')) for direction in DIAGONAL_DIRECTIONS] + \
+              [(RAYS[direction], ('r', 'q')) for direction in STRAIGHT_DIRECTIONS]
+
+
+def is_square_attacked(board: List[List[Optional[Piece]]], pos: Square, by_white: bool,
+                       ignore: Optional[Square] = None) -> bool:
+    """
+    Checks if a square is attacked by any piece of the given color, stopping at the first attacker found.
+    Args:
+        board (List[List[Optional[Piece]]]): The chessboard.
+        pos (Square): The position (row, col) of the square.
+        by_white (bool): The color of the attacking pieces.
+        ignore (Optional[Square]): A square treated as empty, e.g. the square a king leaves.
+    Returns:
+        bool: True if the square is attacked, False otherwise.
+    """
+    row, col = pos
+    for r, c in (WHITE_PAWN_ATTACKERS if by_white else BLACK_PAWN_ATTACKERS)[row][col]:
+        piece = board[r][c]
+        if piece is not None and piece.get_name() == 'p' and piece.is_white() == by_white:
+            return True
+    for r, c in KNIGHT_TARGETS[row][col]:
+        piece = board[r][c]
+        if piece is not None and piece.get_name() == 'n' and piece.is_white() == by_white:
+            return True
+    for rays, names in SLIDER_RAYS:
+        for r, c in rays[row][col]:
+            piece = board[r][c]
+            if piece is not None and (r, c) != ignore:
+                if piece.is_white() == by_white and piece.get_name() in names:
+                    return True
+                break
+    for r, c in KING_TARGETS[row][col]:
+        piece = board[r][c]
+        if piece is not None and piece.get_name() == 'k' and piece.is_white() == by_white:
+            return True
+    return False
@@ -1,5 +1,6 @@
 from typing import Tuple, List, Optional
 from chess_piece import Piece
+from chess_move.attack_tables import RAYS, DIAGONAL_DIRECTIONS, STRAIGHT_DIRECTIONS
 
 
 class ContinuousMove:
@@ -14,6 +15,8 @@ class ContinuousMove:
             possible_directions (List[Tuple[int, int]]): A list of possible movement directions.
         """
         self._possible_directions = possible_directions
+        # the precomputed squares along every direction, see chess_move.attack_tables
+        self._rays = [RAYS[direction] for direction in possible_directions]
         self._is_white = is_white
 
     def get_attack_moves(self, board: List[List[Optional[Piece]]], pos: Tuple[int, int]) -> List[Tuple[int, int]]:
@@ -26,15 +29,15 @@ class ContinuousMove:
             List[Tuple[int, int]]: A list of the valid attack moves.
         """
         moves = []
-        for i, j in self._possible_directions:
-            current_pos = (pos[0] + i, pos[1] + j)
-            while Piece.board_position(current_pos):
-                if Piece.legal_attack_move(board, current_pos, self._is_white):
-                    moves.append(current_pos)
+        row, col = pos
+        is_white = self._is_white
+        for rays in self._rays:
+            for current_pos in rays[row][col]:
+                piece = board[current_pos[0]][current_pos[1]]
+                if piece is not None:
+                    if piece.is_white() != is_white:
+                        moves.append(current_pos)
                     break
-                if board[current_pos[0]][current_pos[1]] is not None:
-                    break
-                current_pos = (current_pos[0] + i, current_pos[1] + j)
         return moves
 
     def get_peace_moves(self, board: List[List[Optional[Piece]]], pos: Tuple[int, int]) -> List[Tuple[int, int]]:
@@ -47,11 +50,12 @@ class ContinuousMove:
             List[Tuple[int, int]]: A list of valid peace moves.
         """
         moves = []
-        for i, j in self._possible_directions:
-            current_pos = (pos[0] + i, pos[1] + j)
-            while Piece.board_position(current_pos) and Piece.legal_peace_move(board, current_pos):
+        row, col = pos
+        for rays in self._rays:
+            for current_pos in rays[row][col]:
+                if board[current_pos[0]][current_pos[1]] is not None:
+                    break
                 moves.append(current_pos)
-                current_pos = (current_pos[0] + i, current_pos[1] + j)
         return moves
 
 
@@ -66,7 +70,7 @@ class DiagonalMove(ContinuousMove):
         Args:
             is_white (bool): Indicates whether the movement is for a white piece.
         """
-        super().__init__(is_white=is_white, possible_directions=[(1, 1), (1, -1), (-1, 1), (-1, -1)])
+        super().__init__(is_white=is_white, possible_directions=DIAGONAL_DIRECTIONS)
 
 
 class StraightMove(ContinuousMove):
@@ -80,4 +84,4 @@ class StraightMove(ContinuousMove):
         Args:
             is_white (bool): Indicates whether the movement is for a white piece.
         """
-        super().__init__(is_white=is_white, possible_directions=[(1, 0), (0, 1), (-1, 0), (0, -1)])
+        super().__init__(is_white=is_white, possible_directions=STRAIGHT_DIRECTIONS)
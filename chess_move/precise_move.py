@@ -1,19 +1,21 @@
 from typing import Tuple, List, Optional
 from chess_piece import Piece
+from chess_move.attack_tables import KNIGHT_TARGETS, KING_TARGETS
 
 
 class PreciseMove:
     """
     Represents a precise movement (King, Knight) pattern on a chessboard.
     """
-    def __init__(self, is_white: bool, possible_directions: List[Tuple[int, int]]):
+    def __init__(self, is_white: bool, targets: List[List[Tuple[Tuple[int, int], ...]]]):
         """
         Initializes a PreciseMove instance.
         Args:
             is_white (bool): Indicates whether the movement is for a white piece.
-            possible_directions (List[Tuple[int, int]]): A list of possible movement directions.
+            targets (List[List[Tuple[Tuple[int, int], ...]]]): The squares reached from every square,
+                indexed [row][col], see chess_move.attack_tables.
         """
-        self._possible_directions = possible_directions
+        self._targets = targets
         self._is_white = is_white
 
     def get_attack_moves(self, board: List[List[Optional[Piece]]], pos: Tuple[int, int]) -> List[Tuple[int, int]]:
@@ -26,10 +28,11 @@ class PreciseMove:
             List[Tuple[int, int]]: A list of valid attack moves.
         """
         moves = []
-        for i, j in self._possible_directions:
-            current_pos = (pos[0] + i, pos[1] + j)
-            if Piece.legal_attack_move(board, current_pos, self._is_white):
-                moves.append(current_pos)
+        is_white = self._is_white
+        for target in self._targets[pos[0]][pos[1]]:
+            piece = board[target[0]][target[1]]
+            if piece is not None and piece.is_white() != is_white:
+                moves.append(target)
         return moves
 
     def get_peace_moves(self, board: List[List[Optional[Piece]]], pos: Tuple[int, int]) -> List[Tuple[int, int]]:
@@ -41,12 +44,7 @@ class PreciseMove:
         Returns:
             List[Tuple[int, int]]: A list of valid peace moves.
         """
-        moves = []
-        for i, j in self._possible_directions:
-            current_pos = (pos[0] + i, pos[1] + j)
-            if Piece.legal_peace_move(board, current_pos):
-                moves.append(current_pos)
-        return moves
+        return [target for target in self._targets[pos[0]][pos[1]] if board[target[0]][target[1]] is None]
 
 
 class KnightMove(PreciseMove):
@@ -60,8 +58,7 @@ class KnightMove(PreciseMove):
         Args:
             is_white (bool): Indicates whether the movement is for a white piece.
         """
-        super().__init__(is_white=is_white, possible_directions=[(-2, -1), (-2, 1), (2, 1), (2, -1),
-                                                                 (-1, -2), (-1, 2), (1, 2), (1, -2)])
+        super().__init__(is_white=is_white, targets=KNIGHT_TARGETS)
 
 
 class KingMove(PreciseMove):
@@ -75,5 +72,4 @@ class KingMove(PreciseMove):
         Args:
             is_white (bool): Indicates whether the movement is for a white piece.
         """
-        super().__init__(is_white=is_white, possible_directions=[(-1, -1), (-1, 0), (-1, 1), (0, -1),
-                                                                 (0, 1), (1, -1), (1, 0), (1, 1)])
+        super().__init__(is_white=is_white, targets=KING_TARGETS)
@@ -0,0 +1,193 @@
+import re
+from typing import Dict, List, Tuple
+
+# The starting position in Forsyth-Edwards Notation.
+START_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+FILES = 'abcdefgh'
+
+Move = Tuple[Tuple[int, int], Tuple[int, int]]
+
+# A game of a PGN file: its tag pairs, its moves in SAN and its result ('1-0', '0-1', '1/2-1/2' or '*').
+PgnGame = Tuple[Dict[str, str], List[str], str]
+
+PGN_TAG = re.compile(r'\[(\w+)\s+"((?:[^"\\]|\\.)*)"\]')
+PGN_RESULTS = ('1-0', '0-1', '1/2-1/2', '*')
+
+
+def square_name(pos: Tuple[int, int]) -> str:
+    """
+    Returns the algebraic name of a square, row 0 being the eighth rank.
+    Args:
+        pos (Tuple[int, int]): The position (row, col) on the chessboard.
+    Returns:
+        str: The square name, e.g. 'e2'.
+    """
+    return FILES[pos[1]] + str(8 - pos[0])
+
+
+def parse_square(name: str) -> Tuple[int, int]:
+    """
+    Returns the position of a square from its algebraic name.
+    Args:
+        name (str): The square name, e.g. 'e2'.
+    Returns:
+        Tuple[int, int]: The position (row, col) on the chessboard.
+    """
+    if len(name) != 2 or name[0] not in FILES or name[1] not in '12345678':
+        raise ValueError(f"Invalid square: {name}")
+    return 8 - int(name[1]), FILES.index(name[0])
+
+
+def move_name(move: Move) -> str:
+    """
+    Returns the coordinate notation of a move, e.g. 'e2e4'.
+    Args:
+        move (Move): The move as (source position, destination position).
+    Returns:
+        str: The move name.
+    """
+    return square_name(move[0]) + square_name(move[1])
+
+
+def parse_move(name: str) -> Move:
+    """
+    Returns a move from its coordinate notation. A promotion suffix is accepted and ignored, as pawns
+    always promote to a queen.
+    Args:
+        name (str): The move name, e.g. 'e2e4' or 'a7a8q'.
+    Returns:
+        Move: The move as (source position, destination position).
+    """
+    if len(name) not in (4, 5):
+        raise ValueError(f"Invalid move: {name}")
+    return parse_square(name[:2]), parse_square(name[2:4])
+
+
+def parse_san(board, san: str) -> Move:
+    """
+    Returns the legal move of a position written in Standard Algebraic Notation, e.g. 'Nf3', 'exd5',
+    'O-O' or 'e8=Q+'.
+    Args:
+        board (ChessBoard | BitBoard): The position the move is played in.
+        san (str): The move.
+    Returns:
+        Move: The move as (source position, destination position).
+    Raises:
+        ValueError: If the text is not a legal move of the position, which includes en passant and
+            promotions to another piece than a queen, as the engine does not play them.
+    """
+    text = san.rstrip('+#!?')
+    moves = board.get_all_moves()
+    if text in ('O-O', '0-0', 'O-O-O', '0-0-0'):
+        row = 7 if board.is_white_turn() else 0
+        col = 6 if len(text) == 3 else 2
+        candidates = [move for move in moves
+                      if move == ((row, 4), (row, col)) and board.get_piece_name((row, 4)) == 'k']
+    else:
+        promotion = None
+        if '=' in text:
+            text, promotion = text.split('=')
+        elif len(text) > 2 and text[-1] in 'QRBN' and text[-2] in '18':
+            text, promotion = text[:-1], text[-1]
+        if promotion is not None and promotion != 'Q':
+            raise ValueError(f"Unsupported promotion: {san}")
+        name = text[0].lower() if text[0] in 'KQRBN' else 'p'
+        if name != 'p':
+            text = text[1:]
+        text = text.replace('x', '')
+        if len(text) < 2:
+            raise ValueError(f"Invalid move: {san}")
+        dst = parse_square(text[-2:])
+        hint = text[:-2]
+        candidates = [move for move in moves if move[1] == dst and board.get_piece_name(move[0]) == name and
+                      all(square_name(move[0])[FILES.find(char) < 0] == char for char in hint)]
+    if len(candidates) != 1:
+        raise ValueError(f"Illegal or ambiguous move: {san}")
+    return candidates[0]
+
+
+def san_name(board, move: Move) -> str:
+    """
+    Returns a legal move of a position in Standard Algebraic Notation, with the check and mate suffixes.
+    Args:
+        board (ChessBoard | BitBoard): The position the move is played in; it is left unchanged.
+        move (Move): The move as (source position, destination position).
+    Returns:
+        str: The move, e.g. 'Nbd2', 'exd5', 'O-O' or 'e8=Q+'.
+    """
+    src, dst = move
+    name = board.get_piece_name(src)
+    capture = board.get_piece_name(dst) is not None
+    if name == 'k' and abs(dst[1] - src[1]) == 2:
+        text = 'O-O' if dst[1] == 6 else 'O-O-O'
+    elif name == 'p':
+        text = (FILES[src[1]] + 'x' if capture else '') + square_name(dst) + ('=Q' if dst[0] in (0, 7) else '')
+    else:
+        rivals = [other[0] for other in board.get_all_moves()
+                  if other[1] == dst and other[0] != src and board.get_piece_name(other[0]) == name]
+        hint = ''
+        if rivals:
+            source = square_name(src)
+            if all(rival[1] != src[1] for rival in rivals):
+                hint = source[0]
+            elif all(rival[0] != src[0] for rival in rivals):
+                hint = source[1]
+            else:
+                hint = source
+        text = name.upper() + hint + ('x' if capture else '') + square_name(dst)
+    after = board.clone()
+    after.move_piece(src, dst)
+    after.promote_pawn(dst)
+    after.change_turn()
+    if after.is_check():
+        text += '#' if after.is_game_end() else '+'
+    return text
+
+
+def parse_pgn(text: str) -> List[PgnGame]:
+    """
+    Splits the text of a PGN file into games. Comments, variations, numeric annotations and move numbers
+    are skipped.
+    Args:
+        text (str): The content of the PGN file.
+    Returns:
+        List[PgnGame]: The tag pairs, the SAN moves and the result of every game.
+    """
+    games = []
+    tags: Dict[str, str] = {}
+    moves: List[str] = []
+    in_movetext = False
+    depth = 0
+    for line in text.splitlines():
+        line = line.strip()
+        if depth == 0 and line.startswith('['):
+            if in_movetext:
+                games.append((tags, moves, tags.get('Result', '*')))
+                tags, moves, in_movetext = {}, [], False
+            match = PGN_TAG.match(line)
+            if match:
+                tags[match.group(1)] = match.group(2)
+            continue
+        if line.startswith('%'):
+            continue
+        if depth == 0:
+            # a semicolon comment runs to the end of the line
+            line = line.split(';')[0]
+        for token in re.findall(r'\{|\}|\(|\)|[^\s{}()]+', line):
+            if token in ('{', '('):
+                depth += 1
+            elif token in ('}', ')'):
+                depth = max(0, depth - 1)
+            elif depth == 0:
+                in_movetext = True
+                if token in PGN_RESULTS:
+                    games.append((tags, moves, token))
+                    tags, moves, in_movetext = {}, [], False
+                elif not token.startswith('$'):
+                    token = re.sub(r'^\d+\.+', '', token)
+                    if token:
+                        moves.append(token)
+    if in_movetext or moves:
+        games.append((tags, moves, tags.get('Result', '*')))
+    return games
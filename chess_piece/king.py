@@ -1,5 +1,6 @@
 from chess_piece import Piece, Rook
-from chess_move import DiagonalMove, StraightMove, KingMove, KnightMove
+from chess_move import KingMove
+from chess_move.attack_tables import is_square_attacked
 from typing import Tuple, List, Optional
 
 
@@ -15,9 +16,6 @@ class King(Piece):
             pos (Tuple[int, int]): The initial position of the king on the chessboard.
         """
         super().__init__('k', is_white, pos)
-        self._diagonal_move = DiagonalMove(is_white)
-        self._straight_move = StraightMove(is_white)
-        self._knight_move = KnightMove(is_white)
         self._king_move = KingMove(is_white)
         self._move_counter = 0
 
@@ -34,32 +32,6 @@ class King(Piece):
     def get_attack_moves(self, board: List[List[Optional[Piece]]]) -> List[Tuple[int, int]]:
         return self._king_move.get_attack_moves(board, self.get_position())
 
-    def is_check(self, board: List[List[Optional[Piece]]]) -> bool:
-        """
-        Checks if the king is in a check position.
-        Args:
-            board (List[List[Optional[Piece]]]): The chessboard.
-        Returns:
-            bool: True if the king is in a check position, False otherwise.
-        """
-        pos = self.get_position()
-        for index in self._diagonal_move.get_attack_moves(board, pos):
-            name = board[index[0]][index[1]].get_name()
-            if name in ['q', 'b']:
-                return True
-            if name == 'p' and pos in board[index[0]][index[1]].get_attack_moves(board):
-                return True
-        for index in self._straight_move.get_attack_moves(board, pos):
-            if board[index[0]][index[1]].get_name() in ['q', 'r']:
-                return True
-        for index in self._king_move.get_attack_moves(board, pos):
-            if board[index[0]][index[1]].get_name() == 'k':
-                return True
-        for index in self._knight_move.get_attack_moves(board, pos):
-            if board[index[0]][index[1]].get_name() == 'n':
-                return True
-        return False
-
     def increase_moves_counter(self):
         """
         Increments the move counter of the king.
@@ -82,22 +54,28 @@ class King(Piece):
 
     def castle_move(self, board: List[List[Optional[Piece]]]) -> List[Tuple[int, int]]:
         """
-        Returns a list of valid castling moves for the king.
+        Returns a list of valid castling moves for the king: the king and the rook have not moved, the squares
+        between them are empty, and the king is not in check and does not pass through an attacked square.
+        Whether the destination square is attacked is checked by the board like for any king move.
         Args:
             board (List[List[Optional[Piece]]]): The chessboard.
         Returns:
             List[Tuple[int, int]]: A list of valid castling moves for the king.
         """
-        rook1: Optional[Piece | Rook] = board[self._pos[0]][0]
-        rook2: Optional[Piece | Rook] = board[self._pos[0]][7]
+        if self.has_moved():
+            return []
+        row, col = self._pos
+        rook1: Optional[Piece | Rook] = board[row][0]
+        rook2: Optional[Piece | Rook] = board[row][7]
+        by_white = not self._is_white
         moves = []
-        if not self.has_moved():
-            if rook1 and rook1.get_name() == 'r' and not rook1.has_moved() and\
-                    all(board[self._pos[0]][col] is None for col in range(1, self._pos[1]))\
-                    and not self.is_check(board):
-                moves.append((self._pos[0], self._pos[1] - 2))
-            if rook2 and rook2.get_name() == 'r' and not rook2.has_moved() and \
-                    all(board[self._pos[0]][col] is None for col in range(self._pos[1] + 1, 7))\
-                    and (len(moves) == 1 or not self.is_check(board)):
-                moves.append((self._pos[0], self._pos[1] + 2))
+        queen_side = rook1 and rook1.get_name() == 'r' and not rook1.has_moved() and \
+            all(board[row][c] is None for c in range(1, col))
+        king_side = rook2 and rook2.get_name() == 'r' and not rook2.has_moved() and \
+            all(board[row][c] is None for c in range(col + 1, 7))
+        if (queen_side or king_side) and not is_square_attacked(board, self._pos, by_white):
+            if queen_side and not is_square_attacked(board, (row, col - 1), by_white):
+                moves.append((row, col - 2))
+            if king_side and not is_square_attacked(board, (row, col + 1), by_white):
+                moves.append((row, col + 2))
         return moves
@@ -1,8 +1,18 @@
+import os
+
 WIN_WIDTH, WIN_HEIGHT = 704, 672
 DIMENSION = 8
 # The size of each squares in the board
 SQ_SIZE = (WIN_WIDTH // DIMENSION, WIN_HEIGHT // DIMENSION)
 FPS = 30
+# The AI thinking time per move in seconds; the depth set with the +/- keys caps the search
+AI_TIME_LIMIT = 5.0
+# Whether the AI keeps searching the expected reply while the human thinks
+AI_PONDER = True
+# The opening book the AI plays from, built with build_book.py; the AI searches every move when it is missing
+OPENING_BOOK = os.path.join('Assets', 'book.bin')
+# The endgame tablebase the AI plays small endings from, built with build_tablebase.py; optional as well
+TABLEBASE = os.path.join('Assets', 'tablebase.bin')
 
 # The image names of the chess pieces
 PIECES = ['black_r', 'black_n', 'black_b', 'black_q', 'black_k', 'black_p',
@@ -0,0 +1,114 @@
+from typing import List, Dict, Tuple
+from zobrist import PIECE_INDEX
+
+PAWN_SCORE = [
+    [8, 8, 8, 8, 8, 8, 8, 8],
+    [8, 8, 8, 8, 8, 8, 8, 8],
+    [5, 6, 7, 7, 7, 7, 6, 5],
+    [2, 3, 3, 5, 5, 3, 3, 2],
+    [1, 2, 3, 4, 4, 3, 2, 1],
+    [1, 1, 3, 4, 4, 3, 1, 1],
+    [1, 1, 1, 0, 0, 1, 1, 1],
+    [0, 0, 0, 0, 0, 0, 0, 0]
+]
+
+KNIGHT_SCORE = [
+    [-10, -8, -6, -6, -6, -6, -8, -10],
+    [-8, -4, 0, 0, 0, 0, -4, -8],
+    [-6, 0, 4, 6, 6, 4, 0, -6],
+    [-6, 2, 6, 8, 8, 6, 2, -6],
+    [-6, 0, 6, 8, 8, 6, 0, -6],
+    [-6, 2, 4, 6, 6, 4, 2, -6],
+    [-8, -4, 0, 2, 2, 0, -4, -8],
+    [-10, -8, -6, -6, -6, -6, -8, -10]
+]
+
+BISHOP_SCORE = [
+    [5, 0, 0, 0, 0, 0, 0, 5],
+    [0, 5, 0, 0, 0, 0, 5, 0],
+    [0, 0, 10, 5, 5, 10, 0, 0],
+    [0, 0, 10, 15, 15, 10, 0, 0],
+    [0, 0, 10, 15, 15, 10, 0, 0],
+    [0, 0, 10, 5, 5, 10, 0, 0],
+    [0, 5, 0, 0, 0, 0, 5, 0],
+    [5, 0, 0, 0, 0, 0, 0, 5]
+]
+
+ROOK_SCORE = [
+    [0, 0, 4, 10, 10, 4, 0, 0],
+    [4, 4, 4, 10, 10, 4, 4, 4],
+    [1, 1, 2, 5, 5, 2, 1, 1],
+    [1, 2, 3, 10, 10, 3, 2, 1],
+    [1, 2, 3, 10, 10, 3, 2, 1],
+    [1, 1, 2, 5, 5, 2, 1, 1],
+    [4, 4, 4, 10, 10, 4, 4, 4],
+    [0, 0, 4, 10, 10, 4, 0, 0]
+]
+
+QUEEN_SCORE = [
+    [-5, -5, -5, -5, -5, -5, -5, -5],
+    [-5, 0, 5, 5, 5, 5, 0, -5],
+    [-5, 0, 5, 5, 5, 5, 0, -5],
+    [-5, 0, 5, 5, 5, 5, 0, -5],
+    [-5, 0, 5, 5, 5, 5, 0, -5],
+    [-5, 0, 5, 5, 5, 5, 0, -5],
+    [-5, 0, 5, 5, 5, 5, 0, -5],
+    [-5, -5, -5, -5, -5, -5, -5, -5]
+]
+
+KING_SCORE = [
+    [0, 0, 0, 0, 0, 0, 0, 0],
+    [0, 0, 5, 5, 5, 5, 0, 0],
+    [0, 5, 5, 10, 10, 5, 5, 0],
+    [0, 5, 10, 10, 10, 10, 5, 0],
+    [0, 5, 10, 10, 10, 10, 5, 0],
+    [0, 0, 5, 10, 10, 5, 0, 0],
+    [0, 5, 5, -5, -5, 5, 5, 0],
+    [0, 0, 10, 0, 0, 0, 10, 0]
+]
+
+PIECE_VALUE: Dict[str, int] = {"k": 0, "q": 900, "r": 500, "b": 310, "n": 300, "p": 100}
+
+POSITION_SCORE: Dict[str, List[List[int]]] = {
+    "n": KNIGHT_SCORE,
+    "b": BISHOP_SCORE,
+    "q": QUEEN_SCORE,
+    "r": ROOK_SCORE,
+    "p": PAWN_SCORE,
+    "k": KING_SCORE
+}
+
+
+def _signed_score(name: str, is_white: bool, sq: int) -> int:
+    """
+    Computes the material and position score of a piece standing on a square, from white's point of view.
+    Black pieces read the position tables mirrored vertically.
+    Args:
+        name (str): The piece name.
+        is_white (bool): Indicates whether the piece is white.
+        sq (int): The square index, row * 8 + col.
+    Returns:
+        int: The score, positive for white pieces and negative for black pieces.
+    """
+    row, col = sq >> 3, sq & 7
+    if is_white:
+        return PIECE_VALUE[name] + POSITION_SCORE[name][row][col]
+    return -(PIECE_VALUE[name] + POSITION_SCORE[name][7 - row][col])
+
+
+# PIECE_SQUARE_SCORE[piece index][row * 8 + col], indexed like the Zobrist keys.
+PIECE_SQUARE_SCORE: List[List[int]] = [[_signed_score(name, is_white, sq) for sq in range(64)]
+                                        for (name, is_white), _ in sorted(PIECE_INDEX.items(), key=lambda item: item[1])]
+
+
+def piece_score(name: str, is_white: bool, pos: Tuple[int, int]) -> int:
+    """
+    Returns the material and position score of a piece standing on a square, from white's point of view.
+    Args:
+        name (str): The piece name.
+        is_white (bool): Indicates whether the piece is white.
+        pos (Tuple[int, int]): The position (row, col) of the piece.
+    Returns:
+        int: The score, positive for white pieces and negative for black pieces.
+    """
+    return PIECE_SQUARE_SCORE[PIECE_INDEX[(name, is_white)]][pos[0] * 8 + pos[1]]
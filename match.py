@@ -0,0 +1,413 @@
+"""
+Plays a match between two engine configurations, to check that a change to the search does not cost playing
+strength. The games run concurrently in a pool of processes; each opening is played twice with the colors
+swapped, and the match stops as soon as a sequential probability ratio test (SPRT) decides between the
+hypotheses that the first engine is elo0 or elo1 stronger than the second.
+
+    python match.py --engine name=new,depth=4,board=bitboard --engine name=old,depth=4 --games 1000
+    python match.py --engine name=tt,movetime=200 --engine name=nott,movetime=200,hash=0 --pgn games.pgn
+    python match.py --engine depth=3 --engine depth=2 --openings openings.epd --elo0 0 --elo1 50
+
+Engine settings: name, depth, movetime (milliseconds), nodes, hash (megabytes), board (list or bitboard),
+quiescence (0 or 1), delta (delta pruning margin), book and tablebase (files).
+
+Games end by checkmate or stalemate, and are adjudicated as draws on threefold repetition, the fifty-move
+rule, insufficient material or the move limit, and as wins when both engines agree on a forced mate: the side
+that moved found one and its opponent's last search saw itself mated.
+"""
+import argparse
+import collections
+import datetime
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, List, Optional, Tuple
+from chess_board import ChessBoard
+from chess_bitboard import BOARD_CLASSES
+from chess_notation import START_FEN, san_name
+from chess_ai import ChessAI
+from chess_ai.minimax_algorithm import MATE_BOUND
+from chess_ai.process_context import get_process_context
+
+ENGINE_SETTINGS = ('name', 'depth', 'movetime', 'nodes', 'hash', 'board', 'quiescence', 'delta', 'book',
+                   'tablebase')
+
+# Balanced positions a few moves into common openings, played when no --openings file is given.
+DEFAULT_OPENINGS: List[str] = [
+    START_FEN,
+    'r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3',
+    'rnbqkbnr/pp1ppppp/8/2p5/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2',
+    'rnbqkb1r/ppp1pppp/5n2/3p4/3P4/5N2/PPP1PPPP/RNBQKB1R w KQkq - 2 3',
+    'rnbqkbnr/ppp1pppp/8/3p4/2PP4/8/PP2PPPP/RNBQKBNR b KQkq - 0 2',
+    'rnbqkb1r/pppppp1p/5np1/8/2PP4/8/PP2PPPP/RNBQKBNR w KQkq - 0 3',
+    'rnbqkbnr/pppp1ppp/4p3/8/3PP3/8/PPP2PPP/RNBQKBNR b KQkq - 0 2',
+    'rnbqkbnr/pp1ppppp/2p5/8/3PP3/8/PPP2PPP/RNBQKBNR b KQkq - 0 2',
+    'rnbqkbnr/pppppppp/8/8/2P5/8/PP1PPPPP/RNBQKBNR b KQkq - 0 1',
+    'r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4',
+]
+
+# A finished game: round, opening, white and black names, SAN moves, result, termination and duration.
+GameRecord = Dict[str, object]
+
+
+def parse_engine(text: str, index: int) -> Dict[str, str]:
+    """
+    Parses the settings of an engine given on the command line.
+    Args:
+        text (str): Comma separated key=value settings, e.g. 'name=new,depth=4'.
+        index (int): The engine number, which names it when no name is given.
+    Returns:
+        Dict[str, str]: The settings.
+    """
+    settings = {'name': f"engine{index}", 'depth': '3'}
+    for item in filter(None, text.split(',')):
+        key, _, value = item.partition('=')
+        if key not in ENGINE_SETTINGS or not value:
+            raise ValueError(f"invalid engine setting {item!r}, expected key=value with key in "
+                             f"{', '.join(ENGINE_SETTINGS)}")
+        settings[key] = value
+    if settings.get('board', 'list') not in BOARD_CLASSES:
+        raise ValueError(f"invalid board {settings['board']!r}, expected {' or '.join(BOARD_CLASSES)}")
+    for key in ('depth', 'movetime', 'nodes', 'hash', 'quiescence', 'delta'):
+        if key in settings:
+            int(settings[key])
+    return settings
+
+
+def create_ai(settings: Dict[str, str], seed: int) -> ChessAI:
+    """
+    Creates the AI of an engine configuration, with empty caches, for one game.
+    Args:
+        settings (Dict[str, str]): The engine settings, see parse_engine.
+        seed (int): The seed of the AI tie-breaks between equally good moves.
+    Returns:
+        ChessAI: The AI.
+    """
+    ai = ChessAI(threading.Event(), board_class=BOARD_CLASSES[settings.get('board', 'list')],
+                 hash_size_mb=int(settings.get('hash', 16)),
+                 time_limit=int(settings['movetime']) / 1000 if 'movetime' in settings else None,
+                 node_limit=int(settings['nodes']) if 'nodes' in settings else None, seed=seed,
+                 quiescence=settings.get('quiescence', '1') != '0',
+                 delta_margin=int(settings['delta']) if 'delta' in settings else None,
+                 book_path=settings.get('book'), tablebase_path=settings.get('tablebase'))
+    ai.max_depth = int(settings['depth'])
+    return ai
+
+
+def is_insufficient_material(board) -> bool:
+    """
+    Args:
+        board (ChessBoard | BitBoard): The position.
+    Returns:
+        bool: Whether no side can mate: bare kings, or a single knight or bishop left besides them.
+    """
+    pieces = [board.get_piece_name((row, col)) for row in range(8) for col in range(8)]
+    pieces = [name for name in pieces if name is not None and name != 'k']
+    return not pieces or pieces in (['n'], ['b'])
+
+
+def play_game(round_number: int, fen: str, white: Dict[str, str], black: Dict[str, str], seed: int,
+              max_moves: int) -> GameRecord:
+    """
+    Plays one game between two engine configurations. Runs in a worker process.
+    Args:
+        round_number (int): The game number in the match.
+        fen (str): The opening position.
+        white (Dict[str, str]): The settings of the engine playing white.
+        black (Dict[str, str]): The settings of the engine playing black.
+        seed (int): The seed of the AI tie-breaks.
+        max_moves (int): The number of moves of each side after which the game is drawn.
+    Returns:
+        GameRecord: The game.
+    """
+    start = time.perf_counter()
+    rng = random.Random(seed)
+    players = {True: create_ai(white, rng.randrange(1 << 32)), False: create_ai(black, rng.randrange(1 << 32))}
+    board = ChessBoard.from_fen(fen)
+    sans: List[str] = []
+    positions = collections.Counter([board.get_hash()])
+    halfmove_clock = 0
+    # the score of the last search of each side, from its own point of view
+    last_scores: Dict[bool, Optional[int]] = {True: None, False: None}
+    result, termination = None, None
+    try:
+        while result is None:
+            if board.is_game_end():
+                status = board.game_end_status()
+                result, termination = ('1/2-1/2', 'stalemate') if status == 2 else \
+                    ('1-0' if status == 1 else '0-1', 'checkmate')
+            elif positions[board.get_hash()] >= 3:
+                result, termination = '1/2-1/2', 'threefold repetition'
+            elif halfmove_clock >= 100:
+                result, termination = '1/2-1/2', 'fifty-move rule'
+            elif is_insufficient_material(board):
+                result, termination = '1/2-1/2', 'insufficient material'
+            elif len(sans) >= 2 * max_moves:
+                result, termination = '1/2-1/2', 'move limit'
+            if result is not None:
+                break
+            is_white = board.is_white_turn()
+            ai = players[is_white]
+            ai.find_best_move(board)
+            last_scores[is_white] = ai.score
+            move = ai.best_move if ai.best_move is not None else board.get_all_moves()[0]
+            irreversible = board.get_piece_name(move[0]) == 'p' or board.get_piece_name(move[1]) is not None
+            sans.append(san_name(board, move))
+            board.move_piece(move[0], move[1])
+            board.promote_pawn(move[1])
+            board.change_turn()
+            halfmove_clock = 0 if irreversible else halfmove_clock + 1
+            positions[board.get_hash()] += 1
+            opponent_score = last_scores[not is_white]
+            if ai.score > MATE_BOUND and opponent_score is not None and opponent_score < -MATE_BOUND and \
+                    not board.is_game_end():
+                # both searches see the forced mate, so a broken mate score of one engine alone wins nothing
+                result, termination = '1-0' if is_white else '0-1', 'adjudication: mate confirmed'
+    finally:
+        for ai in players.values():
+            ai.close()
+    return {'round': round_number, 'fen': fen, 'white': white['name'], 'black': black['name'], 'moves': sans,
+            'result': result, 'termination': termination, 'time': time.perf_counter() - start}
+
+
+def format_pgn(game: GameRecord, event: str) -> str:
+    """
+    Writes a game in PGN.
+    Args:
+        game (GameRecord): The game.
+        event (str): The event tag.
+    Returns:
+        str: The game, ending with an empty line.
+    """
+    tags = [('Event', event), ('Site', '?'), ('Date', datetime.date.today().strftime('%Y.%m.%d')),
+            ('Round', str(game['round'])), ('White', game['white']), ('Black', game['black']),
+            ('Result', game['result'])]
+    fen = game['fen']
+    if fen != START_FEN:
+        tags += [('SetUp', '1'), ('FEN', fen)]
+    tags += [('Termination', game['termination']), ('PlyCount', str(len(game['moves'])))]
+    fields = fen.split()
+    white_first = len(fields) < 2 or fields[1] == 'w'
+    number = int(fields[5]) if len(fields) > 5 and fields[5].isdigit() else 1
+    tokens = []
+    for ply, san in enumerate(game['moves']):
+        if ply == 0 and not white_first:
+            tokens.append(f"{number}...")
+        elif (ply % 2 == 0) == white_first:
+            tokens.append(f"{number}.")
+        tokens.append(san)
+        if (ply % 2 == 1) == white_first:
+            number += 1
+    tokens.append(game['result'])
+    lines, line = [], ''
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > 79:
+            lines.append(line)
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    lines.append(line)
+    return ''.join(f'[{key} "{value}"]\n' for key, value in tags) + '\n' + '\n'.join(lines) + '\n\n'
+
+
+def score_statistics(wins: int, draws: int, losses: int) -> Tuple[float, float]:
+    """
+    Args:
+        wins (int): The games won by the first engine.
+        draws (int): The games drawn.
+        losses (int): The games lost by the first engine.
+    Returns:
+        Tuple[float, float]: The mean score of the first engine and the variance of the score of one game.
+    """
+    games = wins + draws + losses
+    score = (wins + draws / 2) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    return score, variance
+
+
+def elo_difference(score: float) -> float:
+    """
+    Args:
+        score (float): The mean score of the first engine.
+    Returns:
+        float: The Elo difference the logistic model gives the score, infinite for a 0 or 1 score.
+    """
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+
+def elo_estimate(wins: int, draws: int, losses: int) -> Tuple[float, float]:
+    """
+    Args:
+        wins (int): The games won by the first engine.
+        draws (int): The games drawn.
+        losses (int): The games lost by the first engine.
+    Returns:
+        Tuple[float, float]: The Elo difference of the first engine over the second and the half width of
+            its 95% confidence interval.
+    """
+    games = wins + draws + losses
+    score, variance = score_statistics(wins, draws, losses)
+    margin = 1.96 * math.sqrt(variance / games)
+    return elo_difference(score), (elo_difference(score + margin) - elo_difference(score - margin)) / 2
+
+
+def sprt_llr(wins: int, draws: int, losses: int, elo0: float, elo1: float) -> float:
+    """
+    Computes the log-likelihood ratio of the SPRT, with the normal approximation of the game scores.
+    Args:
+        wins (int): The games won by the first engine.
+        draws (int): The games drawn.
+        losses (int): The games lost by the first engine.
+        elo0 (float): The Elo difference of the null hypothesis.
+        elo1 (float): The Elo difference of the alternative hypothesis.
+    Returns:
+        float: The log-likelihood ratio of elo1 over elo0, 0 while the games do not vary.
+    """
+    games = wins + draws + losses
+    if not games:
+        return 0.0
+    score, variance = score_statistics(wins, draws, losses)
+    if variance <= 0:
+        return 0.0
+    score0 = 1 / (1 + 10 ** (-elo0 / 400))
+    score1 = 1 / (1 + 10 ** (-elo1 / 400))
+    return games * (score1 - score0) * (2 * score - score0 - score1) / (2 * variance)
+
+
+def load_openings(path: Optional[str]) -> List[str]:
+    """
+    Reads the opening positions, one FEN or EPD per line; empty lines and lines starting with '#' are skipped.
+    Args:
+        path (Optional[str]): The file, None for DEFAULT_OPENINGS.
+    Returns:
+        List[str]: The openings as FEN strings.
+    """
+    if path is None:
+        return list(DEFAULT_OPENINGS)
+    openings = []
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            fields = line.split()
+            if fields and not fields[0].startswith('#'):
+                # an EPD line has the first four FEN fields followed by operations
+                fen = ' '.join(fields[:6]) if len(fields) >= 6 and fields[4].isdigit() else ' '.join(fields[:4])
+                ChessBoard.from_fen(fen)
+                openings.append(fen)
+    if not openings:
+        raise ValueError(f"no openings in {path}")
+    return openings
+
+
+def main():
+    """
+    Parses the command line, plays the match and prints its summary.
+    """
+    parser = argparse.ArgumentParser(description="Play a match between two engine configurations.")
+    parser.add_argument('--engine', action='append', default=[],
+                        help="engine settings, e.g. name=new,depth=4; given twice")
+    parser.add_argument('--games', type=int, default=200, help="maximum number of games (default 200)")
+    parser.add_argument('--concurrency', type=int, default=os.cpu_count() or 1,
+                        help="number of games played at once")
+    parser.add_argument('--openings', help="file of opening positions, one FEN or EPD per line")
+    parser.add_argument('--max-moves', type=int, default=150,
+                        help="moves of each side after which a game is drawn (default 150)")
+    parser.add_argument('--elo0', type=float, default=0.0, help="Elo difference of the SPRT null hypothesis")
+    parser.add_argument('--elo1', type=float, default=10.0, help="Elo difference of the SPRT alternative")
+    parser.add_argument('--alpha', type=float, default=0.05, help="SPRT false positive rate")
+    parser.add_argument('--beta', type=float, default=0.05, help="SPRT false negative rate")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the opening order and the AI tie-breaks")
+    parser.add_argument('--pgn', help="PGN file the games are appended to")
+    args = parser.parse_args()
+    if len(args.engine) != 2:
+        parser.error("give exactly two --engine settings")
+    try:
+        engines = [parse_engine(text, index + 1) for index, text in enumerate(args.engine)]
+        openings = load_openings(args.openings)
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+    if engines[0]['name'] == engines[1]['name']:
+        engines[1]['name'] += '-2'
+
+    rng = random.Random(args.seed)
+    rng.shuffle(openings)
+    lower, upper = math.log(args.beta / (1 - args.alpha)), math.log((1 - args.beta) / args.alpha)
+    event = f"{engines[0]['name']} vs {engines[1]['name']}"
+    print(f"{event}: up to {args.games} games, SPRT elo0={args.elo0:g} elo1={args.elo1:g} "
+          f"bounds [{lower:.2f}, {upper:.2f}], {args.concurrency} concurrent games")
+
+    def games():
+        # each opening is played twice, the engines swapping colors
+        for number in range(args.games):
+            fen = openings[number // 2 % len(openings)]
+            first, second = (engines[0], engines[1]) if number % 2 == 0 else (engines[1], engines[0])
+            yield number + 1, fen, first, second, rng.randrange(1 << 32), args.max_moves
+
+    counts = {'1-0': 0, '0-1': 0, '1/2-1/2': 0}
+    wins = draws = losses = 0
+    decision = None
+    pgn_file = open(args.pgn, 'a', encoding='utf-8') if args.pgn else None
+    start = time.perf_counter()
+    context = get_process_context()
+    try:
+        with ProcessPoolExecutor(max_workers=args.concurrency, mp_context=context) as executor:
+            pending = games()
+            running = set()
+            while True:
+                # keep one game per worker in flight, so that nothing is wasted when the SPRT decides
+                while decision is None and len(running) < args.concurrency:
+                    task = next(pending, None)
+                    if task is None:
+                        break
+                    running.add(executor.submit(play_game, *task))
+                if not running:
+                    break
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    game = future.result()
+                    counts[game['result']] += 1
+                    first_white = game['white'] == engines[0]['name']
+                    if game['result'] == '1/2-1/2':
+                        draws += 1
+                    elif (game['result'] == '1-0') == first_white:
+                        wins += 1
+                    else:
+                        losses += 1
+                    if pgn_file is not None:
+                        pgn_file.write(format_pgn(game, event))
+                        pgn_file.flush()
+                    llr = sprt_llr(wins, draws, losses, args.elo0, args.elo1)
+                    print(f"game {game['round']:>4} {game['white']} - {game['black']} {game['result']:<7} "
+                          f"{game['termination']:<28} {len(game['moves']):>4} plies {game['time']:>6.1f}s | "
+                          f"+{wins} ={draws} -{losses} LLR {llr:+.2f}")
+                    if decision is None and llr >= upper:
+                        decision = f"H1 accepted: {engines[0]['name']} is at least {args.elo1:g} Elo stronger"
+                    elif decision is None and llr <= lower:
+                        decision = f"H0 accepted: {engines[0]['name']} is not {args.elo1:g} Elo stronger"
+    except KeyboardInterrupt:
+        decision = "interrupted"
+    finally:
+        if pgn_file is not None:
+            pgn_file.close()
+
+    elapsed = time.perf_counter() - start
+    played = wins + draws + losses
+    print()
+    print(f"{event}: {played} games in {elapsed:.0f}s, {played * 3600 / max(elapsed, 1e-9):.0f} games/hour")
+    if played:
+        score, _ = score_statistics(wins, draws, losses)
+        elo, margin = elo_estimate(wins, draws, losses)
+        print(f"{engines[0]['name']}: +{wins} ={draws} -{losses}, score {score:.3f}, Elo {elo:+.1f} +/- {margin:.1f}")
+        print(f"white wins {counts['1-0']}, black wins {counts['0-1']}, draws {counts['1/2-1/2']}")
+        print(f"SPRT: LLR {sprt_llr(wins, draws, losses, args.elo0, args.elo1):+.2f} "
+              f"[{lower:.2f}, {upper:.2f}], {decision or 'no decision'}")
+
+
+if __name__ == "__main__":
+    main()
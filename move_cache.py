@@ -0,0 +1,107 @@
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
+from chess_board import ChessBoard
+from chess_notation import Move
+
+# The legal moves of a position and whether its side to move is in check.
+PositionMoves = Tuple[List[Move], bool]
+
+
+class MoveCache:
+    """
+    Least recently used cache of the legal moves and check status of positions, keyed on their Zobrist key,
+    so that the GUI, the game end detection and the AI share one move generation per position.
+    The cached lists are shared: callers must not modify them.
+    Args:
+        capacity (int): The number of positions kept.
+    """
+    def __init__(self, capacity: int = 64):
+        """
+        Initializes a MoveCache instance.
+        Args:
+            capacity (int): The number of positions kept; the least recently used one is dropped beyond it.
+        """
+        self._capacity = max(capacity, 1)
+        self._entries: 'OrderedDict[int, PositionMoves]' = OrderedDict()
+        # the GUI thread and the AI thread both read the cache
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, board: ChessBoard) -> PositionMoves:
+        """
+        Returns the legal moves and check status of a position, generating them on a miss.
+        Args:
+            board (ChessBoard): The position, a ChessBoard or a BitBoard.
+        Returns:
+            PositionMoves: The legal moves and whether the side to move is in check.
+        """
+        key = board.get_hash()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        entry = (board.get_all_moves(), board.is_check())
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._capacity:
+                self._entries.popitem(last=False)
+        return entry
+
+    def get_all_moves(self, board: ChessBoard) -> List[Move]:
+        """
+        Args:
+            board (ChessBoard): The position.
+        Returns:
+            List[Move]: The legal moves of the side to move, in the order of board.get_all_moves.
+        """
+        return self.get(board)[0]
+
+    def get_piece_moves(self, board: ChessBoard, pos: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Args:
+            board (ChessBoard): The position.
+            pos (Tuple[int, int]): The position (row, col) of a piece of the side to move.
+        Returns:
+            List[Tuple[int, int]]: The legal destinations of the piece.
+        """
+        return [dst for src, dst in self.get(board)[0] if src == pos]
+
+    def is_check(self, board: ChessBoard) -> bool:
+        """
+        Args:
+            board (ChessBoard): The position.
+        Returns:
+            bool: True if the side to move is in check, False otherwise.
+        """
+        return self.get(board)[1]
+
+    def is_game_end(self, board: ChessBoard) -> bool:
+        """
+        Args:
+            board (ChessBoard): The position.
+        Returns:
+            bool: True if the side to move has no legal move: checkmate or stalemate.
+        """
+        return not self.get(board)[0]
+
+    def invalidate(self, key: int):
+        """
+        Drops the entry of a position, if cached.
+        Args:
+            key (int): The Zobrist key of the position.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        Drops every entry.
+        """
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,165 @@
+"""
+Perft: counts the leaf nodes of the legal move tree to a fixed depth, to verify and benchmark the move
+generator without pygame.
+
+    python perft.py --depth 4                  # start position
+    python perft.py --position kiwipete --depth 3 --divide
+    python perft.py --fen "8/8/8/8/8/8/8/K6k w - - 0 1" --depth 5 --board bitboard
+    python perft.py --suite                    # every known count, exits with 1 on a mismatch
+
+The known counts follow the rules of this engine: pawns always promote to a queen and there is no
+en passant, so they differ from the published values of positions where those moves occur.
+"""
+import argparse
+import sys
+import time
+from typing import Dict, List, Tuple
+from chess_bitboard import BOARD_CLASSES
+from chess_notation import START_FEN, Move, move_name
+
+
+# name: (FEN, {depth: leaf count}). The counts were cross-checked between ChessBoard and BitBoard;
+# the published counts of the standard test positions are given where this engine's rules differ.
+POSITIONS: Dict[str, Tuple[str, Dict[int, int]]] = {
+    'start': (START_FEN, {1: 20, 2: 400, 3: 8902, 4: 197281}),
+    # published 48, 2039, 97862: en passant and under-promotions
+    'kiwipete': ('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+                 {1: 48, 2: 2038, 3: 97766}),
+    # published 14, 191, 2812, 43238: en passant
+    'endgame': ('8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1', {1: 14, 2: 191, 3: 2810, 4: 43087}),
+    # published 6, 264, 9467: under-promotions
+    'promotion': ('r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1', {1: 6, 2: 228, 3: 8083}),
+    # published 44, 1486, 62379: under-promotions
+    'middlegame': ('rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8', {1: 41, 2: 1373, 3: 54007}),
+    'symmetric': ('r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10',
+                  {1: 46, 2: 2079, 3: 89890}),
+}
+
+
+def perft(board, depth: int) -> int:
+    """
+    Counts the leaf nodes of the legal move tree of a position.
+    Args:
+        board (ChessBoard | BitBoard): The board; it is restored before returning.
+        depth (int): The number of plies to play.
+    Returns:
+        int: The number of leaf nodes.
+    """
+    moves = board.get_all_moves()
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+    nodes = 0
+    for src, dst in moves:
+        src_pic, dst_pic = board.get_piece(src), board.get_piece(dst)
+        board.move_piece(src, dst)
+        board.promote_pawn(dst)
+        board.change_turn()
+        nodes += perft(board, depth - 1)
+        board.change_turn()
+        board.undo_move(src, dst, src_pic, dst_pic)
+    return nodes
+
+
+def divide(board, depth: int) -> List[Tuple[Move, int]]:
+    """
+    Counts the leaf nodes below every root move of a position.
+    Args:
+        board (ChessBoard | BitBoard): The board; it is restored before returning.
+        depth (int): The number of plies to play, the root move included.
+    Returns:
+        List[Tuple[Move, int]]: Every root move with its leaf count.
+    """
+    result = []
+    for src, dst in board.get_all_moves():
+        src_pic, dst_pic = board.get_piece(src), board.get_piece(dst)
+        board.move_piece(src, dst)
+        board.promote_pawn(dst)
+        board.change_turn()
+        result.append(((src, dst), perft(board, depth - 1)))
+        board.change_turn()
+        board.undo_move(src, dst, src_pic, dst_pic)
+    return result
+
+
+def run(fen: str, depth: int, board_class: type, show_divide: bool = False) -> Tuple[int, float]:
+    """
+    Runs perft on a position and prints the node count and speed.
+    Args:
+        fen (str): The position.
+        depth (int): The number of plies to play.
+        board_class (type): The board implementation, ChessBoard or BitBoard.
+        show_divide (bool): Prints the leaf count of every root move.
+    Returns:
+        Tuple[int, float]: The number of leaf nodes and the elapsed time in seconds.
+    """
+    board = board_class.from_fen(fen)
+    start = time.perf_counter()
+    if show_divide:
+        counts = divide(board, depth)
+        for move, count in counts:
+            print(f"{move_name(move)}: {count}")
+        nodes = sum(count for _, count in counts)
+    else:
+        nodes = perft(board, depth)
+    elapsed = time.perf_counter() - start
+    print(f"depth {depth}: {nodes} nodes, {elapsed:.2f}s, {nodes / max(elapsed, 1e-9):.0f} nodes/s")
+    return nodes, elapsed
+
+
+def run_suite(max_depth: int, board_class: type) -> bool:
+    """
+    Checks the leaf counts of every known position up to a depth.
+    Args:
+        max_depth (int): The deepest depth to check.
+        board_class (type): The board implementation, ChessBoard or BitBoard.
+    Returns:
+        bool: True if every count matches, False otherwise.
+    """
+    passed = True
+    total_nodes, total_time = 0, 0.0
+    for name, (fen, expected) in POSITIONS.items():
+        for depth, count in sorted(expected.items()):
+            if depth > max_depth:
+                break
+            board = board_class.from_fen(fen)
+            start = time.perf_counter()
+            nodes = perft(board, depth)
+            elapsed = time.perf_counter() - start
+            total_nodes += nodes
+            total_time += elapsed
+            status = 'ok' if nodes == count else f'FAILED, expected {count}'
+            passed = passed and nodes == count
+            print(f"{name} depth {depth}: {nodes} nodes, {elapsed:.2f}s {status}")
+    print(f"total: {total_nodes} nodes, {total_time:.2f}s, {total_nodes / max(total_time, 1e-9):.0f} nodes/s")
+    return passed
+
+
+def main():
+    """
+    Parses the command line and runs perft on a position or on the known positions.
+    """
+    parser = argparse.ArgumentParser(description="Count the leaf nodes of the legal move tree.")
+    parser.add_argument('--depth', type=int, default=3, help="number of plies (default 3)")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--fen', help="position to count, in FEN")
+    source.add_argument('--position', choices=sorted(POSITIONS), help="known position to count")
+    parser.add_argument('--board', choices=sorted(BOARD_CLASSES), default='list', help="board implementation")
+    parser.add_argument('--divide', action='store_true', help="print the leaf count of every root move")
+    parser.add_argument('--suite', action='store_true', help="check every known count up to --depth")
+    args = parser.parse_args()
+    board_class = BOARD_CLASSES[args.board]
+
+    if args.suite:
+        sys.exit(0 if run_suite(args.depth, board_class) else 1)
+
+    fen = args.fen if args.fen else POSITIONS[args.position or 'start'][0]
+    nodes, _ = run(fen, args.depth, board_class, args.divide)
+    if args.fen is None:
+        expected = POSITIONS[args.position or 'start'][1].get(args.depth)
+        if expected is not None and nodes != expected:
+            print(f"FAILED, expected {expected}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""
+Headless entry point speaking the UCI protocol on stdin/stdout, for chess GUIs and match runners. It does not
+import pygame, so it runs on servers without a display.
+
+    python uci.py
+    python uci.py --board bitboard
+
+Supported commands: uci, debug, isready, setoption (Hash, Threads, SMP Strategy, BookFile, TablebaseFile),
+ucinewgame, position [startpos | fen <fen>] [moves ...], go [wtime/btime/winc/binc/movestogo/movetime/
+depth/nodes/infinite], stop and quit.
+"""
+import argparse
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, TextIO
+from chess_board import ChessBoard
+from chess_bitboard import BOARD_CLASSES
+from chess_notation import START_FEN, move_name, parse_move, Move
+from chess_ai import ChessAI
+from chess_ai.ai_engine import ROOT_SPLIT, LAZY_SMP
+from chess_ai.minimax_algorithm import MATE_BOUND
+from chess_ai.board_evaluation import CHECKMATE
+
+ENGINE_NAME = 'Chess-pygame'
+ENGINE_AUTHOR = 'Chess-pygame authors'
+MAX_DEPTH = 64  # The depth of a search without a depth limit, which the budget or a stop ends first.
+DEFAULT_MOVES_TO_GO = 30  # The moves the remaining time is shared between when the GUI does not tell.
+MOVE_OVERHEAD = 0.05  # Seconds kept on the clock per move for the communication with the GUI.
+
+
+def uci_move(board, move: Move) -> str:
+    """
+    Returns the UCI notation of a move, with the promotion suffix UCI requires.
+    Args:
+        board (ChessBoard | BitBoard): The position the move is played in.
+        move (Move): The move.
+    Returns:
+        str: The move, e.g. 'e2e4' or 'e7e8q'.
+    """
+    promotion = 'q' if board.get_piece_name(move[0]) == 'p' and move[1][0] in (0, 7) else ''
+    return move_name(move) + promotion
+
+
+def uci_score(score: int) -> str:
+    """
+    Args:
+        score (int): A search score from the side to move's point of view.
+    Returns:
+        str: The score in UCI notation: 'cp <centipawns>' or 'mate <moves>', negative when being mated.
+    """
+    if score > MATE_BOUND:
+        return f"mate {(CHECKMATE - score + 1) // 2}"
+    if score < -MATE_BOUND:
+        return f"mate -{(CHECKMATE + score) // 2}"
+    return f"cp {score}"
+
+
+class UciEngine:
+    """
+    Runs ChessAI behind the UCI protocol. Commands are read by the calling thread and the search runs in a
+    thread of its own, so that stop and isready are answered while it searches.
+    Args:
+        board_class (type): The board implementation, ChessBoard or BitBoard.
+        output (TextIO): The stream the protocol is written to.
+    """
+    def __init__(self, board_class: type = ChessBoard, output: TextIO = sys.stdout):
+        """
+        Initializes a UciEngine instance.
+        Args:
+            board_class (type): The board implementation, ChessBoard or BitBoard.
+            output (TextIO): The stream the protocol is written to, standard output by default.
+        """
+        self._board_class = board_class
+        self._output = output
+        self._output_lock = threading.Lock()
+        self._board = board_class()
+        self._options: Dict[str, object] = {'Hash': 16, 'Threads': 1, 'SMP Strategy': ROOT_SPLIT,
+                                            'BookFile': '', 'TablebaseFile': ''}
+        self._stop_event = threading.Event()
+        self._ai: Optional[ChessAI] = None
+        self._search_thread: Optional[threading.Thread] = None
+        self._search_start = 0.0
+        self._debug = False
+
+    def send(self, line: str):
+        """
+        Writes a line of the protocol.
+        Args:
+            line (str): The line, without its end of line.
+        """
+        with self._output_lock:
+            self._output.write(line + '\n')
+            self._output.flush()
+
+    def run(self, commands: TextIO = sys.stdin):
+        """
+        Reads and executes commands until quit or the end of the input.
+        Args:
+            commands (TextIO): The stream the commands are read from.
+        """
+        for line in commands:
+            if not self.execute(line):
+                break
+        self._stop_search()
+        if self._ai is not None:
+            self._ai.close()
+
+    def execute(self, line: str) -> bool:
+        """
+        Executes one command; unknown commands are ignored, as the protocol requires.
+        Args:
+            line (str): The command line.
+        Returns:
+            bool: False after quit, True otherwise.
+        """
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+        if command == 'quit':
+            return False
+        if command == 'uci':
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            self.send("option name Hash type spin default 16 min 0 max 4096")
+            self.send("option name Threads type spin default 1 min 1 max 64")
+            self.send(f"option name SMP Strategy type combo default {ROOT_SPLIT} var {ROOT_SPLIT} var {LAZY_SMP}")
+            self.send("option name BookFile type string default <empty>")
+            self.send("option name TablebaseFile type string default <empty>")
+            self.send("uciok")
+        elif command == 'debug':
+            self._debug = args[:1] == ['on']
+        elif command == 'isready':
+            self.send("readyok")
+        elif command == 'setoption':
+            self._set_option(args)
+        elif command == 'ucinewgame':
+            self._stop_search()
+            self._close_ai()
+            self._board = self._board_class()
+        elif command == 'position':
+            self._stop_search()
+            self._set_position(args)
+        elif command == 'go':
+            self._stop_search()
+            self._go(args)
+        elif command == 'stop':
+            self._stop_search()
+        elif self._debug:
+            self.send(f"info string unknown command: {command}")
+        return True
+
+    def _set_option(self, args: List[str]):
+        """
+        Executes 'setoption name <name> [value <value>]'. The AI is created again with the new options by
+        the next search.
+        Args:
+            args (List[str]): The tokens after setoption.
+        """
+        if 'name' not in args:
+            return
+        value_at = args.index('value') if 'value' in args else len(args)
+        name = ' '.join(args[args.index('name') + 1:value_at])
+        value = ' '.join(args[value_at + 1:])
+        option = next((option for option in self._options if option.lower() == name.lower()), None)
+        if option is None:
+            self.send(f"info string unknown option: {name}")
+            return
+        try:
+            if option in ('Hash', 'Threads'):
+                self._options[option] = max(int(value), 1 if option == 'Threads' else 0)
+            elif option == 'SMP Strategy' and value not in (ROOT_SPLIT, LAZY_SMP):
+                raise ValueError(value)
+            else:
+                self._options[option] = '' if value == '<empty>' else value
+        except ValueError:
+            self.send(f"info string invalid value for {option}: {value}")
+            return
+        self._stop_search()
+        self._close_ai()
+
+    def _set_position(self, args: List[str]):
+        """
+        Executes 'position [startpos | fen <fen>] [moves <move> ...]'.
+        Args:
+            args (List[str]): The tokens after position.
+        """
+        moves_at = args.index('moves') if 'moves' in args else len(args)
+        if args[:1] == ['fen']:
+            fen = ' '.join(args[1:moves_at])
+        else:
+            fen = START_FEN
+        try:
+            board = self._board_class.from_fen(fen)
+        except ValueError:
+            self.send(f"info string invalid position: {fen}")
+            return
+        for name in args[moves_at + 1:]:
+            try:
+                move = parse_move(name)
+            except ValueError:
+                move = None
+            if move is None or move not in board.get_all_moves():
+                self.send(f"info string illegal move: {name}")
+                break
+            board.move_piece(move[0], move[1])
+            board.promote_pawn(move[1])
+            board.change_turn()
+        self._board = board
+
+    def _get_ai(self) -> ChessAI:
+        """
+        Returns:
+            ChessAI: The AI, created with the current options if needed.
+        """
+        if self._ai is None:
+            self._ai = ChessAI(self._stop_event, board_class=self._board_class,
+                               hash_size_mb=self._options['Hash'], iterative=True,
+                               workers=self._options['Threads'], strategy=self._options['SMP Strategy'],
+                               book_path=self._options['BookFile'] or None,
+                               tablebase_path=self._options['TablebaseFile'] or None)
+            self._ai.on_iteration = self._send_info
+        return self._ai
+
+    def _close_ai(self):
+        """
+        Closes the AI, so that the next search starts from fresh caches and the current options.
+        """
+        if self._ai is not None:
+            self._ai.close()
+            self._ai = None
+
+    def _go(self, args: List[str]):
+        """
+        Executes 'go': sets the budget of the search and starts it in its own thread.
+        Args:
+            args (List[str]): The tokens after go.
+        """
+        params: Dict[str, int] = {}
+        for key, value in zip(args, args[1:]):
+            if key in ('wtime', 'btime', 'winc', 'binc', 'movestogo', 'movetime', 'depth', 'nodes'):
+                try:
+                    params[key] = int(value)
+                except ValueError:
+                    pass
+        infinite = 'infinite' in args
+        try:
+            ai = self._get_ai()
+        except (OSError, ValueError) as error:
+            self.send(f"info string cannot start the engine: {error}")
+            self.send("bestmove 0000")
+            return
+        ai.max_depth = max(1, params.get('depth', MAX_DEPTH))
+        ai.node_limit = params.get('nodes')
+        ai.time_limit = None if infinite else self._time_budget(params)
+        self._stop_event.clear()
+        self._search_start = time.perf_counter()
+        self._search_thread = threading.Thread(target=self._search, args=(ai, self._board.clone(), infinite),
+                                               daemon=True)
+        self._search_thread.start()
+
+    def _time_budget(self, params: Dict[str, int]) -> Optional[float]:
+        """
+        Computes the thinking time of a move from the go parameters.
+        Args:
+            params (Dict[str, int]): The numeric go parameters, times in milliseconds.
+        Returns:
+            Optional[float]: The budget in seconds, or None when the search is not limited by time.
+        """
+        if 'movetime' in params:
+            return max(params['movetime'] / 1000 - MOVE_OVERHEAD, 0.01)
+        clock, increment = ('wtime', 'winc') if self._board.is_white_turn() else ('btime', 'binc')
+        if clock not in params:
+            return None
+        remaining = params[clock] / 1000
+        budget = remaining / params.get('movestogo', DEFAULT_MOVES_TO_GO) + params.get(increment, 0) / 1000 * 0.8
+        return max(min(budget, remaining / 2 - MOVE_OVERHEAD), 0.01)
+
+    def _search(self, ai: ChessAI, board, infinite: bool):
+        """
+        The search thread: finds the best move and sends it. An infinite search that ends by itself waits for
+        stop before answering, as the protocol requires. The GUI waits for bestmove, so it is sent even if the
+        search fails, with the first legal move.
+        Args:
+            ai (ChessAI): The AI.
+            board (ChessBoard | BitBoard): A copy of the position to search.
+            infinite (bool): Whether the search was started with go infinite.
+        """
+        move = None
+        try:
+            ai.find_best_move(board)
+            move = ai.best_move
+        except Exception as error:
+            self.send(f"info string search failed: {error!r}")
+        finally:
+            if infinite:
+                self._stop_event.wait()
+            if move is None:
+                moves = board.get_all_moves()
+                move = moves[0] if moves else None
+            self.send(f"bestmove {uci_move(board, move) if move is not None else '0000'}")
+
+    def _send_info(self, depth: int, score: int, nodes: int, principal_variation: List[Move]):
+        """
+        Sends the info line of a completed iteration.
+        Args:
+            depth (int): The depth of the iteration.
+            score (int): Its score from the side to move's point of view.
+            nodes (int): The nodes visited since the search started.
+            principal_variation (List[Move]): Its principal variation.
+        """
+        elapsed = time.perf_counter() - self._search_start
+        board = self._board.clone()
+        moves = []
+        for move in principal_variation:
+            moves.append(uci_move(board, move))
+            board.move_piece(move[0], move[1])
+            board.promote_pawn(move[1])
+            board.change_turn()
+        self.send(f"info depth {depth} score {uci_score(score)} nodes {nodes} nps {int(nodes / max(elapsed, 1e-6))} "
+                  f"time {int(elapsed * 1000)} pv {' '.join(moves)}".rstrip())
+
+    def _stop_search(self):
+        """
+        Stops the running search, if any, and waits for its best move to be sent.
+        """
+        if self._search_thread is not None:
+            self._stop_event.set()
+            self._search_thread.join()
+            self._search_thread = None
+
+
+def main():
+    """
+    Parses the command line and runs the protocol loop.
+    """
+    parser = argparse.ArgumentParser(description="Run the engine over the UCI protocol.")
+    parser.add_argument('--board', choices=sorted(BOARD_CLASSES), default='list', help="board implementation")
+    args = parser.parse_args()
+    UciEngine(BOARD_CLASSES[args.board]).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import random
+from typing import Dict, List, Tuple
+from const import PIECES
+
+# The keys are drawn from a fixed seed so that a position has the same key in every run,
+# which keeps keys stored on disk (opening books, tables) valid.
+_random = random.Random(0x2D5A3F1C)
+
+# Piece index in the order of the PIECES image names: black pieces 0-5, white pieces 6-11.
+PIECE_INDEX: Dict[Tuple[str, bool], int] = {(name[-1], name.startswith('white')): index
+                                            for index, name in enumerate(PIECES)}
+
+# PIECE_SQUARE_KEYS[piece index][row * 8 + col]
+PIECE_SQUARE_KEYS: List[List[int]] = [[_random.getrandbits(64) for _ in range(64)] for _ in PIECES]
+
+# Key of every combination of the four castling rights bits:
+# 1 white king side, 2 white queen side, 4 black king side, 8 black queen side.
+CASTLING_KEYS: List[int] = [_random.getrandbits(64) for _ in range(16)]
+
+# Toggled whenever the side to move changes; included when black is to move.
+SIDE_KEY: int = _random.getrandbits(64)
+
+
+def piece_key(name: str, is_white: bool, pos: Tuple[int, int]) -> int:
+    """
+    Returns the Zobrist key of a piece standing on a square.
+    Args:
+        name (str): The piece name.
+        is_white (bool): Indicates whether the piece is white.
+        pos (Tuple[int, int]): The position (row, col) of the piece.
+    Returns:
+        int: The 64-bit key.
+    """
+    return PIECE_SQUARE_KEYS[PIECE_INDEX[(name, is_white)]][pos[0] * 8 + pos[1]]